@@ -5,12 +5,75 @@ from flask_openapi3 import Info
 from database.database import Database
 from log.log import Log
 from resources.settings import Settings
+from services.address_enrichment import AddressEnrichment
+from services.async_http_client import AsyncHttpClient
+from services.cep_cache import CepCache
+from services.cep_dataset import CepDataset
+from services.circuit_breaker import CircuitBreaker
+from services.close_sale_dispatcher import CloseSaleDispatcher
+from services.event_loop import EventLoop
+from services.http_client import HttpClient
+from services.ingestion_scheduler import IngestionScheduler
+from services.metrics import Metrics
+from services.query_cache import QueryCache
+from services.sales_ingestion import SalesIngestion
+from services.single_flight import SingleFlight
+from services.viacep import ViaCep
 
 API_TITLE = os.environ.get("API_TITLE")
 VERSION = os.environ.get("VERSION")
 SECRET_KEY = os.environ.get("SECRET_KEY")
 PORT = int(os.environ.get("PORT"))
 HOST = os.environ.get("HOST")
+SERVER_MODE = os.environ.get("SERVER_MODE", "development")
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 4))
+SERVER_THREADS = int(os.environ.get("SERVER_THREADS", 8))
+SERVER_KEEPALIVE = int(os.environ.get("SERVER_KEEPALIVE", 5))
+SERVER_GRACEFUL_TIMEOUT = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))
+CEP_CACHE_TTL = int(os.environ.get("CEP_CACHE_TTL", 86400))
+CEP_CACHE_NEGATIVE_TTL = int(os.environ.get("CEP_CACHE_NEGATIVE_TTL", 3600))
+CEP_CACHE_MAX_SIZE = int(os.environ.get("CEP_CACHE_MAX_SIZE", 10000))
+CEP_CACHE_PATH = os.environ.get("CEP_CACHE_PATH", "")
+QUERY_CACHE_TTL = int(os.environ.get("QUERY_CACHE_TTL", 5))
+QUERY_CACHE_MAX_SIZE = int(os.environ.get("QUERY_CACHE_MAX_SIZE", 1000))
+QUERY_CACHE_REDIS_URL = os.environ.get("QUERY_CACHE_REDIS_URL", "")
+CEP_DATASET_PATH = os.environ.get("CEP_DATASET_PATH", "")
+CEP_DATASET_SOURCE = os.environ.get("CEP_DATASET_SOURCE", "")
+ENRICHMENT_WORKERS = int(os.environ.get("ENRICHMENT_WORKERS", 16))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+LOG_BATCH_SIZE = int(os.environ.get("LOG_BATCH_SIZE", 500))
+LOG_FLUSH_INTERVAL = float(os.environ.get("LOG_FLUSH_INTERVAL", 1))
+LOG_OVERFLOW_POLICY = os.environ.get("LOG_OVERFLOW_POLICY", "block")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+LOG_MAX_PAYLOAD_LENGTH = int(os.environ.get("LOG_MAX_PAYLOAD_LENGTH", 2000))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", 1))
+LOG_DIRECTORY = os.environ.get("LOG_DIRECTORY", "")
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 30))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 2))
+HTTP_BACKOFF_BASE = float(os.environ.get("HTTP_BACKOFF_BASE", 0.2))
+HTTP_BACKOFF_MAX = float(os.environ.get("HTTP_BACKOFF_MAX", 2))
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 32))
+HTTP_ASYNC_POOL_SIZE = int(os.environ.get("HTTP_ASYNC_POOL_SIZE", 200))
+CIRCUIT_FAILURE_THRESHOLD = int(
+    os.environ.get("CIRCUIT_FAILURE_THRESHOLD", 5)
+)
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get("CIRCUIT_RESET_TIMEOUT", 30))
+CIRCUIT_HALF_OPEN_CALLS = int(os.environ.get("CIRCUIT_HALF_OPEN_CALLS", 1))
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+INGESTION_INTERVAL = float(os.environ.get("INGESTION_INTERVAL", 60))
+INGESTION_POLL_INTERVAL = float(os.environ.get("INGESTION_POLL_INTERVAL", 1))
+INGESTION_JOB_TIMEOUT = float(os.environ.get("INGESTION_JOB_TIMEOUT", 3600))
+PIPELINE_BATCH_SIZE = int(os.environ.get("PIPELINE_BATCH_SIZE", 500))
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", 4))
+OUTBOX_WORKERS = int(os.environ.get("OUTBOX_WORKERS", 8))
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 200))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 10))
+OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", 5))
+OUTBOX_BACKOFF_BASE = float(os.environ.get("OUTBOX_BACKOFF_BASE", 1))
+OUTBOX_BACKOFF_MAX = float(os.environ.get("OUTBOX_BACKOFF_MAX", 300))
 
 INFORMATION = Info(title=API_TITLE, version=VERSION)
 
@@ -19,6 +82,112 @@ flask_settings = Settings(
 )
 flask_settings.generate_app()
 
+event_loop = EventLoop()
+flask_settings.use_event_loop(event_loop)
+
+metrics = Metrics(
+    directory=METRICS_DIR, flush_interval=METRICS_FLUSH_INTERVAL
+)
+flask_settings.use_metrics(metrics)
+
 app = flask_settings.app
 database = Database()
-log = Log()
+database.use_metrics(metrics)
+log = Log(
+    queue_size=LOG_QUEUE_SIZE,
+    batch_size=LOG_BATCH_SIZE,
+    flush_interval=LOG_FLUSH_INTERVAL,
+    overflow_policy=LOG_OVERFLOW_POLICY,
+    level=LOG_LEVEL,
+    log_format=LOG_FORMAT,
+    max_payload_length=LOG_MAX_PAYLOAD_LENGTH,
+    payload_sample_rate=LOG_PAYLOAD_SAMPLE_RATE,
+    directory=LOG_DIRECTORY,
+)
+query_cache = QueryCache(
+    ttl=QUERY_CACHE_TTL,
+    max_size=QUERY_CACHE_MAX_SIZE,
+    log=log,
+    redis_url=QUERY_CACHE_REDIS_URL,
+)
+database.use_query_cache(query_cache)
+circuit_breakers = {
+    upstream: CircuitBreaker(
+        name=upstream,
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=CIRCUIT_RESET_TIMEOUT,
+        half_open_calls=CIRCUIT_HALF_OPEN_CALLS,
+    )
+    for upstream in ["viacep", "get_sales", "close_sale"]
+}
+http_client = HttpClient(
+    connect_timeout=HTTP_CONNECT_TIMEOUT,
+    read_timeout=HTTP_READ_TIMEOUT,
+    retries=HTTP_RETRIES,
+    backoff_base=HTTP_BACKOFF_BASE,
+    backoff_max=HTTP_BACKOFF_MAX,
+    pool_size=HTTP_POOL_SIZE,
+    circuit_breakers=circuit_breakers,
+    metrics=metrics,
+)
+async_http_client = AsyncHttpClient(
+    connect_timeout=HTTP_CONNECT_TIMEOUT,
+    read_timeout=HTTP_READ_TIMEOUT,
+    retries=HTTP_RETRIES,
+    backoff_base=HTTP_BACKOFF_BASE,
+    backoff_max=HTTP_BACKOFF_MAX,
+    pool_size=HTTP_ASYNC_POOL_SIZE,
+    circuit_breakers=circuit_breakers,
+    metrics=metrics,
+)
+cep_cache = CepCache(
+    ttl=CEP_CACHE_TTL,
+    max_size=CEP_CACHE_MAX_SIZE,
+    negative_ttl=CEP_CACHE_NEGATIVE_TTL,
+    persist_path=CEP_CACHE_PATH,
+)
+cep_dataset = CepDataset(path=CEP_DATASET_PATH)
+viacep_single_flight = SingleFlight()
+get_sales_single_flight = SingleFlight()
+viacep = ViaCep(
+    cache=cep_cache,
+    dataset=cep_dataset,
+    http_client=http_client,
+    async_http_client=async_http_client,
+    single_flight=viacep_single_flight,
+)
+address_enrichment = AddressEnrichment(
+    viacep=viacep, log=log, metrics=metrics, max_workers=ENRICHMENT_WORKERS
+)
+close_sale_dispatcher = CloseSaleDispatcher(
+    database=database,
+    log=log,
+    http_client=http_client,
+    max_workers=OUTBOX_WORKERS,
+    batch_size=OUTBOX_BATCH_SIZE,
+    max_attempts=OUTBOX_MAX_ATTEMPTS,
+    poll_interval=OUTBOX_POLL_INTERVAL,
+    backoff_base=OUTBOX_BACKOFF_BASE,
+    backoff_max=OUTBOX_BACKOFF_MAX,
+)
+sales_ingestion = SalesIngestion(
+    database=database,
+    log=log,
+    http_client=http_client,
+    async_http_client=async_http_client,
+    address_enrichment=address_enrichment,
+    close_sale_dispatcher=close_sale_dispatcher,
+    single_flight=get_sales_single_flight,
+    batch_size=PIPELINE_BATCH_SIZE,
+    queue_size=PIPELINE_QUEUE_SIZE,
+)
+ingestion_scheduler = IngestionScheduler(
+    database=database,
+    sales_ingestion=sales_ingestion,
+    log=log,
+    metrics=metrics,
+    interval=INGESTION_INTERVAL,
+    poll_interval=INGESTION_POLL_INTERVAL,
+    job_timeout=INGESTION_JOB_TIMEOUT,
+    run_jobs=SERVER_MODE != "production",
+)
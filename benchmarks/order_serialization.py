@@ -0,0 +1,148 @@
+import argparse
+import os
+import tempfile
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from database.database import Database
+from database.model.orders import Orders
+from resources.json_provider import JsonProvider, orjson
+from schemas.orders import ORDER_RESPONSE_COLUMNS, format_order_rows
+
+
+def create_orders(database: Database, total: int) -> None:
+    """Inserts the synthetic pending orders read by the benchmark"""
+    rows = [
+        {
+            "name": f"Product {sales_id % 500}",
+            "price": 10.5 + sales_id % 90,
+            "supplier": f"Supplier {sales_id % 40}",
+            "category": f"Category {sales_id % 12}",
+            "description": "Synthetic order used by the benchmark",
+            "sales_id": sales_id,
+            "quantity": 1 + sales_id % 5,
+            "value": 21.0 + sales_id % 180,
+            "sale_date": f"2024-01-{1 + sales_id % 28:02d} 10:00:00",
+            "zip_code": f"{sales_id % 100000000:08d}",
+            "country": "Brasil",
+            "city": "Sao Paulo",
+            "state": "SP",
+            "street": "Avenida Paulista",
+            "neighborhood": "Bela Vista",
+        }
+        for sales_id in range(1, total + 1)
+    ]
+
+    database.insert_ignore(Orders, rows)
+
+
+def format_hydrated_order(order: Orders) -> dict:
+    """Formats an order read as a table instance, as done before"""
+    return {
+        "order_id": order.order_id,
+        "name": order.name,
+        "price": order.price,
+        "supplier": order.supplier,
+        "category": order.category,
+        "description": order.description,
+        "sales_id": order.sales_id,
+        "quantity": order.quantity,
+        "value": order.value,
+        "sale_date": order.sale_date,
+        "zip_code": order.zip_code,
+        "country": order.country,
+        "city": order.city,
+        "state": order.state,
+        "street": order.street,
+        "neighborhood": order.neighborhood,
+    }
+
+
+def read_hydrated_page(database: Database, cursor: int, limit: int) -> list:
+    """Reads a page of orders as table instances, as done before"""
+    orders = database.select_data_table_condition(
+        table=Orders,
+        conditions=[
+            Orders.invoice_status == "Pending", Orders.order_id > cursor
+        ],
+        order_by=Orders.order_id,
+        limit=limit,
+    )
+
+    return [format_hydrated_order(order) for order in orders]
+
+
+def read_tuple_page(database: Database, cursor: int, limit: int) -> list:
+    """Reads a page of orders as column tuples"""
+    rows = database.select_columns_condition(
+        columns=ORDER_RESPONSE_COLUMNS,
+        conditions=[
+            Orders.invoice_status == "Pending", Orders.order_id > cursor
+        ],
+        order_by=Orders.order_id,
+        limit=limit,
+    )
+
+    return format_order_rows(rows)
+
+
+def measure(database: Database, read_page, provider, limit: int) -> float:
+    """Reads and serializes every pending order, returning rows/sec"""
+    cursor = 0
+    total = 0
+    start = time.perf_counter()
+
+    while True:
+        orders = read_page(database, cursor, limit)
+
+        if len(orders) == 0:
+            break
+
+        provider.dumps({"message": "Success", "orders": orders})
+        cursor = orders[-1]["order_id"]
+        total += len(orders)
+
+    return total / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Compares the rows/sec of the pending invoices serialization paths"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    arguments = parser.parse_args()
+
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    paths = {
+        "hydrated orders, json": (read_hydrated_page, default_provider),
+        "column tuples, json": (read_tuple_page, default_provider),
+    }
+
+    if orjson is not None:
+        paths["column tuples, orjson"] = (read_tuple_page, JsonProvider(app))
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database()
+        database.DB_URL = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        database.setup_database_environment()
+        create_orders(database, arguments.orders)
+
+        print(f"{arguments.orders} orders, pages of {arguments.page_size}")
+
+        for name, (read_page, provider) in paths.items():
+            rates = [
+                measure(database, read_page, provider, arguments.page_size)
+                for _ in range(arguments.repeat)
+            ]
+
+            print(f"{name:<24} {max(rates):>12,.0f} rows/sec")
+
+        database.close_database()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from benchmarks.stub_servers import StubServers, generate_sales
+
+SCENARIOS = [
+    "add_order",
+    "get_sales_order",
+    "get_pending_invoices",
+    "get_pending_invoices_cached",
+    "complete_order",
+]
+
+
+def percentile(sorted_samples: list, percent: float) -> float:
+    """Returns the nearest-rank percentile of the sorted samples"""
+    if len(sorted_samples) == 0:
+        return 0.0
+
+    rank = math.ceil(percent / 100 * len(sorted_samples))
+
+    return sorted_samples[max(0, rank - 1)]
+
+
+def summarize(
+    latencies: list,
+    seconds: float,
+    errors: int,
+    items: int,
+    peak_memory: int,
+) -> dict:
+    """Summarizes the samples of a scenario"""
+    samples = sorted(latency * 1000 for latency in latencies)
+
+    return {
+        "operations": len(samples),
+        "errors": errors,
+        "seconds": round(seconds, 4),
+        "throughput_per_second": round(len(samples) / seconds, 2),
+        "items_per_second": round(items / seconds, 2),
+        "latency_ms": {
+            "p50": round(percentile(samples, 50), 3),
+            "p95": round(percentile(samples, 95), 3),
+            "p99": round(percentile(samples, 99), 3),
+            "mean": round(sum(samples) / max(1, len(samples)), 3),
+            "max": round(samples[-1] if samples else 0.0, 3),
+        },
+        "peak_memory_mb": round(peak_memory / 1024 / 1024, 3),
+    }
+
+
+def configure_environment(directory: str) -> None:
+    """
+    Sets the environment read by the aplication when it is imported,
+    keeping the variables already exported, such as DB_URL.
+    """
+    database_path = os.path.join(directory, "benchmark.sqlite3")
+    defaults = {
+        "API_TITLE": "Order Management Benchmark",
+        "VERSION": "benchmark",
+        "SECRET_KEY": "benchmark",
+        "PORT": "5001",
+        "HOST": "127.0.0.1",
+        "DB_URL": f"sqlite:///{database_path}",
+        "INGESTION_INTERVAL": "0",
+        "CEP_CACHE_PATH": "",
+        "CEP_DATASET_PATH": "",
+        "QUERY_CACHE_REDIS_URL": "",
+        "LOG_DIRECTORY": os.path.join(directory, "logs"),
+    }
+
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+
+def get_commit() -> str:
+    """Returns the current git commit, when available"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+class BenchmarkRunner:
+    """
+    Class to measure the order routes of the aplication in process,
+    against the local stubs of the online store and ViaCep.
+    """
+
+    def __init__(self, arguments: argparse.Namespace, stubs_url: str):
+        # The aplication reads its settings from the environment
+        # when imported, so it is only imported once it is configured.
+        import app
+        import resources.orders
+        import resources.request_context
+        from services.close_sale_dispatcher import CloseSaleDispatcher
+        from services.sales_ingestion import SalesIngestion
+        from services.viacep import ViaCep
+
+        SalesIngestion.GET_SALES_URL = f"{stubs_url}/get_sales"
+        CloseSaleDispatcher.CLOSE_SALE_URL = f"{stubs_url}/close_sale"
+        ViaCep.URL = f"{stubs_url}/ws/{{zip_code}}/json/"
+
+        self._arguments = arguments
+        self._app = app
+        self._orders = resources.orders.Orders
+        self._results = {}
+
+    def _client(self):
+        """Method to create a test client of the aplication"""
+        return self._app.app.test_client()
+
+    def _trace_memory(self, operation) -> int:
+        """Method to measure the peak traced memory of an operation"""
+        tracemalloc.start()
+
+        try:
+            operation()
+
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def _reset_orders(self) -> None:
+        """Method to delete the ingested orders and their notifications"""
+        from database.model.close_sale_outbox import CloseSaleOutbox
+        from database.model.ingestion_watermark import IngestionWatermark
+
+        database = self._app.database
+
+        with database.unit_of_work():
+            for table in [self._orders, CloseSaleOutbox, IngestionWatermark]:
+                database.delete_data_table_condition(table, [])
+
+    def _get_order_ids(self) -> list:
+        """Method to list the ids of the ingested orders"""
+        rows = self._app.database.select_columns_condition(
+            columns=[self._orders.order_id],
+            conditions=[],
+            order_by=self._orders.order_id,
+        )
+
+        return [row[0] for row in rows]
+
+    def _ingest(self) -> dict:
+        """Method to start a full ingestion by add_order and wait for it"""
+        response = self._client().post("/add_order?full_sync=true")
+        job_id = response.json["job_id"]
+
+        while True:
+            job = self._app.ingestion_scheduler.get_job(job_id)
+
+            if job["status"] not in ["pending", "running"]:
+                return job
+
+            time.sleep(0.005)
+
+    def _dispatch(self) -> int:
+        """Method to drain the close sale outbox"""
+        dispatched = 0
+
+        while True:
+            batch = self._app.close_sale_dispatcher.dispatch_pending()
+
+            if batch == 0:
+                return dispatched
+
+            dispatched += batch
+
+    def _run_requests(self, name: str, send, count: int, items: int) -> None:
+        """
+        Method to send the requests of a scenario concurrently,
+        then once more alone to measure its peak memory.
+        """
+        def timed_send(index: int) -> tuple:
+            start = time.perf_counter()
+            response = send(index)
+
+            return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(self._arguments.concurrency) as executor:
+            samples = list(executor.map(timed_send, range(count)))
+
+        seconds = time.perf_counter() - start
+        peak_memory = self._trace_memory(lambda: send(0))
+
+        self._results[name] = summarize(
+            latencies=[latency for latency, _ in samples],
+            seconds=seconds,
+            errors=sum(1 for _, status in samples if status >= 400),
+            items=items * count,
+            peak_memory=peak_memory,
+        )
+
+    def run_add_order(self) -> None:
+        """
+        Method to measure full ingestions, reported as add_order,
+        and the outbox drains, reported as close_sale_dispatch.
+        """
+        ingestions = []
+        dispatches = []
+
+        for _ in range(self._arguments.ingestions):
+            self._reset_orders()
+
+            start = time.perf_counter()
+            job = self._ingest()
+            ingestions.append((time.perf_counter() - start, job))
+
+            start = time.perf_counter()
+            dispatched = self._dispatch()
+            dispatches.append((time.perf_counter() - start, dispatched))
+
+        self._reset_orders()
+        peak_memory = self._trace_memory(self._ingest)
+        dispatch_peak_memory = self._trace_memory(self._dispatch)
+
+        self._results["add_order"] = summarize(
+            latencies=[latency for latency, _ in ingestions],
+            seconds=sum(latency for latency, _ in ingestions),
+            errors=sum(
+                1 for _, job in ingestions if job["status"] != "succeeded"
+            ),
+            items=sum(
+                (job["summary"] or {}).get("added", 0)
+                for _, job in ingestions
+            ),
+            peak_memory=peak_memory,
+        )
+        self._results["close_sale_dispatch"] = summarize(
+            latencies=[latency for latency, _ in dispatches],
+            seconds=sum(latency for latency, _ in dispatches),
+            errors=0,
+            items=sum(dispatched for _, dispatched in dispatches),
+            peak_memory=dispatch_peak_memory,
+        )
+
+    def run_get_sales_order(self) -> None:
+        """Method to measure the enriched open sales route"""
+        self._run_requests(
+            name="get_sales_order",
+            send=lambda index: self._client().get("/get_sales_order"),
+            count=self._arguments.requests,
+            items=self._arguments.sales,
+        )
+
+    def _get_page_urls(self) -> list:
+        """Method to list the urls of every pending invoices page"""
+        page_size = self._arguments.page_size
+        order_ids = self._get_order_ids()
+        urls = [f"/get_pending_invoices?limit={page_size}"]
+
+        for position in range(page_size - 1, len(order_ids) - 1, page_size):
+            urls.append(f"{urls[0]}&cursor={order_ids[position]}")
+
+        return urls
+
+    def run_get_pending_invoices(self) -> None:
+        """Method to measure the pending invoices pages, uncached"""
+        urls = self._get_page_urls()
+        query_cache = self._app.query_cache
+
+        def send(index: int):
+            query_cache.invalidate({self._orders.__tablename__})
+
+            return self._client().get(urls[index % len(urls)])
+
+        self._run_requests(
+            name="get_pending_invoices",
+            send=send,
+            count=self._arguments.requests,
+            items=self._arguments.page_size,
+        )
+
+    def run_get_pending_invoices_cached(self) -> None:
+        """Method to measure the pending invoices pages, once cached"""
+        urls = self._get_page_urls()
+        client = self._client()
+
+        for url in urls:
+            client.get(url)
+
+        self._run_requests(
+            name="get_pending_invoices_cached",
+            send=lambda index: self._client().get(urls[index % len(urls)]),
+            count=self._arguments.requests,
+            items=self._arguments.page_size,
+        )
+
+    def run_complete_order(self) -> None:
+        """Method to measure the completion of distinct orders"""
+        order_ids = self._get_order_ids()
+        count = min(self._arguments.requests, len(order_ids))
+
+        self._run_requests(
+            name="complete_order",
+            send=lambda index: self._client().put(
+                "/complete_order", data={"order_id": order_ids[index]}
+            ),
+            count=count,
+            items=1,
+        )
+
+    def run(self) -> dict:
+        """Method to run the selected scenarios in order"""
+        self._app.log.start_log()
+        self._app.database.setup_database_environment()
+        self._app.query_cache.start_cache()
+        self._app.cep_cache.start_cache()
+
+        try:
+            for scenario in SCENARIOS:
+                if scenario in self._arguments.scenarios:
+                    print(f"Running {scenario}", file=sys.stderr)
+                    getattr(self, f"run_{scenario}")()
+        finally:
+            self._app.ingestion_scheduler.stop()
+            self._app.event_loop.run(self._app.async_http_client.close())
+            self._app.event_loop.stop()
+            self._app.database.close_database()
+            self._app.log.stop_log()
+
+        return {
+            "database": self._app.database.backend,
+            "json_provider": type(self._app.app.json).__name__,
+            "scenarios": self._results,
+        }
+
+
+def compare(results: dict, baseline: dict) -> None:
+    """Prints the throughput and latency changes against a baseline"""
+    ignored_options = ["output", "baseline", "scenarios"]
+    different_options = [
+        option for option, value in results["config"].items()
+        if option not in ignored_options
+        and baseline.get("config", {}).get(option) != value
+    ]
+
+    if len(different_options) > 0:
+        print(f"Warning: the baseline was run with other {different_options}")
+
+    print(f"{'scenario':<30}{'metric':<24}{'baseline':>12}{'current':>12}"
+          f"{'change':>10}")
+
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+
+        if previous is None:
+            continue
+
+        metrics = {
+            "throughput_per_second": (
+                previous["throughput_per_second"],
+                current["throughput_per_second"],
+            ),
+            "items_per_second": (
+                previous["items_per_second"], current["items_per_second"]
+            ),
+        }
+
+        for key in ["p50", "p95", "p99"]:
+            metrics[f"latency_ms.{key}"] = (
+                previous["latency_ms"][key], current["latency_ms"][key]
+            )
+
+        metrics["peak_memory_mb"] = (
+            previous["peak_memory_mb"], current["peak_memory_mb"]
+        )
+
+        for metric, (old, new) in metrics.items():
+            change = (new - old) / old * 100 if old else 0.0
+
+            print(f"{name:<30}{metric:<24}{old:>12.2f}{new:>12.2f}"
+                  f"{change:>+9.1f}%")
+
+
+def main() -> None:
+    """
+    Runs the order route benchmarks against synthetic sales feeds
+    and writes the results as JSON, so runs can be compared.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sales", type=int, default=2000)
+    parser.add_argument("--incomplete-ratio", type=float, default=0.3)
+    parser.add_argument("--zip-codes", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--store-latency", type=float, default=0.005)
+    parser.add_argument("--viacep-latency", type=float, default=0.005)
+    parser.add_argument("--ingestions", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS
+    )
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", default="")
+    arguments = parser.parse_args()
+
+    sales = generate_sales(
+        total=arguments.sales,
+        incomplete_ratio=arguments.incomplete_ratio,
+        zip_codes=arguments.zip_codes,
+        seed=arguments.seed,
+    )
+    stubs = StubServers(
+        sales=sales,
+        store_latency=arguments.store_latency,
+        viacep_latency=arguments.viacep_latency,
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure_environment(directory)
+        stubs_url = stubs.start()
+
+        try:
+            run_results = BenchmarkRunner(arguments, stubs_url).run()
+        finally:
+            stubs.stop()
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": get_commit(),
+        "config": vars(arguments),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "database": run_results["database"],
+            "json_provider": run_results["json_provider"],
+        },
+        "upstream_requests": stubs.requests,
+        "max_rss_mb": round(max_rss / 1024, 3),
+        "scenarios": run_results["scenarios"],
+    }
+
+    with open(arguments.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=2)
+
+    print(json.dumps(results["scenarios"], indent=2))
+
+    if arguments.baseline:
+        with open(arguments.baseline, encoding="utf-8") as baseline:
+            compare(results, json.load(baseline))
+
+
+if __name__ == "__main__":
+    main()
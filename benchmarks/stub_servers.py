@@ -0,0 +1,212 @@
+import json
+import random
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlsplit
+
+ADDRESS_FIELDS = ["city", "state", "street", "neighborhood"]
+CATEGORIES = ["Eletronics", "Books", "Clothes", "Toys", "Sports", "Home"]
+STATES = ["SP", "RJ", "MG", "RS", "PR", "BA", "SC", "PE"]
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    """Class to accept the bursts of concurrent benchmark requests"""
+
+    daemon_threads = True
+    request_queue_size = 512
+
+
+def generate_sales(
+    total: int, incomplete_ratio: float, zip_codes: int, seed: int
+) -> list:
+    """
+    Generates a synthetic online store feed of open sales.
+    The incomplete sales have empty address fields to be enriched
+    with the zip codes drawn from a pool of the given size.
+    """
+    generator = random.Random(seed)
+    zip_code_pool = [
+        f"{generator.randrange(1000000, 99999999):08d}"
+        for _ in range(max(1, zip_codes))
+    ]
+    sales = []
+
+    for sales_id in range(1, total + 1):
+        quantity = generator.randint(1, 5)
+        price = round(generator.uniform(5, 500), 2)
+        sale = {
+            "sales_id": sales_id,
+            "name": f"Product {generator.randrange(1000)}",
+            "price": price,
+            "supplier": f"Supplier {generator.randrange(50)}",
+            "category": generator.choice(CATEGORIES),
+            "description": "Synthetic sale of the benchmark feed",
+            "quantity": quantity,
+            "value": round(price * quantity, 2),
+            "sale_date": (
+                f"2024-{generator.randint(1, 12):02d}-"
+                f"{generator.randint(1, 28):02d} 12:00:00"
+            ),
+            "zip_code": generator.choice(zip_code_pool),
+            "country": "Brasil",
+            "city": "Sao Paulo",
+            "state": generator.choice(STATES),
+            "street": f"Rua {generator.randrange(300)}",
+            "neighborhood": f"Bairro {generator.randrange(80)}",
+        }
+
+        if generator.random() < incomplete_ratio:
+            for field in ADDRESS_FIELDS:
+                sale[field] = ""
+
+        sales.append(sale)
+
+    return sales
+
+
+class StubServers:
+    """
+    Class to serve the online store and ViaCep routes used by the
+    aplication from a local threaded HTTP server, with a fixed latency.
+    The zip codes starting with 0 are answered as not found.
+    """
+
+    def __init__(
+        self,
+        sales: list,
+        store_latency: float,
+        viacep_latency: float,
+        port: int = 0,
+    ):
+        self._sales = sales
+        self._store_latency = store_latency
+        self._viacep_latency = viacep_latency
+        self._port = port
+        self._server = None
+        self._thread = None
+        self._requests = Counter()
+        self._lock = Lock()
+
+    def _count(self, route: str) -> None:
+        """Method to count a request of a route"""
+        with self._lock:
+            self._requests[route] += 1
+
+    def _get_sales(self, query: str) -> tuple:
+        """Method to answer the open sales after the given sale"""
+        time.sleep(self._store_latency)
+
+        after_sales_id = int(
+            parse_qs(query).get("after_sales_id", ["0"])[0]
+        )
+        sales = [
+            sale for sale in self._sales
+            if sale["sales_id"] > after_sales_id
+        ]
+
+        return 200, {"message": "Success", "sales": sales}
+
+    def _close_sale(self, body: str) -> tuple:
+        """Method to answer the closing of a sale"""
+        time.sleep(self._store_latency)
+
+        sales_id = parse_qs(body).get("sales_id", [""])[0]
+
+        return 200, {"message": f"Sale {sales_id} closed successfully"}
+
+    def _get_viacep(self, zip_code: str) -> tuple:
+        """Method to answer a deterministic address for a zip code"""
+        time.sleep(self._viacep_latency)
+
+        if zip_code.startswith("0"):
+            return 200, {"erro": True}
+
+        return 200, {
+            "cep": f"{zip_code[:5]}-{zip_code[5:]}",
+            "logradouro": f"Rua {zip_code[-3:]}",
+            "bairro": f"Bairro {zip_code[-2:]}",
+            "localidade": f"Cidade {zip_code[:2]}",
+            "uf": STATES[int(zip_code) % len(STATES)],
+        }
+
+    def _create_handler(self):
+        """Method to create the request handler bound to the stubs"""
+        stubs = self
+
+        class StubHandler(BaseHTTPRequestHandler):
+            """Class to route the requests to the stubs"""
+
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status_code: int, data: dict) -> None:
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+
+                if url.path == "/get_sales":
+                    stubs._count("get_sales")
+                    self._send(*stubs._get_sales(url.query))
+                elif url.path.startswith("/ws/"):
+                    stubs._count("viacep")
+                    self._send(*stubs._get_viacep(url.path.split("/")[2]))
+                else:
+                    self._send(404, {"message": "Error: Not found"})
+
+            def do_PUT(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode("utf-8")
+
+                if urlsplit(self.path).path == "/close_sale":
+                    stubs._count("close_sale")
+                    self._send(*stubs._close_sale(body))
+                else:
+                    self._send(404, {"message": "Error: Not found"})
+
+        return StubHandler
+
+    @property
+    def url(self) -> str:
+        """Method to return the base url of the stubs"""
+        host, port = self._server.server_address[:2]
+
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> dict:
+        """Method to return the request counters of each route"""
+        with self._lock:
+            return dict(self._requests)
+
+    def start(self) -> str:
+        """Method to start serving in a thread, returning the base url"""
+        self._server = StubHTTPServer(
+            ("127.0.0.1", self._port), self._create_handler()
+        )
+        self._thread = Thread(
+            target=self._server.serve_forever, name="stubs", daemon=True
+        )
+        self._thread.start()
+
+        return self.url
+
+    def stop(self) -> None:
+        """Method to stop serving"""
+        if self._server is None:
+            return
+
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
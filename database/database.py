@@ -1,27 +1,106 @@
+import csv
+import io
 import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+from threading import local
 
-from sqlalchemy import create_engine
+from sqlalchemy import (create_engine, event, func, insert, inspect, literal,
+                        select, text)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy_utils import create_database, database_exists
 
 
+def timed(method):
+    """
+    Decorator to export the duration and errors of a Database method,
+    once the database has metrics to export them to.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._metrics is None:
+            return method(self, *args, **kwargs)
+
+        labels = (method.__name__,)
+        start = time.perf_counter()
+
+        try:
+            return method(self, *args, **kwargs)
+        except Exception as error:
+            self._metrics.inc("db_query_errors_total", labels)
+            raise error
+        finally:
+            self._metrics.observe(
+                "db_query_duration_seconds",
+                time.perf_counter() - start,
+                labels,
+            )
+
+    return wrapper
+
+
 class Database:
     """Class for general database settings"""
 
     DB_PATH = "database/database-file/order-management.sqlite3"
+    DB_URL = os.environ.get("DB_URL", f"sqlite:///{DB_PATH}")
+    INSERT_CHUNK_SIZE = int(os.environ.get("DB_INSERT_CHUNK_SIZE", 1000))
+    POOL_SETTINGS = {
+        "sqlite": {
+            "pool_size": int(os.environ.get("DB_POOL_SIZE", 10)),
+            "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+            "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+            "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 3600)),
+        },
+        "postgresql": {
+            "pool_size": int(os.environ.get("DB_POOL_SIZE", 20)),
+            "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+            "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+            "pool_use_lifo": True,
+        },
+    }
+    COPY_NULL = "\\N"
+    POSTGRES_CONNECT_ARGS = {
+        "application_name": "order-management",
+        "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", 10)),
+    }
+    SQLITE_PRAGMAS = {
+        "journal_mode": os.environ.get("DB_SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.environ.get("DB_SQLITE_SYNCHRONOUS", "NORMAL"),
+        "cache_size": int(os.environ.get("DB_SQLITE_CACHE_SIZE", -64000)),
+        "mmap_size": int(os.environ.get("DB_SQLITE_MMAP_SIZE", 268435456)),
+        "busy_timeout": int(os.environ.get("DB_SQLITE_BUSY_TIMEOUT", 5000)),
+        "temp_store": "MEMORY",
+    }
     BASE = declarative_base()
 
     def __init__(self):
         self._engine = None
         self._session = None
+        self._query_cache = None
+        self._metrics = None
+        self._local = local()
+
+    @property
+    def backend(self) -> str:
+        """Method to return the dialect name of the database"""
+        return self._engine.dialect.name
 
     def _create_database(self) -> None:
         """Database creation method"""
-        db_directory = os.path.join(os.getcwd(), "database", "database-file")
+        if self.backend == "sqlite":
+            db_directory = os.path.join(
+                os.getcwd(), "database", "database-file"
+            )
 
-        if not os.path.isdir(db_directory):
-            os.makedirs(db_directory)
+            if not os.path.isdir(db_directory):
+                os.makedirs(db_directory)
 
         db_url = self._engine.url
 
@@ -30,21 +109,139 @@ class Database:
 
         self.BASE.metadata.create_all(self._engine)
 
+    def _set_sqlite_pragmas(
+        self, dbapi_connection, connection_record
+    ) -> None:
+        """Method to apply the PRAGMAs to a new SQLite connection"""
+        cursor = dbapi_connection.cursor()
+
+        for pragma, value in self.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+
+        cursor.close()
+
     def _create_engine(self) -> None:
-        """Engine creation method"""
-        db_url = f"sqlite:///{self.DB_PATH}"
+        """
+        Engine creation method, from the configured database URL
+        with the pool settings of its backend.
+        """
+        backend = self.DB_URL.split(":", 1)[0].split("+", 1)[0]
+        connect_args = {}
+
+        if backend == "sqlite":
+            connect_args = {"check_same_thread": False}
+        elif backend == "postgresql":
+            connect_args = dict(self.POSTGRES_CONNECT_ARGS)
+
         self._engine = create_engine(
-            db_url, echo=False, connect_args={"check_same_thread": False}
+            self.DB_URL,
+            echo=False,
+            connect_args=connect_args,
+            poolclass=QueuePool,
+            pool_pre_ping=True,
+            **self.POOL_SETTINGS.get(backend, self.POOL_SETTINGS["sqlite"]),
         )
 
-    def _create_session(self) -> None:
-        """Method to create a session"""
-        session_maker = sessionmaker(bind=self._engine)
-        self._session = session_maker()
+        if backend == "sqlite":
+            event.listen(self._engine, "connect", self._set_sqlite_pragmas)
+
+    def _create_session_factory(self) -> None:
+        """Method to create the thread-scoped session factory"""
+        session_maker = sessionmaker(
+            bind=self._engine, expire_on_commit=False
+        )
+        self._session = scoped_session(session_maker)
+
+    def _get_insert_columns(self, table: object) -> list:
+        """Method to list the columns of a table that rows must fill"""
+        return [
+            column for column in table.__table__.columns
+            if not (column.primary_key and column.autoincrement is True)
+        ]
+
+    def _get_row_values(self, table: object, row: dict) -> list:
+        """
+        Method to list the values of a row for every insertable column,
+        using the scalar column defaults for the missing ones.
+        """
+        values = []
+
+        for column in self._get_insert_columns(table):
+            if column.name in row:
+                values.append(row[column.name])
+            elif column.default is not None and column.default.is_scalar:
+                values.append(column.default.arg)
+            else:
+                values.append(None)
+
+        return values
+
+    def _copy_insert_ignore(
+        self, session, table: object, rows: list, returning: object = None
+    ):
+        """
+        Method to bulk load rows into Postgres with COPY through
+        a temporary table, skipping the rows that conflict.
+        Returns the number of inserted rows, or the values of the
+        returning column of the inserted rows when it is given.
+        """
+        table_name = table.__tablename__
+        column_names = ", ".join(
+            column.name for column in self._get_insert_columns(table)
+        )
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        for row in rows:
+            writer.writerow(
+                [
+                    self.COPY_NULL if value is None else value
+                    for value in self._get_row_values(table, row)
+                ]
+            )
+
+        buffer.seek(0)
+
+        cursor = session.connection().connection.cursor()
+
+        try:
+            cursor.execute(
+                f"CREATE TEMP TABLE copy_{table_name} "
+                f"(LIKE {table_name} INCLUDING DEFAULTS)"
+            )
+            cursor.copy_expert(
+                f"COPY copy_{table_name} ({column_names}) "
+                f"FROM STDIN WITH (FORMAT csv, NULL '{self.COPY_NULL}')",
+                buffer,
+            )
+            cursor.execute(
+                f"INSERT INTO {table_name} ({column_names}) "
+                f"SELECT {column_names} FROM copy_{table_name} "
+                f"ON CONFLICT DO NOTHING"
+                + (f" RETURNING {returning.name}" if returning else "")
+            )
+            inserted_rows = cursor.rowcount
+
+            if returning is not None:
+                inserted_rows = [row[0] for row in cursor.fetchall()]
 
-    def _close_session(self) -> None:
-        """Method to close a session"""
-        self._session.close()
+            cursor.execute(f"DROP TABLE copy_{table_name}")
+        finally:
+            cursor.close()
+
+        return inserted_rows
+
+    def _mark_written(self, *tables) -> None:
+        """
+        Method to remember the tables written by the current unit of work,
+        whose cached query results are invalidated once it commits.
+        """
+        written_tables = getattr(self._local, "written_tables", None)
+
+        if written_tables is None:
+            written_tables = self._local.written_tables = set()
+
+        written_tables.update(table.__tablename__ for table in tables)
 
     def _create_filter(self, filter_parameters: dict) -> list:
         desired_filter = [
@@ -53,86 +250,406 @@ class Database:
 
         return desired_filter
 
+    def use_query_cache(self, query_cache) -> None:
+        """Method to invalidate the query cache on committed writes"""
+        self._query_cache = query_cache
+
+    def use_metrics(self, metrics) -> None:
+        """Method to export the duration and errors of the queries"""
+        metrics.define(
+            "db_query_duration_seconds",
+            metrics.HISTOGRAM,
+            "Time of the Database methods, by method.",
+            labels=["operation"],
+        )
+        metrics.define(
+            "db_query_errors_total",
+            metrics.COUNTER,
+            "Database methods that raised an error, by method.",
+            labels=["operation"],
+        )
+        self._metrics = metrics
+
     def setup_database_environment(self) -> None:
         """Method to set up the database environment"""
         self._create_engine()
         self._create_database()
+        self._create_session_factory()
 
-    def insert_data_table(self, insert_data: object) -> None:
-        """Method for inserting data into a table"""
-        self._create_session()
+    def connect_database(self) -> None:
+        """Method to connect to an already set up database"""
+        self._create_engine()
+        self._create_session_factory()
+
+    def close_database(self) -> None:
+        """Method to close the pooled connections of the database"""
+        if self._session is not None:
+            self._session.remove()
+
+        if self._engine is not None:
+            self._engine.dispose()
+
+    def migrate_columns(self) -> dict:
+        """
+        Method to add the columns missing from existing tables.
+        The existing rows get the scalar default of the column.
+        """
+        created_columns = []
+        failed_columns = {}
+        inspector = inspect(self._engine)
+        dialect = self._engine.dialect
+        quote = dialect.identifier_preparer.quote
+
+        for table in self.BASE.metadata.sorted_tables:
+            existing_columns = {
+                column["name"] for column in inspector.get_columns(table.name)
+            }
+
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+
+                column_name = f"{table.name}.{column.name}"
+                definition = (
+                    f"{quote(column.name)} {column.type.compile(dialect)}"
+                )
+
+                if column.default is not None and column.default.is_scalar:
+                    default = literal(column.default.arg).compile(
+                        dialect=dialect,
+                        compile_kwargs={"literal_binds": True},
+                    )
+                    definition = f"{definition} DEFAULT {default}"
+
+                try:
+                    with self._engine.begin() as connection:
+                        connection.execute(
+                            text(
+                                f"ALTER TABLE {quote(table.name)} "
+                                f"ADD COLUMN {definition}"
+                            )
+                        )
+
+                    created_columns.append(column_name)
+                except Exception as error:
+                    failed_columns[column_name] = str(error)
+
+        return {"created": created_columns, "failed": failed_columns}
+
+    def migrate_indexes(self) -> dict:
+        """
+        Method to create the indexes missing from existing tables.
+        Unique indexes are not created while the data has duplicates.
+        """
+        created_indexes = []
+        failed_indexes = {}
+        inspector = inspect(self._engine)
+
+        for table in self.BASE.metadata.sorted_tables:
+            existing_indexes = {
+                index["name"] for index in inspector.get_indexes(table.name)
+            }
+
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+
+                try:
+                    index.create(bind=self._engine)
+                    created_indexes.append(index.name)
+                except Exception as error:
+                    failed_indexes[index.name] = str(error)
+
+        return {"created": created_indexes, "failed": failed_indexes}
+
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Method to run operations in one session and transaction.
+        Nested units of work in the same thread join the outermost one,
+        which commits on success and rolls back on error.
+        """
+        session = self._session()
+
+        if getattr(self._local, "active", False):
+            yield session
+            return
+
+        self._local.active = True
+        self._local.written_tables = set()
 
         try:
-            self._session.add(insert_data)
-            self._session.commit()
+            yield session
+            session.commit()
         except Exception as error:
-            self._session.rollback()
+            session.rollback()
             raise error
+        else:
+            if self._query_cache is not None:
+                self._query_cache.invalidate(self._local.written_tables)
         finally:
-            self._close_session()
+            self._local.active = False
+            self._local.written_tables = set()
+            self._session.remove()
+
+    @timed
+    def insert_data_table(self, insert_data: object) -> None:
+        """Method for inserting data into a table"""
+        with self.unit_of_work() as session:
+            session.add(insert_data)
+            self._mark_written(insert_data)
 
+    @timed
+    def insert_ignore(self, table: object, rows: list) -> int:
+        """
+        Method for bulk inserting rows, given as column dicts, skipping
+        the ones that conflict with a unique constraint. Postgres uses
+        COPY and INSERT ... ON CONFLICT, SQLite uses INSERT OR IGNORE.
+        Returns the number of inserted rows.
+        """
+        if len(rows) == 0:
+            return 0
+
+        inserted_rows = 0
+
+        with self.unit_of_work() as session:
+            self._mark_written(table)
+
+            if self.backend == "postgresql":
+                return self._copy_insert_ignore(session, table, rows)
+
+            statement = insert(table).prefix_with(
+                "OR IGNORE", dialect="sqlite"
+            )
+
+            for start in range(0, len(rows), self.INSERT_CHUNK_SIZE):
+                chunk = rows[start:start + self.INSERT_CHUNK_SIZE]
+                result = session.connection().execute(statement, chunk)
+                inserted_rows += result.rowcount
+
+        return inserted_rows
+
+    @timed
+    def insert_ignore_returning(
+        self, table: object, rows: list, column: object
+    ) -> list:
+        """
+        Method for bulk inserting rows like insert_ignore, returning
+        the values of the column for the inserted rows only.
+        """
+        if len(rows) == 0:
+            return []
+
+        inserted_values = []
+
+        with self.unit_of_work() as session:
+            self._mark_written(table)
+
+            if self.backend == "postgresql":
+                return self._copy_insert_ignore(
+                    session, table, rows, returning=column
+                )
+
+            statement = insert(table).prefix_with(
+                "OR IGNORE", dialect="sqlite"
+            )
+            statement = statement.returning(column)
+
+            for start in range(0, len(rows), self.INSERT_CHUNK_SIZE):
+                chunk = rows[start:start + self.INSERT_CHUNK_SIZE]
+                result = session.connection().execute(statement, chunk)
+                inserted_values.extend(result.scalars())
+
+        return inserted_values
+
+    @timed
+    def upsert(self, table: object, row: dict, index_elements: list) -> None:
+        """
+        Method for inserting a row or updating it when the index
+        elements conflict, with INSERT ... ON CONFLICT DO UPDATE.
+        """
+        dialect_insert = sqlite.insert
+
+        if self.backend == "postgresql":
+            dialect_insert = postgresql.insert
+
+        statement = dialect_insert(table).values(**row)
+        statement = statement.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={
+                key: value for key, value in row.items()
+                if key not in index_elements
+            },
+        )
+
+        with self.unit_of_work() as session:
+            session.execute(statement)
+            self._mark_written(table)
+
+    @timed
     def update_data_table(
         self, table: object, filter_update: dict, new_data: dict
-    ) -> None:
-        """Method for update data of a table"""
-        self._create_session()
-
-        try:
+    ) -> int:
+        """Method for update data of a table, returning the updated rows"""
+        with self.unit_of_work() as session:
             desired_filter = self._create_filter(filter_update)
 
-            self._session.query(table).filter(*desired_filter).update(new_data)
-            self._session.commit()
-        except Exception as error:
-            self._session.rollback()
-            raise error
-        finally:
-            self._close_session()
+            query = session.query(table).filter(*desired_filter)
+            updated_rows = query.update(new_data)
+            self._mark_written(table)
 
+        return updated_rows
+
+    @timed
+    def update_data_table_condition(
+        self, table: object, conditions: list, new_data: dict
+    ) -> int:
+        """Method for update data of a table matching the conditions"""
+        with self.unit_of_work() as session:
+            updated_rows = session.query(table).filter(*conditions).update(
+                new_data, synchronize_session=False
+            )
+            self._mark_written(table)
+
+        return updated_rows
+
+    @timed
     def delete_data_table(self, table: object, filter_delete: dict) -> None:
         """Method for delete data of a table"""
-        self._create_session()
-
-        try:
+        with self.unit_of_work() as session:
             desired_filter = self._create_filter(filter_delete)
 
-            self._session.query(table).filter(*desired_filter).delete()
-            self._session.commit()
-        except Exception as error:
-            self._session.rollback()
-            raise error
-        finally:
-            self._close_session()
+            session.query(table).filter(*desired_filter).delete()
+            self._mark_written(table)
 
+    @timed
+    def delete_data_table_condition(
+        self, table: object, conditions: list
+    ) -> int:
+        """Method for delete data of a table matching the conditions"""
+        with self.unit_of_work() as session:
+            deleted_rows = session.query(table).filter(*conditions).delete(
+                synchronize_session=False
+            )
+            self._mark_written(table)
+
+        return deleted_rows
+
+    @timed
     def select_value_table_parameter(
         self, column: object, filter_select: dict
     ):
         """Method to query the value of a desired parameter"""
-        self._create_session()
-
-        try:
+        with self.unit_of_work() as session:
             desired_filter = self._create_filter(filter_select)
-            value = self._session.query(column).filter(*desired_filter).first()
+            value = session.query(column).filter(*desired_filter).first()
             value_fixed = "" if value is None else value[0]
-        except Exception as error:
-            value_fixed = error
-            raise error
-        finally:
-            self._close_session()
 
         return value_fixed
 
+    @timed
     def select_data_table(self, table: object, filter_select: dict):
         """Method to select all data from a desired query"""
-        self._create_session()
-
-        try:
+        with self.unit_of_work() as session:
             desired_filter = self._create_filter(filter_select)
-            data = self._session.query(table).filter(*desired_filter).all()
+            data = session.query(table).filter(*desired_filter).all()
             data_fixed = "" if data is None else data
-        except Exception as error:
-            data_fixed = error
-            raise error
-        finally:
-            self._close_session()
 
         return data_fixed
+
+    @timed
+    def select_data_table_condition(
+        self,
+        table: object,
+        conditions: list,
+        order_by: object = None,
+        limit: int = None,
+    ) -> list:
+        """Method to select the data of a table matching the conditions"""
+        with self.unit_of_work() as session:
+            query = session.query(table).filter(*conditions)
+
+            if order_by is not None:
+                query = query.order_by(order_by)
+
+            if limit is not None:
+                query = query.limit(limit)
+
+            data = query.all()
+
+        return data
+
+    @timed
+    def select_columns_condition(
+        self,
+        columns: list,
+        conditions: list,
+        order_by: object = None,
+        limit: int = None,
+    ) -> list:
+        """
+        Method to select the column tuples of the rows matching
+        the conditions, without loading them as table instances.
+        """
+        statement = select(*columns).where(*conditions)
+
+        if order_by is not None:
+            statement = statement.order_by(order_by)
+
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        with self.unit_of_work() as session:
+            rows = session.execute(statement).all()
+
+        return rows
+
+    @timed
+    def count_data_table_condition(
+        self, table: object, conditions: list
+    ) -> int:
+        """Method to count the rows of a table matching the conditions"""
+        with self.unit_of_work() as session:
+            query = session.query(func.count()).select_from(table)
+            total = query.filter(*conditions).scalar()
+
+        return total
+
+    def stream_data_table(
+        self,
+        columns: list,
+        conditions: list,
+        order_by: object,
+        chunk_size: int,
+    ):
+        """
+        Method to stream the rows matching the conditions in chunks.
+        Only one chunk of column tuples is held in memory at a time.
+        """
+        statement = select(*columns).where(*conditions).order_by(order_by)
+
+        with self._engine.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True
+            ).execute(statement)
+
+            while True:
+                rows = result.fetchmany(chunk_size)
+
+                if len(rows) == 0:
+                    break
+
+                yield rows
+
+    @timed
+    def select_existing_values(self, column: object, values: list) -> set:
+        """Method to query which of the values exist in a column"""
+        existing_values = set()
+
+        with self.unit_of_work() as session:
+            for start in range(0, len(values), self.INSERT_CHUNK_SIZE):
+                chunk = values[start:start + self.INSERT_CHUNK_SIZE]
+                rows = session.query(column).filter(column.in_(chunk))
+                existing_values.update(row[0] for row in rows)
+
+        return existing_values
@@ -0,0 +1,27 @@
+import time
+
+from sqlalchemy import Column, Float, Index, Integer, String
+
+from database.database import Database
+
+BASE = Database().BASE
+
+
+class CloseSaleOutbox(BASE):
+    """Class to create the close sale notifications outbox table"""
+
+    __tablename__ = "close_sale_outbox"
+    __table_args__ = (
+        Index("ix_close_sale_outbox_due", "status", "next_attempt_at"),
+    )
+
+    outbox_id = Column(Integer, primary_key=True, autoincrement=True)
+    sales_id = Column(Integer, unique=True)
+    status = Column(String(10), default="Pending")
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(Float)
+    last_error = Column(String(500), default="")
+
+    def __init__(self, sales_id: int):
+        self.sales_id = sales_id
+        self.next_attempt_at = time.time()
@@ -0,0 +1,39 @@
+import time
+
+from sqlalchemy import Boolean, Column, Float, String, Text
+
+from database.database import Database
+
+BASE = Database().BASE
+
+
+class IngestionJob(BASE):
+    """Class to create the sales ingestion jobs table"""
+
+    __tablename__ = "ingestion_jobs"
+
+    job_id = Column(String(32), primary_key=True)
+    trigger = Column(String(20))
+    full_sync = Column(Boolean, default=False)
+    status = Column(String(10), default="running")
+    running_lock = Column(String(20), unique=True)
+    started_at = Column(Float, index=True)
+    finished_at = Column(Float)
+    duration_seconds = Column(Float)
+    summary = Column(Text)
+    error = Column(String(500))
+
+    def __init__(
+        self,
+        job_id: str,
+        trigger: str,
+        full_sync: bool,
+        running_lock: str,
+        status: str = "running",
+    ):
+        self.job_id = job_id
+        self.trigger = trigger
+        self.full_sync = full_sync
+        self.status = status
+        self.running_lock = running_lock
+        self.started_at = time.time()
@@ -0,0 +1,24 @@
+import time
+
+from sqlalchemy import Column, Float, Integer, String
+
+from database.database import Database
+
+BASE = Database().BASE
+
+
+class IngestionWatermark(BASE):
+    """Class to create the sales ingestion watermark table"""
+
+    __tablename__ = "ingestion_watermark"
+
+    name = Column(String(50), primary_key=True)
+    last_sales_id = Column(Integer)
+    last_sale_date = Column(String(100))
+    updated_at = Column(Float)
+
+    def __init__(self, name: str, last_sales_id: int, last_sale_date: str):
+        self.name = name
+        self.last_sales_id = last_sales_id
+        self.last_sale_date = last_sale_date
+        self.updated_at = time.time()
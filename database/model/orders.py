@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, Integer, String
+from sqlalchemy import Column, Float, Index, Integer, String
 
 from database.database import Database
 
@@ -9,6 +9,11 @@ class Orders(BASE):
     """Class to create the sales order table"""
 
     __tablename__ = "orders"
+    __table_args__ = (
+        Index(
+            "ix_orders_invoice_status_order_id", "invoice_status", "order_id"
+        ),
+    )
 
     order_id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(30))
@@ -16,17 +21,18 @@ class Orders(BASE):
     supplier = Column(String(100))
     category = Column(String(20))
     description = Column(String(500))
-    sales_id = Column(Integer)
+    sales_id = Column(Integer, index=True, unique=True)
     quantity = Column(Integer)
     value = Column(Float)
-    sale_date = Column(String(100))
-    zip_code = Column(String(15))
+    sale_date = Column(String(100), index=True)
+    zip_code = Column(String(15), index=True)
     country = Column(String(50))
     city = Column(String(50))
     state = Column(String(50))
     street = Column(String(50))
     neighborhood = Column(String(20))
     invoice_status = Column(String(10), default="Pending")
+    address_status = Column(String(10), default="", index=True)
 
     def __init__(
         self,
@@ -45,6 +51,7 @@ class Orders(BASE):
         state: str,
         street: str,
         neighborhood: str,
+        address_status: str = "",
     ):
         self.name = name
         self.price = price
@@ -61,3 +68,4 @@ class Orders(BASE):
         self.state = state
         self.street = street
         self.neighborhood = neighborhood
+        self.address_status = address_status
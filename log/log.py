@@ -1,27 +1,200 @@
+import atexit
+import json
 import os
+import random
+import reprlib
+import sys
+import time
+from contextvars import ContextVar
 from datetime import datetime
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
 
 
 class Log:
     """Class to configure log settings"""
 
     CURRENT_DATE = datetime.now()
+    OVERFLOW_POLICIES = ["block", "drop"]
+    FORMATS = ["text", "json"]
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+    LEVELS = {
+        "DEBUG": DEBUG,
+        "INFO": INFO,
+        "WARNING": WARNING,
+        "ERROR": ERROR,
+    }
+    LEVEL_NAMES = dict(zip(LEVELS.values(), LEVELS.keys()))
+    REQUEST_ID = ContextVar("request_id", default="")
+    PUT_TIMEOUT = 1
+    _STOP = object()
+
+    def __init__(
+        self,
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow_policy: str = "block",
+        level: str = "INFO",
+        log_format: str = "text",
+        max_payload_length: int = 2000,
+        payload_sample_rate: float = 1.0,
+        directory: str = "",
+    ):
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Invalid log overflow policy: {overflow_policy}"
+            )
+
+        if level not in self.LEVELS:
+            raise ValueError(f"Invalid log level: {level}")
+
+        if log_format not in self.FORMATS:
+            raise ValueError(f"Invalid log format: {log_format}")
+
+        extension = "jsonl" if log_format == "json" else "txt"
 
-    def __init__(self):
         self._log_date = self.CURRENT_DATE.strftime("%d%m%Y%H%M%S")
-        self._log_name = f"log_{self._log_date}.txt"
-        self._log_directory = os.path.join(os.getcwd(), "log", "logs-files")
+        self._log_name = f"log_{self._log_date}.{extension}"
+        self._log_directory = directory or os.path.join(
+            os.getcwd(), "log", "logs-files"
+        )
         self._log_path = os.path.join(self._log_directory, self._log_name)
         self._status = False
+        self._queue = Queue(maxsize=queue_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._overflow_policy = overflow_policy
+        self._writer = None
+        self._lock = Lock()
+        self._dropped = 0
+        self._level = self.LEVELS[level]
+        self._log_format = log_format
+        self._max_payload_length = max_payload_length
+        self._payload_sample_rate = payload_sample_rate
+        self._payload_repr = reprlib.Repr()
+        self._payload_repr.maxlevel = 4
+        self._payload_repr.maxdict = 20
+        self._payload_repr.maxlist = 10
+        self._payload_repr.maxstring = 200
+        self._payload_repr.maxother = 200
 
-    def start_log(self) -> None:
-        """Method to start the log file"""
+    @property
+    def dropped(self) -> int:
+        """Method to return the number of dropped messages"""
+        return self._dropped
+
+    def _format_message(self, message: str, level: int) -> str:
+        """Method to format a log line in the configured format"""
+        if self._log_format == "text":
+            date = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+
+            return f"\n{date}| {message}"
+
+        record = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "level": self.LEVEL_NAMES.get(level, str(level)),
+            "request_id": self.REQUEST_ID.get(),
+            "message": message,
+        }
+
+        return f"{json.dumps(record, default=str)}\n"
+
+    def _write_batch(self, log_file, buffer: list):
+        """
+        Method to write a batch of messages, opening the log file when
+        needed. A failed batch is dropped and reported on stderr, and
+        the file is opened again for the next one.
+        Returns the open log file, or None after a failure.
+        """
+        try:
+            if log_file is None:
+                log_file = open(self._log_path, "a")
+
+            log_file.write("".join(buffer))
+            log_file.flush()
+
+            return log_file
+        except Exception as error:
+            self._dropped += len(buffer)
+            print(
+                f"Log writer dropped {len(buffer)} messages: {error}",
+                file=sys.stderr,
+            )
+
+            if log_file is not None:
+                try:
+                    log_file.close()
+                except Exception:
+                    pass
+
+            return None
+
+    def _write_messages(self) -> None:
+        """Method to write the queued messages to the log file in batches"""
+        buffer = []
+        last_flush = time.monotonic()
+        log_file = None
+
+        while True:
+            elapsed = time.monotonic() - last_flush
+            timeout = max(0.0, self._flush_interval - elapsed)
+
+            try:
+                message = self._queue.get(timeout=timeout)
+            except Empty:
+                message = None
+
+            stop = message is self._STOP
+
+            if message is not None and not stop:
+                buffer.append(message)
+
+            flush_due = (
+                stop
+                or len(buffer) >= self._batch_size
+                or time.monotonic() - last_flush >= self._flush_interval
+            )
+
+            if flush_due:
+                if len(buffer) > 0:
+                    log_file = self._write_batch(log_file, buffer)
+                    buffer = []
+
+                last_flush = time.monotonic()
+
+            if stop:
+                break
+
+        if log_file is not None:
+            log_file.close()
+
+    def _put(self, content) -> bool:
+        """
+        Method to queue content, waiting for room while the writer
+        is alive. Returns False when the writer is gone.
+        """
+        while self._writer is not None and self._writer.is_alive():
+            try:
+                self._queue.put(content, timeout=self.PUT_TIMEOUT)
+
+                return True
+            except Full:
+                continue
+
+        return False
+
+    def _create_log_file(self) -> None:
+        """Method to create the log file with its header"""
         if not os.path.isdir(self._log_directory):
             os.makedirs(self._log_directory)
 
         access_date = self.CURRENT_DATE.strftime("%d/%m/%Y %H:%M:%S")
 
-        if not os.path.exists(self._log_path):
+        if self._log_format == "text" and not os.path.exists(self._log_path):
             initial_content = [
                 f"{'*'*70}\n",
                 f"{'*'*1}{' '*22}Online Store Microservice{' '*21}{'*'*1}\n",
@@ -32,15 +205,87 @@ class Log:
             with open(self._log_path, "w") as log_file:
                 log_file.writelines(initial_content)
 
-        self._status = True
+    def start_log(self) -> None:
+        """Method to start the log file"""
+        with self._lock:
+            if self._status is True:
+                return
+
+            self._create_log_file()
+
+            self._writer = Thread(
+                target=self._write_messages, name="log-writer", daemon=True
+            )
+            self._writer.start()
+            atexit.register(self.stop_log)
+
+            self._status = True
+
+    def stop_log(self) -> None:
+        """Method to flush the pending messages and stop the log writer"""
+        with self._lock:
+            if self._status is False:
+                return
+
+            self._status = False
+
+            if self._put(self._STOP):
+                self._writer.join()
+
+            self._writer = None
+            atexit.unregister(self.stop_log)
+
+    def set_request_id(self, request_id: str) -> None:
+        """Method to set the request id attached to the next messages"""
+        self.REQUEST_ID.set(request_id)
+
+    def is_enabled(self, level: int) -> bool:
+        """Method to check if messages of a level are written"""
+        return level >= self._level
+
+    def add_message(self, message: str, *args, level: int = INFO) -> None:
+        """
+        Method to add a message to the log file.
+        The arguments are only interpolated when the level is enabled.
+        """
+        if level < self._level:
+            return
 
-    def add_message(self, message: str) -> None:
-        """Method to add a message to the log file"""
         if self._status is False:
             self.start_log()
 
-        date = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        if len(args) > 0:
+            message = message % args
+
+        new_content = self._format_message(message, level)
+
+        if self._overflow_policy == "block":
+            if not self._put(new_content):
+                self._dropped += 1
+
+            return
+
+        try:
+            self._queue.put_nowait(new_content)
+        except Full:
+            self._dropped += 1
+
+    def add_payload(
+        self, message: str, payload: object, level: int = INFO
+    ) -> None:
+        """
+        Method to add a sampled and truncated payload to the log file.
+        Only the truncated part of the payload is ever formatted.
+        """
+        if level < self._level:
+            return
+
+        if random.random() >= self._payload_sample_rate:
+            return
+
+        payload_text = self._payload_repr.repr(payload)
+
+        if len(payload_text) > self._max_payload_length:
+            payload_text = f"{payload_text[:self._max_payload_length]}..."
 
-        with open(self._log_path, "a") as log_file:
-            new_content = f"\n{date}| {message}"
-            log_file.write(new_content)
+        self.add_message("%s: %s", message, payload_text, level=level)
@@ -1,14 +1,152 @@
+import os
+import signal
+import sys
+from threading import Event
+
 import resources.documentation
 import resources.external_api
+import resources.monitoring
 import resources.orders
-from app import database, flask_settings, log
+import resources.request_context
+from app import (CEP_DATASET_SOURCE, SERVER_GRACEFUL_TIMEOUT,
+                 SERVER_KEEPALIVE, SERVER_MODE, SERVER_THREADS,
+                 SERVER_WORKERS, async_http_client, cep_cache, cep_dataset,
+                 close_sale_dispatcher, database, event_loop,
+                 flask_settings, ingestion_scheduler, log, metrics,
+                 query_cache)
+
+
+def start_worker_services() -> None:
+    """Starts the connections used to serve requests in a process"""
+    database.connect_database()
+    metrics.start()
+    query_cache.start_cache()
+    cep_cache.start_cache()
+    cep_dataset.open_dataset()
+
+
+def stop_worker_services() -> None:
+    """Releases the connections and flushes the log of a process"""
+    event_loop.run(async_http_client.close())
+    event_loop.stop()
+    cep_dataset.close_dataset()
+    database.close_database()
+    metrics.stop()
+    log.stop_log()
+
+
+def run_background_services() -> None:
+    """Runs the close sale dispatcher and ingestion scheduler process"""
+    stop_event = Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+
+    start_worker_services()
 
-if __name__ == "__main__":
+    log.add_message("Starting the close sale dispatcher")
+    close_sale_dispatcher.start()
+
+    log.add_message("Starting the ingestion scheduler")
+    ingestion_scheduler.start()
+
+    stop_event.wait()
+
+    ingestion_scheduler.stop()
+    close_sale_dispatcher.stop()
+    stop_worker_services()
+
+
+if __name__ == "__main__" and SERVER_MODE == "background":
+    run_background_services()
+elif __name__ == "__main__":
     log.start_log()
 
     log.add_message("Starting the database environment")
     database.setup_database_environment()
 
-    log.add_message("Starting Flask Settings")
-    log.add_message("")
-    flask_settings.run_aplication()
+    log.add_message("Creating the missing database columns")
+    column_migration = database.migrate_columns()
+
+    for column_name, error in column_migration["failed"].items():
+        log.add_message(
+            "Column %s not created: %s", column_name, error, level=log.ERROR
+        )
+
+    log.add_message("Creating the missing database indexes")
+    index_migration = database.migrate_indexes()
+
+    for index_name, error in index_migration["failed"].items():
+        log.add_message(
+            "Index %s not created: %s", index_name, error, level=log.WARNING
+        )
+
+    metrics.clear_directory()
+
+    if CEP_DATASET_SOURCE and cep_dataset.is_outdated(CEP_DATASET_SOURCE):
+        log.add_message("Building the local zip code dataset")
+        zip_codes = cep_dataset.build_dataset(CEP_DATASET_SOURCE)
+        log.add_message(f"{zip_codes} zip codes in the local dataset")
+
+    if SERVER_MODE == "production":
+        log.add_message("Starting the production server")
+        log.add_message("")
+
+        database.close_database()
+        log.stop_log()
+
+        background_services = {}
+
+        def start_background_services() -> None:
+            """
+            Spawns the background process once the server is ready.
+            Only its pid is kept, as the workers forked later would
+            inherit a Popen object and warn that it is still running.
+            """
+            background_services["pid"] = os.posix_spawn(
+                sys.executable,
+                [sys.executable, os.path.abspath(__file__)],
+                {**os.environ, "SERVER_MODE": "background"},
+            )
+
+        def stop_background_services() -> None:
+            pid = background_services.pop("pid", None)
+
+            if pid is None:
+                return
+
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+
+        flask_settings.run_production_server(
+            workers=SERVER_WORKERS,
+            threads=SERVER_THREADS,
+            keepalive=SERVER_KEEPALIVE,
+            graceful_timeout=SERVER_GRACEFUL_TIMEOUT,
+            on_worker_start=start_worker_services,
+            on_worker_exit=stop_worker_services,
+            on_server_ready=start_background_services,
+            on_server_exit=stop_background_services,
+        )
+    else:
+        metrics.start()
+
+        log.add_message("Starting the query cache")
+        query_cache.start_cache()
+
+        log.add_message("Starting the zip code cache")
+        cep_cache.start_cache()
+        cep_dataset.open_dataset()
+
+        if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            log.add_message("Starting the close sale dispatcher")
+            close_sale_dispatcher.start()
+
+            log.add_message("Starting the ingestion scheduler")
+            ingestion_scheduler.start()
+
+        log.add_message("Starting Flask Settings")
+        log.add_message("")
+        flask_settings.run_aplication()
@@ -1,11 +1,10 @@
 from urllib.parse import unquote
 
-import requests
 from flask_openapi3 import Tag
 
-from app import app, log
-from schemas.external_api import (ExternalApiResultSchema, ExternalApiSchema,
-                                  SingleMessageSchema)
+from app import app, log, viacep
+from schemas.external_api import (CacheStatsSchema, ExternalApiResultSchema,
+                                  ExternalApiSchema, SingleMessageSchema)
 
 TAG_EXTERNAL_API = Tag(
     name="Via Cep External API",
@@ -34,31 +33,86 @@ def query_viacep_external_api(query: ExternalApiSchema):
     try:
         log.add_message("Querying viacep external API")
 
-        url = f"https://viacep.com.br/ws/{zip_code}/json/"
-        response = requests.get(url)
+        data = viacep.query_zip_code(zip_code)
 
-        if response.status_code != 200:
-            raise Exception("Error when querying the Via Cep API")
+        log.add_message("API consulted successfully")
+
+        return_data = {"message": "Success", "data": data}
+
+        log.add_payload("Get_viacep response", return_data)
+        log.add_message("Get_viacep status: 200")
+        log.add_message("")
+
+        return return_data, 200
+    except Exception as error:
+        return_data = {"message": f"Error: {error}"}
+
+        log.add_payload("Get_viacep response", return_data)
+        log.add_message("Get_viacep status: 400")
+        log.add_message("")
+
+        return return_data, 400
+
+
+@app.get(
+    "/async/get_viacep/",
+    tags=[TAG_EXTERNAL_API],
+    responses={
+        "200": ExternalApiResultSchema,
+        "400": SingleMessageSchema,
+    },
+)
+async def query_viacep_external_api_async(query: ExternalApiSchema):
+    """
+    External API query route ViaCep, run on an event loop
+    """
+    log.add_message("Get_viacep_async route accessed")
 
-        data = response.json()
+    zip_code = unquote(unquote(query.zip_code))
 
-        if data.get("erro"):
-            raise Exception("Zip code not found")
+    try:
+        log.add_message("Querying viacep external API")
+
+        data = await viacep.query_zip_code_async(zip_code)
 
         log.add_message("API consulted successfully")
 
         return_data = {"message": "Success", "data": data}
 
-        log.add_message(f"Get_viacep response: {return_data}")
-        log.add_message("Get_viacep status: 200")
+        log.add_payload("Get_viacep_async response", return_data)
+        log.add_message("Get_viacep_async status: 200")
         log.add_message("")
 
         return return_data, 200
     except Exception as error:
         return_data = {"message": f"Error: {error}"}
 
-        log.add_message(f"Get_viacep response: {return_data}")
-        log.add_message("Get_viacep status: 400")
+        log.add_payload("Get_viacep_async response", return_data)
+        log.add_message("Get_viacep_async status: 400")
         log.add_message("")
 
         return return_data, 400
+
+
+@app.get(
+    "/get_viacep/cache_stats",
+    tags=[TAG_EXTERNAL_API],
+    responses={"200": CacheStatsSchema},
+)
+def get_viacep_cache_stats():
+    """
+    Zip code cache and local dataset counters of the ViaCep queries
+    """
+    log.add_message("Get_viacep_cache_stats route accessed")
+
+    return_data = {
+        "message": "Success",
+        "stats": viacep.cache.stats,
+        "dataset": viacep.dataset.stats,
+    }
+
+    log.add_payload("Get_viacep_cache_stats response", return_data)
+    log.add_message("Get_viacep_cache_stats status: 200")
+    log.add_message("")
+
+    return return_data, 200
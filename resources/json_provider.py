@@ -0,0 +1,37 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonProvider(DefaultJSONProvider):
+    """
+    Class to encode and decode JSON with orjson when it is installed,
+    falling back to the default Flask provider otherwise.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Method to serialize an object to a JSON string"""
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+
+        option = orjson.OPT_NON_STR_KEYS
+
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+
+        return orjson.dumps(
+            obj, default=kwargs.get("default", self.default), option=option
+        ).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        """Method to deserialize an object from a JSON string"""
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+
+        return orjson.loads(s)
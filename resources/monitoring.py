@@ -0,0 +1,148 @@
+from flask_openapi3 import Tag
+
+from app import (app, async_http_client, cep_cache, cep_dataset,
+                 circuit_breakers, get_sales_single_flight, http_client, log,
+                 metrics, query_cache, viacep_single_flight)
+from schemas.monitoring import UpstreamStatsSchema
+from services.metrics import Metrics
+
+TAG_MONITORING = Tag(
+    name="Monitoring",
+    description="Routes for checking the service internal counters.",
+)
+LOOKUP_COUNTERS = {
+    "cep_cache_lookups_total": "ViaCep cache lookups by result.",
+    "cep_dataset_lookups_total": "Local zip code dataset lookups by result.",
+    "query_cache_lookups_total": "Pending invoices cache lookups by result.",
+}
+
+
+def collect_internal_metrics() -> list:
+    """
+    Collects the counters kept by the caches, the coalesced calls,
+    the circuit breakers and the log, exported by /metrics.
+    """
+    samples = []
+    lookup_stats = {
+        "cep_cache_lookups_total": cep_cache.stats,
+        "cep_dataset_lookups_total": cep_dataset.stats,
+        "query_cache_lookups_total": query_cache.stats,
+    }
+
+    for name, stats in lookup_stats.items():
+        samples.append((name, ("hit",), stats["hits"]))
+        samples.append((name, ("miss",), stats["misses"]))
+
+    samples.append(
+        ("cep_cache_evictions_total", (), cep_cache.stats["evictions"])
+    )
+    samples.append(
+        (
+            "query_cache_invalidations_total",
+            (),
+            query_cache.stats["invalidations"],
+        )
+    )
+
+    single_flights = {
+        "get_sales": get_sales_single_flight,
+        "viacep": viacep_single_flight,
+    }
+
+    for upstream, single_flight in single_flights.items():
+        for kind, count in single_flight.stats.items():
+            samples.append(("coalesced_calls_total", (upstream, kind), count))
+
+    for upstream, circuit_breaker in circuit_breakers.items():
+        circuit_stats = circuit_breaker.stats
+        samples.append(
+            ("circuit_opened_total", (upstream,), circuit_stats["opened"])
+        )
+        samples.append(
+            ("circuit_rejected_total", (upstream,), circuit_stats["rejected"])
+        )
+
+    samples.append(("log_messages_dropped_total", (), log.dropped))
+
+    return samples
+
+
+for counter_name, documentation in LOOKUP_COUNTERS.items():
+    metrics.define(
+        counter_name, Metrics.COUNTER, documentation, labels=["result"]
+    )
+    metrics.define_ratio(
+        counter_name.replace("_lookups_total", "_hit_ratio"),
+        documentation.replace("lookups by result", "hit ratio"),
+        counter_name=counter_name,
+        label_value="hit",
+    )
+
+metrics.define(
+    "cep_cache_evictions_total",
+    Metrics.COUNTER,
+    "ViaCep cache entries evicted by the size limit.",
+)
+metrics.define(
+    "query_cache_invalidations_total",
+    Metrics.COUNTER,
+    "Committed writes that invalidated cached pending invoices.",
+)
+metrics.define(
+    "coalesced_calls_total",
+    Metrics.COUNTER,
+    "Upstream calls started, or shared with an identical call.",
+    labels=["upstream", "kind"],
+)
+metrics.define(
+    "circuit_opened_total",
+    Metrics.COUNTER,
+    "Times the circuit breaker of an upstream opened.",
+    labels=["upstream"],
+)
+metrics.define(
+    "circuit_rejected_total",
+    Metrics.COUNTER,
+    "Calls refused while the circuit breaker of an upstream was open.",
+    labels=["upstream"],
+)
+metrics.define(
+    "log_messages_dropped_total",
+    Metrics.COUNTER,
+    "Log messages dropped by a full log queue.",
+)
+metrics.add_collector(collect_internal_metrics)
+
+
+@app.get(
+    "/get_upstream_stats",
+    tags=[TAG_MONITORING],
+    responses={"200": UpstreamStatsSchema},
+)
+def get_upstream_stats():
+    """
+    Get the latency metrics of the outbound calls of each upstream, \
+    the calls shared between concurrent identical requests \
+    and the state of the circuit breakers.
+    """
+    log.add_message("Get_upstream_stats route accessed")
+
+    return_data = {
+        "message": "Success",
+        "upstreams": http_client.metrics,
+        "async_upstreams": async_http_client.metrics,
+        "coalesced": {
+            "get_sales": get_sales_single_flight.stats,
+            "viacep": viacep_single_flight.stats,
+        },
+        "circuits": {
+            upstream: circuit_breaker.stats
+            for upstream, circuit_breaker in circuit_breakers.items()
+        },
+    }
+
+    log.add_payload("Get_upstream_stats response", return_data)
+    log.add_message("Get_upstream_stats status: 200")
+    log.add_message("")
+
+    return return_data, 200
@@ -1,13 +1,32 @@
-import requests
+import asyncio
+import csv
+import io
+from datetime import date, timedelta
+
+from flask import Response, request
 from flask_openapi3 import Tag
 
-from app import app, database, log
+from app import (address_enrichment, app, close_sale_dispatcher, database,
+                 ingestion_scheduler, log, query_cache, sales_ingestion)
 from database.model.orders import Orders
 from schemas.orders import (
+    ORDER_RESPONSE_COLUMNS,
+    AddOrderQuerySchema,
+    CloseSalesRequeueSchema,
+    ExportOrdersQuerySchema,
+    IngestionJobSchema,
+    IngestionStatusQuerySchema,
+    IngestionStatusSchema,
     MessageOrderSchema,
     OrderCloseSchema,
+    OrdersCloseSchema,
+    OrdersCompletedSchema,
+    PendingInvoicesQuerySchema,
+    PendingInvoicesSchema,
+    QueryCacheStatsSchema,
+    RequeuedCloseSalesSchema,
     SingleMessageSchema,
-    format_add_order_response,
+    format_order_rows,
 )
 
 TAG_ORDERS = Tag(
@@ -15,6 +34,28 @@ TAG_ORDERS = Tag(
     description="Routes for controlling sales orders."
 )
 
+EXPORT_COLUMNS = [
+    Orders.order_id,
+    Orders.name,
+    Orders.price,
+    Orders.supplier,
+    Orders.category,
+    Orders.description,
+    Orders.sales_id,
+    Orders.quantity,
+    Orders.value,
+    Orders.sale_date,
+    Orders.zip_code,
+    Orders.country,
+    Orders.city,
+    Orders.state,
+    Orders.street,
+    Orders.neighborhood,
+    Orders.invoice_status,
+]
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_ERROR_MARKER = "#ERROR"
+
 
 @app.get(
     "/get_sales_order",
@@ -31,79 +72,72 @@ def get_sales_order():
     try:
         log.add_message("Accessing Online Store container to get sales")
 
-        get_sales_url = "http://online-store-microservice:5000/get_sales"
-        response_get_sales = requests.get(get_sales_url)
-        response_sales_data = response_get_sales.json()
-
-        if response_get_sales.status_code == 400:
-            raise Exception(
-                response_sales_data["message"].replace("Error: ", "")
-            )
+        sales_data = sales_ingestion.fetch_sales()
 
         log.add_message("Sales achieved")
+        log.add_message("Checking empty address fields")
 
-        sales_data = response_sales_data.get("sales", [])
+        sales_data = [
+            sale
+            for batch in sales_ingestion.iter_enriched_batches(sales_data)
+            for sale in batch["sales"]
+        ]
+        return_data = {"message": "Success", "sales_data": sales_data}
 
-        address_columns = {
-            "city": "localidade",
-            "state": "uf",
-            "street": "logradouro",
-            "neighborhood": "bairro",
-        }
+        log.add_message(f"Get_sales_order found {len(sales_data)} sales")
+        log.add_message("Get_sales_order status: 200")
+        log.add_message("")
 
-        log.add_message("Checking empty address fields")
+        return return_data, 200
+    except Exception as error:
+        return_data = {"message": f"Error: {error}"}
 
-        updated_sales_data = []
-
-        for sale in sales_data:
-            empty_address_columns = [
-                key for key in address_columns
-                if len(sale.get(key, "").strip()) == 0
-            ]
-
-            if len(empty_address_columns) > 0 and sale["country"] in [
-                "Brazil",
-                "Brasil",
-            ]:
-                log.add_message(f"Sale {sale['sales_id']} is incomplete")
-                log.add_message(
-                    f'Empty colums: {", ".join(empty_address_columns)}'
-                )
-                log.add_message("")
+        log.add_payload("Get_sales_order response", return_data)
+        log.add_message("Get_sales_order: 400")
+        log.add_message("")
 
-                get_viacep_url = "http://127.0.0.1:5001/get_viacep/?zip_code="
-                zip_code = sale.get("zip_code", "")
-                response_get_viacep = requests.get(
-                    f"{get_viacep_url}{zip_code}"
-                )
-                data_viacep = response_get_viacep.json().get("data", {})
+        return return_data, 400
 
-                if (
-                    response_get_viacep.status_code == 200
-                    and len(data_viacep) > 0
-                ):
-                    for empty_column in empty_address_columns:
-                        new_data = data_viacep[address_columns[empty_column]]
-                        sale[empty_column] = new_data
 
-                        log.add_message(
-                            f"{empty_column} updated with {new_data}"
-                        )
+@app.get(
+    "/async/get_sales_order",
+    tags=[TAG_ORDERS],
+    responses={
+        "200": MessageOrderSchema,
+        "400": SingleMessageSchema,
+    },
+)
+async def get_sales_order_async():
+    """
+    Get sales orders that are open via the online store api. \
+    The upstream calls of the request run concurrently on an event loop.
+    """
+    log.add_message("Get_sales_order_async route accessed")
 
-            updated_sales_data.append(sale)
+    try:
+        log.add_message("Accessing Online Store container to get sales")
 
-        return_data = {"message": "Success", "sales_data": updated_sales_data}
+        sales_data = await sales_ingestion.fetch_sales_async()
 
-        log.add_message(f"Get_sales_order response: {return_data}")
-        log.add_message("Get_sales_order status: 200")
+        log.add_message("Sales achieved")
+        log.add_message("Checking empty address fields")
+
+        await address_enrichment.enrich_sales_async(sales_data)
+
+        return_data = {"message": "Success", "sales_data": sales_data}
+
+        log.add_message(
+            f"Get_sales_order_async found {len(sales_data)} sales"
+        )
+        log.add_message("Get_sales_order_async status: 200")
         log.add_message("")
 
         return return_data, 200
     except Exception as error:
         return_data = {"message": f"Error: {error}"}
 
-        log.add_message(f"Get_sales_order: {return_data}")
-        log.add_message("Get_sales_order: 400")
+        log.add_payload("Get_sales_order_async response", return_data)
+        log.add_message("Get_sales_order_async status: 400")
         log.add_message("")
 
         return return_data, 400
@@ -113,147 +147,285 @@ def get_sales_order():
     "/add_order",
     tags=[TAG_ORDERS],
     responses={
-        "200": MessageOrderSchema,
+        "202": IngestionJobSchema,
         "400": SingleMessageSchema,
     },
 )
-def add_order():
-    """Adds all updated sales order information."""
+def add_order(query: AddOrderQuerySchema):
+    """
+    Starts adding the updated information of the sales not yet added. \
+    Only sales after the last ingested one are requested, \
+    unless a full sync is asked for. \
+    The ingestion runs in background, see /get_ingestion_status.
+    """
     log.add_message("Add_order route accessed")
 
     try:
+        job, started = ingestion_scheduler.trigger(
+            trigger="request", full_sync=query.full_sync
+        )
+
+        message = "Ingestion started" if started else "Ingestion running"
+        return_data = {
+            "message": message,
+            "job_id": job["job_id"],
+            "status": job["status"],
+        }
+
+        log.add_payload("Add_order response", return_data)
+        log.add_message("Add_order status: 202")
         log.add_message("")
 
-        get_order_url = "http://127.0.0.1:5001/get_sales_order"
-        response_get_order = requests.get(get_order_url)
-        response_order_data = response_get_order.json()
+        return return_data, 202
+    except Exception as error:
+        return_data = {"message": f"Error: {error}"}
 
-        if response_get_order.status_code == 400:
-            raise Exception(
-                response_order_data["message"].replace("Error: ", "")
-            )
+        log.add_payload("Add_order response", return_data)
+        log.add_message("Add_order status: 400")
+        log.add_message("")
 
-        orders_data = response_order_data.get("sales_data", {})
-        added_orders = []
-
-        log.add_message("Adding orders")
-
-        for order in orders_data:
-            log.add_message("")
-            log.add_message(f"Sale {order['sales_id']}")
-
-            new_order = Orders(
-                name=order.get("name", ""),
-                price=order.get("price", ""),
-                supplier=order.get("supplier", ""),
-                category=order.get("category", ""),
-                description=order.get("description", ""),
-                sales_id=order.get("sales_id", ""),
-                quantity=order.get("quantity", ""),
-                value=order.get("value", ""),
-                sale_date=order.get("sale_date", ""),
-                zip_code=order.get("zip_code", ""),
-                country=order.get("country", ""),
-                city=order.get("city", ""),
-                state=order.get("state", ""),
-                street=order.get("street", ""),
-                neighborhood=order.get("neighborhood", ""),
-            )
-            formatted_response = format_add_order_response(new_order)
-            added_orders.append(formatted_response)
-            database.insert_data_table(new_order)
+        return return_data, 400
 
-            log.add_message("Order added")
-            log.add_message("Accessing Online Store container to close sale")
 
-            close_sale_url = "http://online-store-microservice:5000/close_sale"
-            sales_id = {"sales_id": int(order["sales_id"])}
-            response_close_sale = requests.put(close_sale_url, data=sales_id)
-            close_sale_data = response_close_sale.json()
+@app.post(
+    "/async/add_order",
+    tags=[TAG_ORDERS],
+    responses={
+        "202": IngestionJobSchema,
+        "400": SingleMessageSchema,
+    },
+)
+async def add_order_async(query: AddOrderQuerySchema):
+    """
+    Starts adding the updated information of the sales not yet added. \
+    The job registration runs in a thread without blocking the event loop, \
+    see /get_ingestion_status.
+    """
+    log.add_message("Add_order_async route accessed")
 
-            if response_close_sale.status_code == 400:
-                raise Exception(
-                    close_sale_data["message"].replace("Error: ", "")
-                )
+    try:
+        job, started = await asyncio.to_thread(
+            ingestion_scheduler.trigger,
+            trigger="request",
+            full_sync=query.full_sync,
+        )
+
+        message = "Ingestion started" if started else "Ingestion running"
+        return_data = {
+            "message": message,
+            "job_id": job["job_id"],
+            "status": job["status"],
+        }
+
+        log.add_payload("Add_order_async response", return_data)
+        log.add_message("Add_order_async status: 202")
+        log.add_message("")
+
+        return return_data, 202
+    except Exception as error:
+        return_data = {"message": f"Error: {error}"}
+
+        log.add_payload("Add_order_async response", return_data)
+        log.add_message("Add_order_async status: 400")
+        log.add_message("")
+
+        return return_data, 400
+
+
+@app.get(
+    "/get_ingestion_status",
+    tags=[TAG_ORDERS],
+    responses={
+        "200": IngestionStatusSchema,
+        "400": SingleMessageSchema,
+    },
+)
+def get_ingestion_status(query: IngestionStatusQuerySchema):
+    """Get the running and last sales ingestion jobs."""
+    log.add_message("Get_ingestion_status route accessed")
 
-            log.add_message("Closed sale")
+    try:
+        job = None
+
+        if query.job_id is not None:
+            job = ingestion_scheduler.get_job(query.job_id)
 
-        return_data = {"message": "Added Orders", "orders": added_orders}
+            if job is None:
+                raise Exception(f"The job {query.job_id} does not exist")
 
-        log.add_message(f"Add_order response: {return_data}")
-        log.add_message("Add_order status: 200")
+        return_data = {"message": "Success", "job": job}
+        return_data.update(ingestion_scheduler.status)
+
+        log.add_payload("Get_ingestion_status response", return_data)
+        log.add_message("Get_ingestion_status status: 200")
         log.add_message("")
 
         return return_data, 200
     except Exception as error:
         return_data = {"message": f"Error: {error}"}
 
-        log.add_message(f"Add_order response: {return_data}")
-        log.add_message("Add_order status: 400")
+        log.add_payload("Get_ingestion_status response", return_data)
+        log.add_message("Get_ingestion_status status: 400")
         log.add_message("")
 
         return return_data, 400
 
 
+def get_sale_date_conditions(start_date: date, end_date: date) -> list:
+    """
+    Gets the conditions of a range of sale days, both included.
+    The ISO sale_date text is compared with the ISO days, so any time
+    of the end day is before the start of the next day.
+    """
+    conditions = []
+
+    if start_date is not None:
+        conditions.append(Orders.sale_date >= start_date.isoformat())
+
+    if end_date is not None:
+        next_day = end_date + timedelta(days=1)
+        conditions.append(Orders.sale_date < next_day.isoformat())
+
+    return conditions
+
+
+def find_pending_invoices(query: PendingInvoicesQuerySchema) -> dict:
+    """
+    Finds the page of pending orders of the query.
+    """
+    status_pending = "Pending"
+    conditions = [Orders.invoice_status == status_pending]
+    optional_filters = {
+        Orders.category: query.category,
+        Orders.supplier: query.supplier,
+        Orders.state: query.state,
+    }
+
+    for column, value in optional_filters.items():
+        if value is not None:
+            conditions.append(column == value)
+
+    conditions.extend(
+        get_sale_date_conditions(query.start_date, query.end_date)
+    )
+    total = None
+
+    if query.include_total and query.cursor is None:
+        total = database.count_data_table_condition(
+            table=Orders, conditions=conditions
+        )
+
+    page_conditions = list(conditions)
+
+    if query.cursor is not None:
+        page_conditions.append(Orders.order_id > query.cursor)
+
+    pending_orders = database.select_columns_condition(
+        columns=ORDER_RESPONSE_COLUMNS,
+        conditions=page_conditions,
+        order_by=Orders.order_id,
+        limit=query.limit + 1,
+    )
+
+    if len(pending_orders) == 0 and query.cursor is None:
+        raise Exception("There are no pending orders")
+
+    next_cursor = None
+
+    if len(pending_orders) > query.limit:
+        pending_orders = pending_orders[:query.limit]
+        next_cursor = pending_orders[-1].order_id
+
+    log.add_message(f"Returning {len(pending_orders)} pending orders")
+
+    return_data = {
+        "message": "There are pending orders",
+        "orders": format_order_rows(pending_orders),
+        "next_cursor": next_cursor,
+        "total": total,
+    }
+
+    return return_data
+
+
 @app.get(
     "/get_pending_invoices",
     tags=[TAG_ORDERS],
     responses={
-        "200": MessageOrderSchema,
+        "200": PendingInvoicesSchema,
         "400": SingleMessageSchema,
     },
 )
-def get_pending_invoices():
-    """Get orders with pending invoice status."""
+def get_pending_invoices(query: PendingInvoicesQuerySchema):
+    """
+    Get a page of the orders with pending invoice status. \
+    Pages are cached until the orders change and \
+    an unchanged page is answered with 304 for its If-None-Match ETag.
+    """
     log.add_message("Get_pending_invoices route accessed")
 
     try:
-        log.add_message("Checking if there are pending orders")
-
-        status_pending = "Pending"
-        pending_orders = database.select_data_table(
-            table=Orders,
-            filter_select={Orders.invoice_status: status_pending},
+        cache_key = query_cache.make_key(
+            "pending_invoices", [Orders.__tablename__], query.json()
         )
+        cached_page = query_cache.get(cache_key)
 
-        if len(pending_orders) == 0:
-            raise Exception("There are no pending orders")
+        if cached_page is query_cache.MISS:
+            log.add_message("Checking if there are pending orders")
 
-        log.add_message(f"There are {len(pending_orders)} pending orders")
-
-        content = []
-
-        for order in pending_orders:
-            order_data = {}
+            return_data = find_pending_invoices(query)
+            cached_page = query_cache.set(
+                cache_key, app.json.dumps(return_data)
+            )
 
-            order_id = order.order_id
-            order_data["order_id"] = order_id
+            log.add_payload("Get_pending_invoices response", return_data)
+        else:
+            log.add_message("Returning the cached pending orders")
 
-            other_order_data = format_add_order_response(order)
-            order_data.update(other_order_data)
+        etag, body = cached_page
 
-            content.append(order_data)
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype="application/json")
 
-        return_data = {
-            "message": "There are pending orders",
-            "orders": content
-        }
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
 
-        log.add_message(f"Get_pending_invoices response: {return_data}")
-        log.add_message("Get_pending_invoices status: 200")
+        log.add_message(
+            f"Get_pending_invoices status: {response.status_code}"
+        )
         log.add_message("")
 
-        return return_data, 200
+        return response
     except Exception as error:
         return_data = {"message": f"Error: {error}"}
 
-        log.add_message(f"Get_pending_invoices response: {return_data}")
+        log.add_payload("Get_pending_invoices response", return_data)
         log.add_message("Get_pending_invoices status: 400")
         log.add_message("")
 
         return return_data, 400
 
 
+@app.get(
+    "/get_pending_invoices/cache_stats",
+    tags=[TAG_ORDERS],
+    responses={"200": QueryCacheStatsSchema},
+)
+def get_pending_invoices_cache_stats():
+    """Query cache counters of the pending invoices pages."""
+    log.add_message("Get_pending_invoices_cache_stats route accessed")
+
+    return_data = {"message": "Success", "stats": query_cache.stats}
+
+    log.add_payload("Get_pending_invoices_cache_stats response", return_data)
+    log.add_message("Get_pending_invoices_cache_stats status: 200")
+    log.add_message("")
+
+    return return_data, 200
+
+
 @app.put(
     "/complete_order",
     tags=[TAG_ORDERS],
@@ -269,48 +441,249 @@ def complete_order(form: OrderCloseSchema):
     order_id = form.order_id
 
     try:
-        registered_order = database.select_value_table_parameter(
-            column=Orders.order_id, filter_select={Orders.order_id: order_id}
+        log.add_message(f"Completing order {order_id} if it is pending")
+
+        updated_rows = database.update_data_table_condition(
+            table=Orders,
+            conditions=[
+                Orders.order_id == order_id,
+                Orders.invoice_status != "Completed",
+            ],
+            new_data={Orders.invoice_status: "Completed"},
         )
 
-        log.add_message(f"Checking if order {order_id} exists")
+        if updated_rows == 0:
+            registered_order = database.select_value_table_parameter(
+                column=Orders.order_id,
+                filter_select={Orders.order_id: order_id},
+            )
 
-        if not registered_order:
-            raise Exception(f"The order {order_id} does not exist")
+            if not registered_order:
+                raise Exception(f"The order {order_id} does not exist")
 
-        log.add_message("The order exists")
+            raise Exception(f"The order {order_id} is already completed")
 
-        invoice_status = database.select_value_table_parameter(
-            column=Orders.invoice_status,
-            filter_select={Orders.order_id: order_id}
-        )
+        return_data = {"message": f"Order {order_id} completed successfully"}
 
-        log.add_message(f"Checking if order {order_id} is completed")
+        log.add_payload("Complete_order response", return_data)
+        log.add_message("Complete_order status: 200")
+        log.add_message("")
 
-        if invoice_status == "Completed":
-            raise Exception(f"The order {order_id} is already completed")
+        return return_data, 200
+    except Exception as error:
+        return_data = {"message": f"Error: {error}"}
 
-        log.add_message("The order is pending and will be finalized")
+        log.add_payload("Complete_order response", return_data)
+        log.add_message("Complete_order status: 400")
+        log.add_message("")
 
-        new_invoice_status = "Completed"
-        database.update_data_table(
-            table=Orders,
-            filter_update={Orders.order_id: order_id},
-            new_data={Orders.invoice_status: new_invoice_status},
-        )
+        return return_data, 400
 
-        return_data = {"message": f"Order {order_id} completed successfully"}
 
-        log.add_message(f"Complete_order response: {return_data}")
-        log.add_message("Complete_order status: 200")
+@app.put(
+    "/complete_orders",
+    tags=[TAG_ORDERS],
+    responses={
+        "200": OrdersCompletedSchema,
+        "400": SingleMessageSchema,
+    },
+)
+def complete_orders(body: OrdersCloseSchema):
+    """Closes a list of orders from the orders table in one transaction."""
+    log.add_message("Complete_orders route accessed")
+
+    order_ids = sorted(set(body.order_ids))
+
+    try:
+        if len(order_ids) == 0:
+            raise Exception("No order ids were provided")
+
+        log.add_message(f"Completing {len(order_ids)} orders")
+
+        chunk_size = database.INSERT_CHUNK_SIZE
+
+        with database.unit_of_work():
+            completed = 0
+
+            for start in range(0, len(order_ids), chunk_size):
+                completed += database.update_data_table_condition(
+                    table=Orders,
+                    conditions=[
+                        Orders.order_id.in_(
+                            order_ids[start:start + chunk_size]
+                        ),
+                        Orders.invoice_status != "Completed",
+                    ],
+                    new_data={Orders.invoice_status: "Completed"},
+                )
+
+            not_found = []
+
+            if completed < len(order_ids):
+                registered_orders = database.select_existing_values(
+                    column=Orders.order_id, values=order_ids
+                )
+                not_found = [
+                    order_id for order_id in order_ids
+                    if order_id not in registered_orders
+                ]
+
+        return_data = {
+            "message": f"{completed} orders completed successfully",
+            "completed": completed,
+            "already_completed": len(order_ids) - completed - len(not_found),
+            "not_found": not_found,
+        }
+
+        log.add_payload("Complete_orders response", return_data)
+        log.add_message("Complete_orders status: 200")
         log.add_message("")
 
         return return_data, 200
     except Exception as error:
         return_data = {"message": f"Error: {error}"}
 
-        log.add_message(f"Complete_order response: {return_data}")
-        log.add_message("Complete_order status: 400")
+        log.add_payload("Complete_orders response", return_data)
+        log.add_message("Complete_orders status: 400")
+        log.add_message("")
+
+        return return_data, 400
+
+
+@app.put(
+    "/requeue_close_sales",
+    tags=[TAG_ORDERS],
+    responses={
+        "200": RequeuedCloseSalesSchema,
+        "400": SingleMessageSchema,
+    },
+)
+def requeue_close_sales(body: CloseSalesRequeueSchema):
+    """Sends the failed close sale notifications to the store again."""
+    log.add_message("Requeue_close_sales route accessed")
+
+    try:
+        requeued = close_sale_dispatcher.requeue_failed(body.sales_ids)
+        return_data = {
+            "message": f"{requeued} close sale notifications requeued",
+            "requeued": requeued,
+        }
+
+        log.add_payload("Requeue_close_sales response", return_data)
+        log.add_message("Requeue_close_sales status: 200")
+        log.add_message("")
+
+        return return_data, 200
+    except Exception as error:
+        return_data = {"message": f"Error: {error}"}
+
+        log.add_payload("Requeue_close_sales response", return_data)
+        log.add_message("Requeue_close_sales status: 400")
+        log.add_message("")
+
+        return return_data, 400
+
+
+def generate_export_lines(chunks, export_format: str):
+    """
+    Generates the NDJSON or CSV text of each chunk of exported rows. \
+    An error while streaming is logged and ends the export with \
+    an error line, as the 200 status was already sent.
+    """
+    column_names = [column.key for column in EXPORT_COLUMNS]
+    exported_rows = 0
+
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(column_names)
+        yield buffer.getvalue()
+
+    try:
+        for rows in chunks:
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows(rows)
+                yield buffer.getvalue()
+            else:
+                lines = [
+                    app.json.dumps(
+                        dict(zip(column_names, row)), sort_keys=False
+                    )
+                    for row in rows
+                ]
+                yield "".join(f"{line}\n" for line in lines)
+
+            exported_rows += len(rows)
+    except Exception as error:
+        log.add_message(
+            "Export_orders failed after %s orders: %s",
+            exported_rows,
+            error,
+            level=log.ERROR,
+        )
+        log.add_message("")
+
+        if export_format == "csv":
+            yield f"{EXPORT_ERROR_MARKER}: {error}\n"
+        else:
+            error_line = app.json.dumps({"error": f"Error: {error}"})
+            yield f"{error_line}\n"
+
+        return
+
+    log.add_message(f"Export_orders streamed {exported_rows} orders")
+    log.add_message("Export_orders status: 200")
+    log.add_message("")
+
+
+@app.get(
+    "/export_orders",
+    tags=[TAG_ORDERS],
+    responses={"400": SingleMessageSchema},
+)
+def export_orders(query: ExportOrdersQuerySchema):
+    """
+    Streams the orders as NDJSON or CSV lines. \
+    A failed export ends with an {"error": ...} NDJSON line \
+    or a CSV line starting with #ERROR.
+    """
+    log.add_message("Export_orders route accessed")
+
+    try:
+        conditions = []
+
+        if query.invoice_status is not None:
+            conditions.append(Orders.invoice_status == query.invoice_status)
+
+        conditions.extend(
+            get_sale_date_conditions(query.start_date, query.end_date)
+        )
+
+        chunks = database.stream_data_table(
+            columns=EXPORT_COLUMNS,
+            conditions=conditions,
+            order_by=Orders.order_id,
+            chunk_size=query.chunk_size,
+        )
+
+        log.add_message(f"Export_orders streaming {query.format} lines")
+
+        return Response(
+            generate_export_lines(chunks, query.format),
+            mimetype=EXPORT_MIMETYPES[query.format],
+            headers={
+                "Content-Disposition": (
+                    f"attachment; filename=orders.{query.format}"
+                )
+            },
+        )
+    except Exception as error:
+        return_data = {"message": f"Error: {error}"}
+
+        log.add_payload("Export_orders response", return_data)
+        log.add_message("Export_orders status: 400")
         log.add_message("")
 
         return return_data, 400
@@ -0,0 +1,20 @@
+from uuid import uuid4
+
+from flask import request
+
+from app import app, log
+
+
+@app.before_request
+def set_request_id():
+    """Sets the request id attached to the log messages."""
+    request_id = request.headers.get("X-Request-ID") or uuid4().hex
+    log.set_request_id(request_id)
+
+
+@app.after_request
+def add_request_id_header(response):
+    """Returns the request id to the client."""
+    response.headers["X-Request-ID"] = log.REQUEST_ID.get()
+
+    return response
@@ -1,6 +1,13 @@
+import time
+
+from flask import Response, g, request
 from flask_cors import CORS
 from flask_openapi3 import Info, OpenAPI
 
+from resources.json_provider import JsonProvider
+from services.event_loop import EventLoop
+from services.metrics import Metrics
+
 
 class Settings:
     """Class to define all Flask settings"""
@@ -23,8 +30,130 @@ class Settings:
         """Method to generate app"""
         self._app = OpenAPI(__name__, info=self._information)
         self._app.secret_key = self._secret_key
+        self._app.json = JsonProvider(self._app)
         CORS(self._app)
 
+    def use_event_loop(self, event_loop: EventLoop) -> None:
+        """
+        Method to run the async routes on a long-lived event loop,
+        so their upstream calls share one loop and connection pool.
+        Each async view still holds its server thread until it ends,
+        so a worker serves at most as many requests as it has threads.
+        Only the upstream calls inside a request overlap.
+        """
+        if self._app is None:
+            self.generate_app()
+
+        self._app.async_to_sync = event_loop.async_to_sync
+
+    def use_metrics(self, metrics: Metrics) -> None:
+        """
+        Method to count and time the requests of every route
+        and serve the metrics at /metrics in the Prometheus format.
+        Requests are recorded when the response is closed, so the time
+        of a streamed response includes sending its body.
+        """
+        if self._app is None:
+            self.generate_app()
+
+        metrics.define(
+            "http_requests_total",
+            Metrics.COUNTER,
+            "Requests answered by route, method and status code.",
+            labels=["route", "method", "status"],
+        )
+        metrics.define(
+            "http_request_duration_seconds",
+            Metrics.HISTOGRAM,
+            "Time to answer the requests, by route and method.",
+            labels=["route", "method"],
+        )
+
+        def start_timer() -> None:
+            g.request_start = time.perf_counter()
+
+        def record_request(response):
+            start = g.get("request_start")
+
+            if start is None:
+                return response
+
+            route = "unmatched"
+
+            if request.url_rule is not None:
+                route = request.url_rule.rule
+
+            labels = (route, request.method)
+            status = str(response.status_code)
+
+            def record_duration() -> None:
+                metrics.observe(
+                    "http_request_duration_seconds",
+                    time.perf_counter() - start,
+                    labels,
+                )
+                metrics.inc("http_requests_total", (*labels, status))
+
+            response.call_on_close(record_duration)
+
+            return response
+
+        def export_metrics():
+            return Response(
+                metrics.render(), content_type=Metrics.CONTENT_TYPE
+            )
+
+        self._app.before_request(start_timer)
+        self._app.after_request(record_request)
+        self._app.add_url_rule("/metrics", "metrics", export_metrics)
+
+    def run_production_server(
+        self,
+        workers: int,
+        threads: int,
+        keepalive: int,
+        graceful_timeout: int,
+        on_worker_start,
+        on_worker_exit,
+        on_server_ready,
+        on_server_exit,
+    ) -> None:
+        """
+        Method to serve the aplication with gunicorn threaded workers.
+        The worker callbacks prepare and release each worker process,
+        the server ready and exit callbacks run only in the master process.
+        """
+        from gunicorn.app.base import BaseApplication
+
+        if self._app is None:
+            self.generate_app()
+
+        options = {
+            "bind": f"{self._host}:{self._port}",
+            "workers": workers,
+            "threads": threads,
+            "worker_class": "gthread",
+            "keepalive": keepalive,
+            "graceful_timeout": graceful_timeout,
+            "post_fork": lambda server, worker: on_worker_start(),
+            "worker_exit": lambda server, worker: on_worker_exit(),
+            "when_ready": lambda server: on_server_ready(),
+            "on_exit": lambda server: on_server_exit(),
+        }
+        app = self._app
+
+        class ProductionServer(BaseApplication):
+            """Class to run the aplication under gunicorn"""
+
+            def load_config(self):
+                for key, value in options.items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                return app
+
+        ProductionServer().run()
+
     def run_aplication(self) -> None:
         """Method to start the flask aplication"""
         if self._app is None:
@@ -20,6 +20,17 @@ class ExternalApiResultSchema(BaseModel):
     product: dict
 
 
+class CacheStatsSchema(BaseModel):
+    """
+    Defines how the API response should be \
+    for the zip code cache and local dataset counters.
+    """
+
+    message: str
+    stats: dict
+    dataset: dict
+
+
 class SingleMessageSchema(BaseModel):
     """
     Defines how the API response should be \
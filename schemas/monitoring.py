@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class UpstreamStatsSchema(BaseModel):
+    """
+    Defines how the API response should be \
+    for the latency metrics of the upstreams.
+    """
+
+    message: str
+    upstreams: dict
+    async_upstreams: dict
+    coalesced: dict
+    circuits: dict
@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from datetime import date
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
 
 from database.model.orders import Orders
 
@@ -20,6 +23,102 @@ class SingleMessageSchema(BaseModel):
     message: str
 
 
+class AddOrderQuerySchema(BaseModel):
+    """
+    Defines if all open sales must be checked \
+    instead of only the ones after the last ingested sale.
+    """
+
+    full_sync: bool = False
+
+
+class IngestionJobSchema(BaseModel):
+    """
+    Defines how the API response should be \
+    after triggering a sales ingestion.
+    """
+
+    message: str
+    job_id: str
+    status: str
+
+
+class IngestionStatusQuerySchema(BaseModel):
+    """
+    Defines the optional job id whose status must be returned.
+    """
+
+    job_id: Optional[str] = None
+
+
+class IngestionStatusSchema(BaseModel):
+    """
+    Defines how the API response should be \
+    for the status of the sales ingestion.
+    """
+
+    message: str
+    interval_seconds: float
+    running: Optional[dict]
+    last_run: Optional[dict]
+    job: Optional[dict]
+
+
+class PendingInvoicesQuerySchema(BaseModel):
+    """
+    Defines the page and filters of the pending invoices query. \
+    The cursor is the next_cursor of the previous page and \
+    the total is only counted on the first page, when requested. \
+    The dates are yyyy-mm-dd days, both included, compared with \
+    the sale_date of the orders, which must be ISO formatted text.
+    """
+
+    cursor: Optional[int] = None
+    limit: int = Field(100, ge=1, le=1000)
+    include_total: bool = False
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    category: Optional[str] = None
+    supplier: Optional[str] = None
+    state: Optional[str] = None
+
+
+class PendingInvoicesSchema(BaseModel):
+    """
+    Defines how the API response should be \
+    like for a page of pending invoices.
+    """
+
+    message: str
+    orders: list
+    next_cursor: Optional[int]
+    total: Optional[int]
+
+
+class QueryCacheStatsSchema(BaseModel):
+    """
+    Defines how the API response should be \
+    for the query cache counters of the pending invoices.
+    """
+
+    message: str
+    stats: dict
+
+
+class ExportOrdersQuerySchema(BaseModel):
+    """
+    Defines the format and filters of the orders export. \
+    The dates are yyyy-mm-dd days, both included, compared with \
+    the sale_date of the orders, which must be ISO formatted text.
+    """
+
+    format: Literal["ndjson", "csv"] = "ndjson"
+    invoice_status: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    chunk_size: int = Field(1000, ge=1, le=10000)
+
+
 class OrderCloseSchema(BaseModel):
     """
     Defines how a order id must be passed to be closed.
@@ -28,26 +127,71 @@ class OrderCloseSchema(BaseModel):
     order_id: int
 
 
-def format_add_order_response(order: Orders) -> dict:
-    """
-    Format the API response for a added order.
-    """
-    response = {
-        "name": order.name,
-        "price": order.price,
-        "supplier": order.supplier,
-        "category": order.category,
-        "description": order.description,
-        "sales_id": order.sales_id,
-        "quantity": order.quantity,
-        "value": order.value,
-        "sale_date": order.sale_date,
-        "zip_code": order.zip_code,
-        "country": order.country,
-        "city": order.city,
-        "state": order.state,
-        "street": order.street,
-        "neighborhood": order.neighborhood,
-    }
-
-    return response
+class OrdersCloseSchema(BaseModel):
+    """
+    Defines how a list of order ids must be passed to be closed.
+    """
+
+    order_ids: List[int]
+
+
+class CloseSalesRequeueSchema(BaseModel):
+    """
+    Defines which failed close sale notifications must be sent again. \
+    Every failed notification is requeued when no sales ids are passed.
+    """
+
+    sales_ids: Optional[List[int]] = Field(None, max_items=1000)
+
+
+class RequeuedCloseSalesSchema(BaseModel):
+    """
+    Defines how the API response should be \
+    after requeueing the failed close sale notifications.
+    """
+
+    message: str
+    requeued: int
+
+
+class OrdersCompletedSchema(BaseModel):
+    """
+    Defines how the API response should be \
+    after closing a list of orders.
+    """
+
+    message: str
+    completed: int
+    already_completed: int
+    not_found: List[int]
+
+
+ORDER_RESPONSE_FIELDS = [
+    "order_id",
+    "name",
+    "price",
+    "supplier",
+    "category",
+    "description",
+    "sales_id",
+    "quantity",
+    "value",
+    "sale_date",
+    "zip_code",
+    "country",
+    "city",
+    "state",
+    "street",
+    "neighborhood",
+]
+ORDER_RESPONSE_COLUMNS = [
+    getattr(Orders, field) for field in ORDER_RESPONSE_FIELDS
+]
+
+
+def format_order_rows(rows: list) -> list:
+    """
+    Format the API response for orders selected as
+    ORDER_RESPONSE_COLUMNS tuples.
+    """
+    return [dict(zip(ORDER_RESPONSE_FIELDS, row)) for row in rows]
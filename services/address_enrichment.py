@@ -0,0 +1,202 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from log.log import Log
+from services.metrics import Metrics
+from services.viacep import ViaCep, ZipCodeNotFoundError
+
+
+class AddressEnrichment:
+    """Class to fill in missing sales addresses with ViaCep data"""
+
+    ADDRESS_COLUMNS = {
+        "city": "localidade",
+        "state": "uf",
+        "street": "logradouro",
+        "neighborhood": "bairro",
+    }
+    COUNTRIES = ["Brazil", "Brasil"]
+    ADDRESS_STATUS = "address_status"
+    UNENRICHED = "unenriched"
+
+    def __init__(
+        self, viacep: ViaCep, log: Log, metrics: Metrics, max_workers: int
+    ):
+        self._viacep = viacep
+        self._log = log
+        self._metrics = metrics
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="address-enrichment"
+        )
+
+        metrics.define(
+            "address_enrichments_total",
+            Metrics.COUNTER,
+            "Incomplete sales by result: enriched, not_found or unenriched.",
+            labels=["result"],
+        )
+
+    def _get_empty_address_columns(self, sale: dict) -> list:
+        """Method to list the empty address columns of a brazilian sale"""
+        if sale.get("country") not in self.COUNTRIES:
+            return []
+
+        empty_address_columns = [
+            key for key in self.ADDRESS_COLUMNS
+            if len(sale.get(key, "").strip()) == 0
+        ]
+
+        return empty_address_columns
+
+    def _query_zip_code(self, zip_code: str) -> dict:
+        """
+        Method to query a zip code, returning empty data when it is
+        not found and None when ViaCep could not be queried.
+        """
+        try:
+            return self._viacep.query_zip_code(zip_code)
+        except ZipCodeNotFoundError:
+            return {}
+        except Exception as error:
+            self._log.add_message(
+                "Zip code %s not enriched: %s",
+                zip_code,
+                error,
+                level=self._log.WARNING,
+            )
+
+            return None
+
+    def query_zip_codes(self, zip_codes: set) -> dict:
+        """
+        Method to query distinct zip codes concurrently.
+        Each query runs in a copy of the caller context, keeping the
+        request id of its log messages.
+        """
+        zip_codes = list(zip_codes)
+        futures = [
+            self._executor.submit(
+                copy_context().run, self._query_zip_code, zip_code
+            )
+            for zip_code in zip_codes
+        ]
+
+        return {
+            zip_code: future.result()
+            for zip_code, future in zip(zip_codes, futures)
+        }
+
+    async def _query_zip_code_async(self, zip_code: str) -> dict:
+        """Method to query a zip code on the loop, as _query_zip_code"""
+        try:
+            return await self._viacep.query_zip_code_async(zip_code)
+        except ZipCodeNotFoundError:
+            return {}
+        except Exception as error:
+            self._log.add_message(
+                "Zip code %s not enriched: %s",
+                zip_code,
+                error,
+                level=self._log.WARNING,
+            )
+
+            return None
+
+    async def query_zip_codes_async(self, zip_codes: set) -> dict:
+        """Method to query distinct zip codes concurrently on the loop"""
+        zip_codes = list(zip_codes)
+        results = await asyncio.gather(
+            *[self._query_zip_code_async(zip_code) for zip_code in zip_codes]
+        )
+
+        return dict(zip(zip_codes, results))
+
+    def _find_incomplete_sales(self, sales_data: list) -> list:
+        """Method to list the sales with empty address columns"""
+        incomplete_sales = []
+
+        for sale in sales_data:
+            empty_address_columns = self._get_empty_address_columns(sale)
+
+            if len(empty_address_columns) > 0:
+                self._log.add_message(
+                    "Sale %s is incomplete, empty colums: %s",
+                    sale["sales_id"],
+                    ", ".join(empty_address_columns),
+                    level=self._log.DEBUG,
+                )
+                incomplete_sales.append((sale, empty_address_columns))
+
+        return incomplete_sales
+
+    def _get_zip_codes(self, incomplete_sales: list) -> set:
+        """Method to get the distinct zip codes of the incomplete sales"""
+        zip_codes = {sale.get("zip_code", "") for sale, _ in incomplete_sales}
+
+        self._log.add_message(
+            f"Querying {len(zip_codes)} distinct zip codes "
+            f"for {len(incomplete_sales)} incomplete sales"
+        )
+
+        return zip_codes
+
+    def _fill_addresses(
+        self, incomplete_sales: list, addresses: dict
+    ) -> None:
+        """
+        Method to fill in the empty address columns of the sales.
+        The sales whose zip code could not be queried are marked
+        as unenriched.
+        """
+        results = {"enriched": 0, "not_found": 0, "unenriched": 0}
+
+        for sale, empty_address_columns in incomplete_sales:
+            data_viacep = addresses[sale.get("zip_code", "")]
+
+            if data_viacep is None:
+                sale[self.ADDRESS_STATUS] = self.UNENRICHED
+                results["unenriched"] += 1
+                continue
+
+            if len(data_viacep) == 0:
+                results["not_found"] += 1
+                continue
+
+            results["enriched"] += 1
+
+            for empty_column in empty_address_columns:
+                new_data = data_viacep[self.ADDRESS_COLUMNS[empty_column]]
+                sale[empty_column] = new_data
+
+                self._log.add_message(
+                    "Sale %s: %s updated with %s",
+                    sale["sales_id"],
+                    empty_column,
+                    new_data,
+                    level=self._log.DEBUG,
+                )
+
+        for result, count in results.items():
+            if count > 0:
+                self._metrics.inc(
+                    "address_enrichments_total", (result,), count
+                )
+
+    def enrich_sales(self, sales_data: list) -> list:
+        """Method to fill in the empty address columns of the sales"""
+        incomplete_sales = self._find_incomplete_sales(sales_data)
+        zip_codes = self._get_zip_codes(incomplete_sales)
+        addresses = self.query_zip_codes(zip_codes)
+        self._fill_addresses(incomplete_sales, addresses)
+
+        return sales_data
+
+    async def enrich_sales_async(self, sales_data: list) -> list:
+        """Method to fill in the empty address columns on the event loop"""
+        incomplete_sales = self._find_incomplete_sales(sales_data)
+        zip_codes = self._get_zip_codes(incomplete_sales)
+        addresses = await self.query_zip_codes_async(zip_codes)
+        self._fill_addresses(incomplete_sales, addresses)
+
+        return sales_data
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from services.http_client import HttpClient
+
+
+class AsyncHttpResponse:
+    """Class to hold the status and body of an async response"""
+
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        """Method to decode the JSON body of the response"""
+        return json.loads(self.content)
+
+
+class AsyncHttpClient(HttpClient):
+    """Class to send outbound requests through pooled async sessions"""
+
+    def _get_session(self, url: str) -> aiohttp.ClientSession:
+        """Method to return the async session of the url host"""
+        host = urlsplit(url).netloc
+
+        with self._lock:
+            session = self._sessions.get(host)
+
+            if session is None:
+                connect_timeout, read_timeout = self._timeout
+                session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self._pool_size),
+                    timeout=aiohttp.ClientTimeout(
+                        sock_connect=connect_timeout, sock_read=read_timeout
+                    ),
+                )
+                self._sessions[host] = session
+
+        return session
+
+    async def _send(
+        self, session: aiohttp.ClientSession, method: str, url: str, **kwargs
+    ) -> AsyncHttpResponse:
+        """Method to send a request and read its whole body"""
+        async with session.request(method, url, **kwargs) as response:
+            content = await response.read()
+
+        return AsyncHttpResponse(response.status, content)
+
+    async def request(
+        self, method: str, url: str, upstream: str, **kwargs
+    ) -> AsyncHttpResponse:
+        """
+        Method to send a request without blocking the event loop,
+        retrying connection errors, timeouts and gateway errors
+        with jittered backoff.
+        Any other error is recorded as a failure without a retry, and
+        a cancelled call gives back its half open probe.
+        Raises CircuitOpenError while the upstream circuit is open.
+        """
+        self.check_available(upstream)
+
+        session = self._get_session(url)
+        start = time.perf_counter()
+        attempt = 0
+
+        try:
+            while True:
+                try:
+                    response = await self._send(
+                        session, method, url, **kwargs
+                    )
+                except (
+                    aiohttp.ClientConnectionError, asyncio.TimeoutError
+                ) as error:
+                    if attempt >= self._retries:
+                        elapsed = time.perf_counter() - start
+                        self._record(upstream, elapsed, True, attempt)
+                        raise error
+                except Exception as error:
+                    elapsed = time.perf_counter() - start
+                    self._record(upstream, elapsed, True, attempt)
+                    raise error
+                else:
+                    retry_status = response.status_code in self.RETRY_STATUS
+
+                    if not retry_status or attempt >= self._retries:
+                        elapsed = time.perf_counter() - start
+                        error = response.status_code >= 500
+                        self._record(upstream, elapsed, error, attempt)
+
+                        return response
+
+                await asyncio.sleep(self._get_backoff(attempt))
+                attempt += 1
+        except asyncio.CancelledError as error:
+            self.release_probe(upstream)
+            raise error
+
+    async def close(self) -> None:
+        """Method to close the async sessions of every host"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions = {}
+
+        for session in sessions:
+            await session.close()
+
+    async def get(
+        self, url: str, upstream: str, **kwargs
+    ) -> AsyncHttpResponse:
+        """Method to send a GET request"""
+        return await self.request("GET", url, upstream, **kwargs)
+
+    async def put(
+        self, url: str, upstream: str, **kwargs
+    ) -> AsyncHttpResponse:
+        """Method to send a PUT request"""
+        return await self.request("PUT", url, upstream, **kwargs)
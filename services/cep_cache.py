@@ -0,0 +1,188 @@
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock, local
+
+
+class CepCache:
+    """
+    Class to cache ViaCep zip code lookups.
+
+    Only the entries in memory are kept under the lock. The persisted
+    cache is read and written outside it, with one SQLite connection
+    per thread, so the enrichment threads do not wait on each other.
+    """
+
+    MISS = object()
+
+    def __init__(
+        self,
+        ttl: int,
+        max_size: int,
+        negative_ttl: int,
+        persist_path: str = "",
+    ):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._negative_ttl = negative_ttl
+        self._persist_path = persist_path
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._local = local()
+        self._persisted = False
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Method to return the persisted cache connection of the thread"""
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None:
+            connection = sqlite3.connect(self._persist_path)
+            self._local.connection = connection
+
+        return connection
+
+    def _load_persisted(self, zip_code: str, stale: bool = False):
+        """
+        Method to read a zip code from the persisted cache,
+        keeping it in memory when found.
+        Expired rows are only returned when stale data is accepted.
+        """
+        row = self._get_connection().execute(
+            "SELECT data, expires_at FROM cep_cache WHERE zip_code = ?",
+            (zip_code,),
+        ).fetchone()
+
+        if row is None or (row[1] <= time.time() and not stale):
+            return self.MISS
+
+        data = None if row[0] is None else json.loads(row[0])
+
+        with self._lock:
+            self._store(zip_code, data, row[1])
+
+        return data
+
+    def _persist(self, zip_code: str, data, expires_at: float) -> None:
+        """Method to write a zip code to the persisted cache"""
+        serialized_data = None if data is None else json.dumps(data)
+        connection = self._get_connection()
+
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cep_cache VALUES (?, ?, ?)",
+                (zip_code, serialized_data, expires_at),
+            )
+
+    def _store(self, zip_code: str, data, expires_at: float) -> None:
+        """Method to store a zip code in memory, evicting the oldest"""
+        self._entries[zip_code] = (data, expires_at)
+        self._entries.move_to_end(zip_code)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def start_cache(self) -> None:
+        """Method to open the persisted cache, when configured"""
+        if not self._persist_path:
+            return
+
+        cache_directory = os.path.dirname(self._persist_path)
+
+        if cache_directory and not os.path.isdir(cache_directory):
+            os.makedirs(cache_directory)
+
+        connection = self._get_connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cep_cache ("
+                "zip_code TEXT PRIMARY KEY, data TEXT, expires_at REAL)"
+            )
+            connection.execute(
+                "DELETE FROM cep_cache WHERE expires_at <= ?",
+                (time.time(),),
+            )
+
+        self._persisted = True
+
+    def get(self, zip_code: str):
+        """
+        Method to get a cached zip code.
+        Returns MISS when unknown and None when cached as not found.
+        Expired entries are kept until evicted, for get_stale.
+        """
+        with self._lock:
+            entry = self._entries.get(zip_code)
+
+            if entry is not None and entry[1] <= time.time():
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(zip_code)
+                self._hits += 1
+
+                return entry[0]
+
+        data = self.MISS
+
+        if self._persisted:
+            data = self._load_persisted(zip_code)
+
+        with self._lock:
+            if data is self.MISS:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        return data
+
+    def get_stale(self, zip_code: str):
+        """
+        Method to get a cached zip code even if it has expired,
+        used as a fallback while ViaCep is unavailable.
+        """
+        with self._lock:
+            entry = self._entries.get(zip_code)
+
+            if entry is not None:
+                return entry[0]
+
+        if not self._persisted:
+            return self.MISS
+
+        return self._load_persisted(zip_code, stale=True)
+
+    def set(self, zip_code: str, data) -> None:
+        """Method to cache a zip code, None meaning not found"""
+        ttl = self._ttl if data is not None else self._negative_ttl
+        expires_at = time.time() + ttl
+
+        with self._lock:
+            self._store(zip_code, data, expires_at)
+
+        if self._persisted:
+            self._persist(zip_code, data, expires_at)
+
+    @property
+    def stats(self) -> dict:
+        """Method to return the cache counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            hit_ratio = self._hits / lookups if lookups else 0.0
+
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "hit_ratio": round(hit_ratio, 4),
+                "persisted": self._persisted,
+            }
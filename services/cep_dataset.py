@@ -0,0 +1,239 @@
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from threading import Lock
+
+
+class CepDataset:
+    """
+    Class to look up zip codes in a local memory-mapped dataset file.
+
+    The file holds a header, a prefix table with the first key index
+    of each 3-digit zip code prefix, the sorted zip codes and the
+    record offsets, all as little-endian uint32, and the records
+    themselves, whose address fields are separated by the unit
+    separator character. Little-endian hosts map the uint32 sections
+    without copying them.
+    """
+
+    MAGIC = b"CEPIDX01"
+    HEADER = struct.Struct("<8sI")
+    PREFIXES = 1000
+    PREFIX_DIVISOR = 100000
+    FIELDS = ["logradouro", "bairro", "localidade", "uf"]
+    SEPARATOR = "\x1f"
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = None
+        self._mmap = None
+        self._prefix_index = None
+        self._keys = None
+        self._offsets = None
+        self._records = None
+        self._hits = 0
+        self._misses = 0
+        self._lock = Lock()
+
+    def _normalize_zip_code(self, zip_code) -> int:
+        """Method to convert a zip code to its number, if it is valid"""
+        digits = "".join(char for char in str(zip_code) if char.isdigit())
+
+        if len(digits) != 8:
+            return None
+
+        return int(digits)
+
+    def _read_dump(self, source_path: str) -> dict:
+        """Method to read the addresses of a CSV or JSON dump"""
+        with open(source_path, encoding="utf-8", newline="") as source:
+            if source_path.lower().endswith(".json"):
+                rows = json.load(source)
+            else:
+                rows = list(csv.DictReader(source))
+
+        addresses = {}
+
+        for row in rows:
+            key = self._normalize_zip_code(row.get("cep", ""))
+
+            if key is None:
+                continue
+
+            addresses[key] = self.SEPARATOR.join(
+                str(row.get(field) or "").replace(self.SEPARATOR, " ")
+                for field in self.FIELDS
+            )
+
+        return addresses
+
+    def _to_bytes(self, values: array) -> bytes:
+        """Method to serialize uint32 values as little-endian bytes"""
+        if sys.byteorder == "big":
+            values = array("I", values)
+            values.byteswap()
+
+        return values.tobytes()
+
+    def _read_uint32(self, section: memoryview):
+        """
+        Method to read little-endian uint32 values, as a view
+        of the mapped file when the host is little-endian too.
+        """
+        if sys.byteorder == "little":
+            return section.cast("I")
+
+        values = array("I", bytes(section))
+        values.byteswap()
+        section.release()
+
+        return values
+
+    def is_outdated(self, source_path: str) -> bool:
+        """
+        Method to check if the dataset file is older than the dump.
+        A dataset whose dump was removed is kept as it is.
+        """
+        if not os.path.isfile(source_path):
+            return False
+
+        if not os.path.isfile(self._path):
+            return True
+
+        return os.path.getmtime(self._path) < os.path.getmtime(source_path)
+
+    def build_dataset(self, source_path: str) -> int:
+        """
+        Method to compile a CSV or JSON dump of addresses
+        into the dataset file, returning the number of zip codes.
+        """
+        addresses = self._read_dump(source_path)
+        keys = array("I", sorted(addresses))
+        offsets = array("I", [0])
+        prefix_index = array("I", [0] * (self.PREFIXES + 1))
+        records = bytearray()
+
+        for position, key in enumerate(keys):
+            records += addresses[key].encode("utf-8")
+            offsets.append(len(records))
+            prefix_index[key // self.PREFIX_DIVISOR + 1] = position + 1
+
+        for prefix in range(1, self.PREFIXES + 1):
+            prefix_index[prefix] = max(
+                prefix_index[prefix], prefix_index[prefix - 1]
+            )
+
+        dataset_directory = os.path.dirname(self._path)
+
+        if dataset_directory and not os.path.isdir(dataset_directory):
+            os.makedirs(dataset_directory)
+
+        temporary_path = f"{self._path}.tmp"
+
+        with open(temporary_path, "wb") as dataset_file:
+            dataset_file.write(self.HEADER.pack(self.MAGIC, len(keys)))
+            dataset_file.write(self._to_bytes(prefix_index))
+            dataset_file.write(self._to_bytes(keys))
+            dataset_file.write(self._to_bytes(offsets))
+            dataset_file.write(records)
+
+        os.replace(temporary_path, self._path)
+
+        return len(keys)
+
+    def open_dataset(self) -> bool:
+        """Method to map the dataset file, when it exists"""
+        if not self._path or not os.path.isfile(self._path):
+            return False
+
+        dataset_file = open(self._path, "rb")
+        dataset_map = mmap.mmap(
+            dataset_file.fileno(), 0, access=mmap.ACCESS_READ
+        )
+        magic, count = self.HEADER.unpack_from(dataset_map)
+
+        if magic != self.MAGIC:
+            dataset_map.close()
+            dataset_file.close()
+            raise Exception(f"Invalid zip code dataset file: {self._path}")
+
+        view = memoryview(dataset_map)
+        start = self.HEADER.size
+        sections = []
+
+        for length in [self.PREFIXES + 1, count, count + 1]:
+            end = start + length * 4
+            sections.append(self._read_uint32(view[start:end]))
+            start = end
+
+        self.close_dataset()
+
+        self._file = dataset_file
+        self._mmap = dataset_map
+        self._prefix_index, self._keys, self._offsets = sections
+        self._records = view[start:]
+
+        return True
+
+    def close_dataset(self) -> None:
+        """Method to unmap the dataset file"""
+        if self._mmap is None:
+            return
+
+        for view in [
+            self._prefix_index, self._keys, self._offsets, self._records
+        ]:
+            if isinstance(view, memoryview):
+                view.release()
+
+        self._mmap.close()
+        self._file.close()
+        self._mmap = None
+        self._file = None
+
+    def get(self, zip_code: str) -> dict:
+        """Method to get the address data of a zip code, if it is known"""
+        key = self._normalize_zip_code(zip_code)
+
+        if self._mmap is None or key is None:
+            return None
+
+        prefix = key // self.PREFIX_DIVISOR
+        low = self._prefix_index[prefix]
+        high = self._prefix_index[prefix + 1]
+        position = bisect_left(self._keys, key, low, high)
+
+        if position == high or self._keys[position] != key:
+            with self._lock:
+                self._misses += 1
+
+            return None
+
+        record = self._records[
+            self._offsets[position]:self._offsets[position + 1]
+        ]
+        fields = bytes(record).decode("utf-8").split(self.SEPARATOR)
+        data = dict(zip(self.FIELDS, fields))
+        cep = f"{key:08d}"
+        data["cep"] = f"{cep[:5]}-{cep[5:]}"
+
+        with self._lock:
+            self._hits += 1
+
+        return data
+
+    @property
+    def stats(self) -> dict:
+        """Method to return the dataset counters"""
+        with self._lock:
+            return {
+                "loaded": self._mmap is not None,
+                "size": len(self._keys) if self._mmap is not None else 0,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
@@ -0,0 +1,124 @@
+import time
+from threading import Lock
+
+
+class CircuitOpenError(Exception):
+    """Exception raised when a call is refused by an open circuit"""
+
+
+class CircuitBreaker:
+    """Class to fail fast on an upstream after consecutive failures"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        half_open_calls: int,
+    ):
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._half_open_calls = half_open_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._opened = 0
+        self._rejected = 0
+        self._lock = Lock()
+
+    def _update_state(self) -> None:
+        """Method to let probes through once the reset timeout is over"""
+        if self._state != self.OPEN:
+            return
+
+        if time.monotonic() - self._opened_at >= self._reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+
+    def _open(self) -> None:
+        """Method to open the circuit"""
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._opened += 1
+
+    def allow(self) -> bool:
+        """
+        Method to check if a call may be sent to the upstream.
+        While half open only a few probe calls are let through.
+        """
+        with self._lock:
+            self._update_state()
+
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.HALF_OPEN:
+                if self._probes < self._half_open_calls:
+                    self._probes += 1
+
+                    return True
+
+            self._rejected += 1
+
+            return False
+
+    def check(self) -> None:
+        """Method to raise CircuitOpenError when a call is not allowed"""
+        if not self.allow():
+            raise CircuitOpenError(f"The {self._name} circuit is open")
+
+    def release_probe(self) -> None:
+        """
+        Method to give back a probe whose call ended without a success
+        or a failure, such as a cancelled call, so it is not lost.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        """Method to close the circuit after a successful call"""
+        with self._lock:
+            if self._state != self.OPEN:
+                self._state = self.CLOSED
+                self._failures = 0
+
+    def record_failure(self) -> None:
+        """Method to count a failed call, opening the circuit if needed"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+
+            if self._state == self.CLOSED:
+                self._failures += 1
+
+                if self._failures >= self._failure_threshold:
+                    self._open()
+
+    @property
+    def is_open(self) -> bool:
+        """Method to check if calls are being refused"""
+        with self._lock:
+            self._update_state()
+
+            return self._state == self.OPEN
+
+    @property
+    def stats(self) -> dict:
+        """Method to return the state and counters of the circuit"""
+        with self._lock:
+            self._update_state()
+
+            return {
+                "state": self._state,
+                "failures": self._failures,
+                "opened": self._opened,
+                "rejected": self._rejected,
+            }
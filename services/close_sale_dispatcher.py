@@ -0,0 +1,211 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Thread
+
+from database.database import Database
+from database.model.close_sale_outbox import CloseSaleOutbox
+from log.log import Log
+from services.circuit_breaker import CircuitOpenError
+from services.http_client import HttpClient
+
+
+class CloseSaleDispatcher:
+    """Class to send the pending close sale notifications of the outbox"""
+
+    CLOSE_SALE_URL = "http://online-store-microservice:5000/close_sale"
+
+    def __init__(
+        self,
+        database: Database,
+        log: Log,
+        http_client: HttpClient,
+        max_workers: int,
+        batch_size: int,
+        max_attempts: int,
+        poll_interval: float,
+        backoff_base: float,
+        backoff_max: float,
+    ):
+        self._database = database
+        self._log = log
+        self._http_client = http_client
+        self._batch_size = batch_size
+        self._max_attempts = max_attempts
+        self._poll_interval = poll_interval
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="close-sale"
+        )
+        self._wake_event = Event()
+        self._stop_event = Event()
+        self._thread = None
+
+    def _close_sale(self, sales_id: int) -> str:
+        """
+        Method to close a sale, returning the error message on failure
+        and None when the call was refused by the open circuit.
+        """
+        try:
+            response = self._http_client.put(
+                self.CLOSE_SALE_URL,
+                upstream="close_sale",
+                data={"sales_id": int(sales_id)},
+            )
+
+            if response.status_code != 200:
+                message = response.json().get("message", "")
+                raise Exception(message.replace("Error: ", ""))
+
+            return ""
+        except CircuitOpenError:
+            return None
+        except Exception as error:
+            return str(error) or error.__class__.__name__
+
+    def _get_backoff(self, attempts: int) -> float:
+        """Method to calculate the jittered delay of a new attempt"""
+        delay = min(self._backoff_max, self._backoff_base * 2 ** attempts)
+
+        return random.uniform(delay / 2, delay)
+
+    def _run(self) -> None:
+        """Method to drain the outbox until the dispatcher is stopped"""
+        while not self._stop_event.is_set():
+            try:
+                dispatched = self.dispatch_pending()
+            except Exception as error:
+                self._log.add_message(
+                    "Close sale dispatcher error: %s",
+                    error,
+                    level=self._log.ERROR,
+                )
+                dispatched = 0
+
+            if dispatched < self._batch_size:
+                self._wake_event.wait(self._poll_interval)
+                self._wake_event.clear()
+
+    def start(self) -> None:
+        """Method to start the dispatcher thread"""
+        if self._thread is not None:
+            return
+
+        self._thread = Thread(
+            target=self._run, name="close-sale-dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Method to stop the dispatcher thread"""
+        self._stop_event.set()
+        self._wake_event.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def wake(self) -> None:
+        """Method to request an immediate outbox drain"""
+        self._wake_event.set()
+
+    def requeue_failed(self, sales_ids: list = None) -> int:
+        """
+        Method to send the failed notifications again, from their first
+        attempt, optionally only those of the given sales.
+        Returns the number of requeued notifications.
+        """
+        conditions = [CloseSaleOutbox.status == "Failed"]
+
+        if sales_ids is not None:
+            conditions.append(CloseSaleOutbox.sales_id.in_(sales_ids))
+
+        requeued = self._database.update_data_table_condition(
+            table=CloseSaleOutbox,
+            conditions=conditions,
+            new_data={
+                CloseSaleOutbox.status: "Pending",
+                CloseSaleOutbox.attempts: 0,
+                CloseSaleOutbox.next_attempt_at: time.time(),
+            },
+        )
+
+        if requeued > 0:
+            self._log.add_message(f"{requeued} failed sales requeued")
+            self.wake()
+
+        return requeued
+
+    def dispatch_pending(self) -> int:
+        """
+        Method to send a batch of due notifications concurrently.
+        Nothing is sent while the close sale circuit is open, and the
+        entries refused by the circuit keep their attempts.
+        """
+        if not self._http_client.is_available("close_sale"):
+            return 0
+
+        pending_entries = self._database.select_data_table_condition(
+            table=CloseSaleOutbox,
+            conditions=[
+                CloseSaleOutbox.status == "Pending",
+                CloseSaleOutbox.next_attempt_at <= time.time(),
+            ],
+            order_by=CloseSaleOutbox.outbox_id,
+            limit=self._batch_size,
+        )
+
+        if len(pending_entries) == 0:
+            return 0
+
+        sales_ids = [entry.sales_id for entry in pending_entries]
+        errors = list(self._executor.map(self._close_sale, sales_ids))
+        sent_ids = []
+
+        for entry, error in zip(pending_entries, errors):
+            if error is None:
+                continue
+
+            if not error:
+                sent_ids.append(entry.outbox_id)
+                continue
+
+            attempts = entry.attempts + 1
+            status = "Failed" if attempts >= self._max_attempts else "Pending"
+
+            self._log.add_message(
+                "Close sale %s attempt %s failed: %s",
+                entry.sales_id,
+                attempts,
+                error,
+                level=self._log.WARNING,
+            )
+
+            self._database.update_data_table(
+                table=CloseSaleOutbox,
+                filter_update={CloseSaleOutbox.outbox_id: entry.outbox_id},
+                new_data={
+                    CloseSaleOutbox.status: status,
+                    CloseSaleOutbox.attempts: attempts,
+                    CloseSaleOutbox.next_attempt_at: (
+                        time.time() + self._get_backoff(attempts)
+                    ),
+                    CloseSaleOutbox.last_error: error[:500],
+                },
+            )
+
+        if len(sent_ids) > 0:
+            self._database.update_data_table_condition(
+                table=CloseSaleOutbox,
+                conditions=[CloseSaleOutbox.outbox_id.in_(sent_ids)],
+                new_data={
+                    CloseSaleOutbox.status: "Sent",
+                    CloseSaleOutbox.attempts: CloseSaleOutbox.attempts + 1,
+                    CloseSaleOutbox.last_error: "",
+                },
+            )
+
+            self._log.add_message(f"{len(sent_ids)} sales closed")
+
+        return len(pending_entries)
@@ -0,0 +1,70 @@
+import asyncio
+import os
+from functools import wraps
+from threading import Lock, Thread
+
+
+class EventLoop:
+    """
+    Class to run coroutines on a long-lived event loop thread.
+    The calling thread is blocked until its coroutine is done.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._lock = Lock()
+
+    def _run_loop(self) -> None:
+        """Method to run the event loop until it is stopped"""
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def start(self) -> None:
+        """
+        Method to start the event loop thread of the current process.
+        A process forked from a running loop starts its own thread.
+        """
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+
+            self._loop = asyncio.new_event_loop()
+            self._thread = Thread(
+                target=self._run_loop, name="event-loop", daemon=True
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def stop(self) -> None:
+        """Method to stop the event loop thread"""
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                return
+
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._thread = None
+
+    def run(self, coroutine):
+        """
+        Method to wait for the result of a coroutine run on the loop.
+        Its task is created from a copy of the caller context, so the
+        coroutine keeps the request id of its log messages.
+        """
+        self.start()
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+        return future.result()
+
+    def async_to_sync(self, func):
+        """Method to adapt a coroutine function to a blocking call"""
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.run(func(*args, **kwargs))
+
+        return wrapper
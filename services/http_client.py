@@ -0,0 +1,241 @@
+import random
+import time
+from threading import Lock
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.circuit_breaker import CircuitBreaker
+from services.metrics import Metrics
+
+
+class HttpClient:
+    """Class to send outbound requests through pooled keep-alive sessions"""
+
+    RETRY_STATUS = [502, 503, 504]
+    LATENCY_BUCKETS = [
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+    ]
+
+    def __init__(
+        self,
+        connect_timeout: float,
+        read_timeout: float,
+        retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        pool_size: int,
+        circuit_breakers: dict,
+        metrics: Metrics,
+    ):
+        self._timeout = (connect_timeout, read_timeout)
+        self._retries = retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._pool_size = pool_size
+        self._circuit_breakers = circuit_breakers
+        self._metrics = metrics
+        self._sessions = {}
+        self._latency_stats = {}
+        self._lock = Lock()
+
+        metrics.define(
+            "upstream_requests_total",
+            Metrics.COUNTER,
+            "Calls sent to each upstream, counting their retries once.",
+            labels=["upstream"],
+        )
+        metrics.define(
+            "upstream_errors_total",
+            Metrics.COUNTER,
+            "Upstream calls that failed after their retries.",
+            labels=["upstream"],
+        )
+        metrics.define(
+            "upstream_retries_total",
+            Metrics.COUNTER,
+            "Retries of the upstream calls.",
+            labels=["upstream"],
+        )
+        metrics.define(
+            "upstream_request_duration_seconds",
+            Metrics.HISTOGRAM,
+            "Time of the upstream calls, including their retries.",
+            labels=["upstream"],
+            buckets=self.LATENCY_BUCKETS,
+        )
+
+    def _get_session(self, url: str) -> requests.Session:
+        """Method to return the session of the url host"""
+        host = urlsplit(url).netloc
+
+        with self._lock:
+            session = self._sessions.get(host)
+
+            if session is None:
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self._pool_size
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+
+        return session
+
+    def _get_backoff(self, attempt: int) -> float:
+        """Method to calculate the jittered delay of a retry"""
+        delay = min(self._backoff_max, self._backoff_base * 2 ** attempt)
+
+        return random.uniform(0, delay)
+
+    def _get_circuit_breaker(self, upstream: str) -> CircuitBreaker:
+        """Method to return the circuit breaker of an upstream, if any"""
+        return self._circuit_breakers.get(upstream)
+
+    def _record(
+        self, upstream: str, elapsed: float, error: bool, retries: int
+    ) -> None:
+        """Method to record the latency and outcome of an upstream call"""
+        circuit_breaker = self._get_circuit_breaker(upstream)
+
+        if circuit_breaker is not None and error:
+            circuit_breaker.record_failure()
+        elif circuit_breaker is not None:
+            circuit_breaker.record_success()
+
+        labels = (upstream,)
+        self._metrics.observe(
+            "upstream_request_duration_seconds", elapsed, labels
+        )
+        self._metrics.inc("upstream_requests_total", labels)
+
+        if error:
+            self._metrics.inc("upstream_errors_total", labels)
+
+        if retries > 0:
+            self._metrics.inc(
+                "upstream_retries_total", labels, retries
+            )
+
+        with self._lock:
+            metrics = self._latency_stats.get(upstream)
+
+            if metrics is None:
+                metrics = {
+                    "requests": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "buckets": [0] * (len(self.LATENCY_BUCKETS) + 1),
+                }
+                self._latency_stats[upstream] = metrics
+
+            metrics["requests"] += 1
+            metrics["errors"] += int(error)
+            metrics["retries"] += retries
+            metrics["total_seconds"] += elapsed
+            metrics["max_seconds"] = max(metrics["max_seconds"], elapsed)
+
+            for index, bucket in enumerate(self.LATENCY_BUCKETS):
+                if elapsed <= bucket:
+                    metrics["buckets"][index] += 1
+                    break
+            else:
+                metrics["buckets"][-1] += 1
+
+    def request(
+        self, method: str, url: str, upstream: str, **kwargs
+    ) -> requests.Response:
+        """
+        Method to send a request, retrying connection errors,
+        timeouts and gateway errors with jittered backoff.
+        Any other error is recorded as a failure without a retry.
+        Raises CircuitOpenError while the upstream circuit is open.
+        """
+        self.check_available(upstream)
+
+        session = self._get_session(url)
+        kwargs.setdefault("timeout", self._timeout)
+        start = time.perf_counter()
+        attempt = 0
+
+        while True:
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt >= self._retries:
+                    elapsed = time.perf_counter() - start
+                    self._record(upstream, elapsed, True, attempt)
+                    raise error
+            except Exception as error:
+                elapsed = time.perf_counter() - start
+                self._record(upstream, elapsed, True, attempt)
+                raise error
+            else:
+                retry_status = response.status_code in self.RETRY_STATUS
+
+                if not retry_status or attempt >= self._retries:
+                    elapsed = time.perf_counter() - start
+                    error = response.status_code >= 500
+                    self._record(upstream, elapsed, error, attempt)
+
+                    return response
+
+            time.sleep(self._get_backoff(attempt))
+            attempt += 1
+
+    def check_available(self, upstream: str) -> None:
+        """Method to raise CircuitOpenError if a call is not allowed"""
+        circuit_breaker = self._get_circuit_breaker(upstream)
+
+        if circuit_breaker is not None:
+            circuit_breaker.check()
+
+    def release_probe(self, upstream: str) -> None:
+        """Method to give back the probe of a call without an outcome"""
+        circuit_breaker = self._get_circuit_breaker(upstream)
+
+        if circuit_breaker is not None:
+            circuit_breaker.release_probe()
+
+    def is_available(self, upstream: str) -> bool:
+        """Method to check if the circuit of an upstream is not open"""
+        circuit_breaker = self._get_circuit_breaker(upstream)
+
+        return circuit_breaker is None or not circuit_breaker.is_open
+
+    def get(self, url: str, upstream: str, **kwargs) -> requests.Response:
+        """Method to send a GET request"""
+        return self.request("GET", url, upstream, **kwargs)
+
+    def put(self, url: str, upstream: str, **kwargs) -> requests.Response:
+        """Method to send a PUT request"""
+        return self.request("PUT", url, upstream, **kwargs)
+
+    @property
+    def metrics(self) -> dict:
+        """Method to return the latency metrics of each upstream"""
+        with self._lock:
+            metrics = {}
+
+            for upstream, values in self._latency_stats.items():
+                requests_count = values["requests"]
+                average = values["total_seconds"] / requests_count
+                metrics[upstream] = {
+                    "requests": requests_count,
+                    "errors": values["errors"],
+                    "retries": values["retries"],
+                    "average_seconds": round(average, 6),
+                    "max_seconds": round(values["max_seconds"], 6),
+                    "buckets": dict(
+                        zip(
+                            [str(b) for b in self.LATENCY_BUCKETS] + ["+Inf"],
+                            values["buckets"],
+                        )
+                    ),
+                }
+
+            return metrics
@@ -0,0 +1,327 @@
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from threading import Event, Thread
+
+from sqlalchemy.exc import IntegrityError
+
+from database.database import Database
+from database.model.ingestion_job import IngestionJob
+from log.log import Log
+from services.metrics import Metrics
+from services.sales_ingestion import SalesIngestion
+
+
+class IngestionScheduler:
+    """
+    Class to run the sales ingestion in background jobs.
+    Jobs are stored in the database, so any process can report them and
+    the unique running lock allows one running job across processes.
+    A process that does not run jobs, such as a server worker, leaves
+    its jobs pending for the process running the scheduler.
+    """
+
+    RUNNING_LOCK = "ingestion"
+    HISTORY_SIZE = 100
+
+    def __init__(
+        self,
+        database: Database,
+        sales_ingestion: SalesIngestion,
+        log: Log,
+        metrics: Metrics,
+        interval: float,
+        poll_interval: float,
+        job_timeout: float,
+        run_jobs: bool = True,
+    ):
+        self._database = database
+        self._sales_ingestion = sales_ingestion
+        self._log = log
+        self._metrics = metrics
+        self._interval = interval
+        self._poll_interval = poll_interval
+        self._job_timeout = job_timeout
+        self._run_jobs = run_jobs
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ingestion"
+        )
+        self._stop_event = Event()
+        self._thread = None
+
+        metrics.define(
+            "ingestion_jobs_total",
+            Metrics.COUNTER,
+            "Finished ingestion jobs by status.",
+            labels=["status"],
+        )
+        metrics.define(
+            "ingestion_job_duration_seconds",
+            Metrics.HISTOGRAM,
+            "Time to run the ingestion jobs.",
+            buckets=[0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600],
+        )
+        metrics.define(
+            "ingestion_sales_total",
+            Metrics.COUNTER,
+            "Sales of the ingestion jobs by result: "
+            "fetched, added, skipped or unenriched.",
+            labels=["result"],
+        )
+
+    def _record_job(
+        self, status: str, duration: float, summary: dict
+    ) -> None:
+        """Method to export the outcome and counts of a job"""
+        self._metrics.inc("ingestion_jobs_total", (status,))
+        self._metrics.observe("ingestion_job_duration_seconds", duration)
+
+        for result in ["fetched", "added", "skipped", "unenriched"]:
+            self._metrics.inc(
+                "ingestion_sales_total", (result,), summary.get(result, 0)
+            )
+
+    def _format_job(self, job: IngestionJob) -> dict:
+        """Method to format a job as a dict"""
+        if job is None:
+            return None
+
+        return {
+            "job_id": job.job_id,
+            "trigger": job.trigger,
+            "full_sync": job.full_sync,
+            "status": job.status,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "duration_seconds": job.duration_seconds,
+            "summary": (
+                None if job.summary is None else json.loads(job.summary)
+            ),
+            "error": job.error,
+        }
+
+    def _select_job(self, conditions: list, order_by: object = None):
+        """Method to select the first job matching the conditions"""
+        jobs = self._database.select_data_table_condition(
+            table=IngestionJob,
+            conditions=conditions,
+            order_by=order_by,
+            limit=1,
+        )
+
+        return jobs[0] if len(jobs) > 0 else None
+
+    def _release_stale_job(self) -> bool:
+        """Method to fail a running job older than the job timeout"""
+        updated_rows = self._database.update_data_table_condition(
+            table=IngestionJob,
+            conditions=[
+                IngestionJob.running_lock == self.RUNNING_LOCK,
+                IngestionJob.started_at < time.time() - self._job_timeout,
+            ],
+            new_data={
+                IngestionJob.status: "failed",
+                IngestionJob.running_lock: None,
+                IngestionJob.error: "Job abandoned",
+            },
+        )
+
+        return updated_rows > 0
+
+    def _prune_jobs(self) -> None:
+        """Method to delete the finished jobs beyond the history size"""
+        recent_jobs = self._database.select_data_table_condition(
+            table=IngestionJob,
+            conditions=[],
+            order_by=IngestionJob.started_at.desc(),
+            limit=self.HISTORY_SIZE,
+        )
+
+        if len(recent_jobs) < self.HISTORY_SIZE:
+            return
+
+        self._database.delete_data_table_condition(
+            table=IngestionJob,
+            conditions=[
+                IngestionJob.started_at < recent_jobs[-1].started_at,
+                IngestionJob.running_lock.is_(None),
+            ],
+        )
+
+    def _run_job(self, job: IngestionJob) -> None:
+        """Method to run an ingestion job and record its result"""
+        start = time.perf_counter()
+        result = {}
+        summary = {}
+
+        try:
+            summary = self._sales_ingestion.ingest(full_sync=job.full_sync)
+            result = {
+                IngestionJob.status: "succeeded",
+                IngestionJob.summary: json.dumps(summary),
+            }
+        except Exception as error:
+            self._log.add_message(
+                "Ingestion job %s failed: %s",
+                job.job_id,
+                error,
+                level=self._log.ERROR,
+            )
+            result = {
+                IngestionJob.status: "failed",
+                IngestionJob.error: str(error)[:500],
+            }
+        finally:
+            result[IngestionJob.running_lock] = None
+            result[IngestionJob.finished_at] = time.time()
+            result[IngestionJob.duration_seconds] = round(
+                time.perf_counter() - start, 6
+            )
+            self._record_job(
+                result[IngestionJob.status],
+                result[IngestionJob.duration_seconds],
+                summary,
+            )
+
+            self._database.update_data_table(
+                table=IngestionJob,
+                filter_update={IngestionJob.job_id: job.job_id},
+                new_data=result,
+            )
+
+    def _run_pending_jobs(self) -> None:
+        """Method to claim and run the jobs left pending by other processes"""
+        pending_jobs = self._database.select_data_table_condition(
+            table=IngestionJob,
+            conditions=[IngestionJob.status == "pending"],
+            order_by=IngestionJob.started_at,
+        )
+
+        for job in pending_jobs:
+            claimed_rows = self._database.update_data_table_condition(
+                table=IngestionJob,
+                conditions=[
+                    IngestionJob.job_id == job.job_id,
+                    IngestionJob.status == "pending",
+                ],
+                new_data={
+                    IngestionJob.status: "running",
+                    IngestionJob.started_at: time.time(),
+                },
+            )
+
+            if claimed_rows > 0:
+                self._executor.submit(self._run_job, job)
+
+    def _run(self) -> None:
+        """
+        Method to run the pending jobs at every poll interval and
+        trigger an ingestion at every interval, when configured.
+        """
+        last_schedule = time.monotonic()
+
+        while not self._stop_event.wait(self._poll_interval):
+            try:
+                self._run_pending_jobs()
+
+                elapsed = time.monotonic() - last_schedule
+
+                if self._interval > 0 and elapsed >= self._interval:
+                    last_schedule = time.monotonic()
+                    self.trigger(trigger="schedule")
+            except Exception as error:
+                self._log.add_message(
+                    "Ingestion scheduler error: %s",
+                    error,
+                    level=self._log.ERROR,
+                )
+
+    def start(self) -> None:
+        """Method to start running the pending and periodic jobs"""
+        if self._thread is not None or not self._run_jobs:
+            return
+
+        self._stop_event.clear()
+        self._thread = Thread(
+            target=self._run, name="ingestion-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Method to stop the periodic ingestion and wait for its job"""
+        self._stop_event.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        self._executor.shutdown(wait=True)
+
+    def trigger(self, trigger: str, full_sync: bool = False) -> tuple:
+        """
+        Method to start an ingestion job, or to leave it pending when
+        this process does not run jobs.
+        Returns the job and whether it was started now, since a job
+        already pending or running is returned instead of another one.
+        """
+        status = "running" if self._run_jobs else "pending"
+
+        for _ in range(3):
+            job = IngestionJob(
+                job_id=uuid.uuid4().hex,
+                trigger=trigger,
+                full_sync=full_sync,
+                running_lock=self.RUNNING_LOCK,
+                status=status,
+            )
+
+            try:
+                self._database.insert_data_table(job)
+            except IntegrityError:
+                if self._release_stale_job():
+                    continue
+
+                running_job = self._select_job(
+                    [IngestionJob.running_lock == self.RUNNING_LOCK]
+                )
+
+                if running_job is None:
+                    continue
+
+                return self._format_job(running_job), False
+
+            if self._run_jobs:
+                self._executor.submit(
+                    copy_context().run, self._run_job, job
+                )
+
+            self._prune_jobs()
+
+            return self._format_job(job), True
+
+        raise Exception("The ingestion job could not be started")
+
+    def get_job(self, job_id: str) -> dict:
+        """Method to return a recent job, if it exists"""
+        job = self._select_job([IngestionJob.job_id == job_id])
+
+        return self._format_job(job)
+
+    @property
+    def status(self) -> dict:
+        """Method to return the running and the last finished jobs"""
+        running_job = self._select_job(
+            [IngestionJob.running_lock == self.RUNNING_LOCK]
+        )
+        last_job = self._select_job(
+            [IngestionJob.finished_at.isnot(None)],
+            order_by=IngestionJob.finished_at.desc(),
+        )
+
+        return {
+            "interval_seconds": self._interval,
+            "running": self._format_job(running_job),
+            "last_run": self._format_job(last_job),
+        }
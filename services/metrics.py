@@ -0,0 +1,316 @@
+import glob
+import json
+import os
+from bisect import bisect_left
+from threading import Event, Lock, Thread
+
+
+class Metrics:
+    """
+    Class to collect counters and histograms and render them
+    in the Prometheus text format.
+
+    Each process keeps its own values. When a directory is configured,
+    every process writes a snapshot of its values there at an interval
+    and the rendered metrics add up the snapshots of the others,
+    so any worker reports the totals of the whole service.
+    """
+
+    COUNTER = "counter"
+    GAUGE = "gauge"
+    HISTOGRAM = "histogram"
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+    DEFAULT_BUCKETS = [
+        0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5
+    ]
+
+    def __init__(self, directory: str = "", flush_interval: float = 5):
+        self._directory = directory
+        self._flush_interval = flush_interval
+        self._definitions = {}
+        self._ratios = {}
+        self._collectors = []
+        self._values = {}
+        self._lock = Lock()
+        self._stop_event = Event()
+        self._thread = None
+        self._pid = None
+
+    def _get_snapshot_path(self, pid: int) -> str:
+        """Method to return the snapshot file of a process"""
+        return os.path.join(self._directory, f"metrics-{pid}.json")
+
+    def _collect(self) -> dict:
+        """
+        Method to copy the values of the process, including the
+        counters read from the collectors.
+        """
+        with self._lock:
+            values = {
+                key: [list(value[0]), value[1], value[2]]
+                if isinstance(value, list) else value
+                for key, value in self._values.items()
+            }
+
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                key = (name, tuple(str(label) for label in labels))
+                values[key] = values.get(key, 0) + value
+
+        return values
+
+    def _merge(self, values: dict, other_values: list) -> None:
+        """Method to add the values of a snapshot to the given values"""
+        for name, labels, value in other_values:
+            if name not in self._definitions:
+                continue
+
+            key = (name, tuple(labels))
+            current = values.get(key)
+
+            if not isinstance(value, list):
+                values[key] = (current or 0) + value
+            elif current is None:
+                values[key] = value
+            else:
+                current[0] = [
+                    count + other
+                    for count, other in zip(current[0], value[0])
+                ]
+                current[1] += value[1]
+                current[2] += value[2]
+
+    def _read_snapshots(self, values: dict) -> None:
+        """Method to add the snapshots of the other processes"""
+        if not self._directory or not os.path.isdir(self._directory):
+            return
+
+        own_path = self._get_snapshot_path(os.getpid())
+
+        for path in glob.glob(self._get_snapshot_path("*")):
+            if path == own_path:
+                continue
+
+            try:
+                with open(path, encoding="utf-8") as snapshot:
+                    self._merge(values, json.load(snapshot))
+            except (OSError, ValueError):
+                continue
+
+    def _escape(self, value) -> str:
+        """Method to escape a label value"""
+        return (
+            str(value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n")
+        )
+
+    def _format_labels(
+        self, name: str, labels: tuple, extra: str = ""
+    ) -> str:
+        """Method to format the labels of a sample"""
+        label_names = self._definitions[name]["labels"]
+        pairs = [
+            f'{label_name}="{self._escape(value)}"'
+            for label_name, value in zip(label_names, labels)
+        ]
+
+        if extra:
+            pairs.append(extra)
+
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _render_ratio(self, name: str, values: dict) -> list:
+        """Method to render a ratio between the samples of a counter"""
+        counter_name, label_value = self._ratios[name]
+        total = 0
+        selected = 0
+
+        for (sample_name, labels), value in values.items():
+            if sample_name == counter_name:
+                total += value
+                selected += value if label_value in labels else 0
+
+        return [f"{name} {selected / total if total else 0.0}"]
+
+    def _render_metric(self, name: str, values: dict) -> list:
+        """Method to render the samples of a metric"""
+        definition = self._definitions[name]
+
+        if name in self._ratios:
+            return self._render_ratio(name, values)
+
+        lines = []
+        samples = sorted(
+            (
+                (labels, value) for (sample_name, labels), value
+                in values.items() if sample_name == name
+            ),
+            key=lambda sample: [str(label) for label in sample[0]],
+        )
+
+        for labels, value in samples:
+            if definition["kind"] != self.HISTOGRAM:
+                lines.append(f"{name}{self._format_labels(name, labels)} "
+                             f"{value}")
+                continue
+
+            bucket_counts, total, count = value
+            cumulative = 0
+
+            for bound, bucket_count in zip(
+                definition["buckets"] + ["+Inf"], bucket_counts
+            ):
+                cumulative += bucket_count
+                bucket_labels = self._format_labels(
+                    name, labels, f'le="{bound}"'
+                )
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+
+            lines.append(f"{name}_sum{self._format_labels(name, labels)} "
+                         f"{total}")
+            lines.append(f"{name}_count{self._format_labels(name, labels)} "
+                         f"{count}")
+
+        return lines
+
+    def _write_snapshot(self) -> None:
+        """Method to write the values of the process to its snapshot"""
+        values = self._collect()
+        snapshot_path = self._get_snapshot_path(os.getpid())
+        temporary_path = f"{snapshot_path}.tmp"
+
+        with open(temporary_path, "w", encoding="utf-8") as snapshot:
+            json.dump(
+                [[name, labels, value]
+                 for (name, labels), value in values.items()],
+                snapshot,
+            )
+
+        os.replace(temporary_path, snapshot_path)
+
+    def _run(self) -> None:
+        """Method to write the snapshot at every interval"""
+        while not self._stop_event.wait(self._flush_interval):
+            try:
+                self._write_snapshot()
+            except OSError:
+                continue
+
+    def define(
+        self,
+        name: str,
+        kind: str,
+        documentation: str,
+        labels: list = None,
+        buckets: list = None,
+    ) -> None:
+        """Method to declare a metric, once for every name"""
+        with self._lock:
+            self._definitions.setdefault(
+                name,
+                {
+                    "kind": kind,
+                    "documentation": documentation,
+                    "labels": list(labels or []),
+                    "buckets": list(buckets or self.DEFAULT_BUCKETS),
+                },
+            )
+
+    def define_ratio(
+        self,
+        name: str,
+        documentation: str,
+        counter_name: str,
+        label_value: str,
+    ) -> None:
+        """
+        Method to declare a gauge with the share of a counter whose
+        samples have the label value, computed when rendered.
+        """
+        self.define(name, self.GAUGE, documentation)
+        self._ratios[name] = (counter_name, label_value)
+
+    def add_collector(self, collector) -> None:
+        """
+        Method to add a function returning (name, labels, value) tuples
+        of counters kept elsewhere, read when the metrics are exported.
+        """
+        self._collectors.append(collector)
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1) -> None:
+        """Method to increase a counter"""
+        key = (name, labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: tuple = ()) -> None:
+        """Method to add an observation to a histogram"""
+        buckets = self._definitions[name]["buckets"]
+        position = bisect_left(buckets, value)
+        key = (name, labels)
+
+        with self._lock:
+            histogram = self._values.get(key)
+
+            if histogram is None:
+                histogram = [[0] * (len(buckets) + 1), 0.0, 0]
+                self._values[key] = histogram
+
+            histogram[0][position] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def clear_directory(self) -> None:
+        """Method to delete the snapshots of previous runs"""
+        if not self._directory:
+            return
+
+        if not os.path.isdir(self._directory):
+            os.makedirs(self._directory)
+
+        for path in glob.glob(self._get_snapshot_path("*")):
+            os.remove(path)
+
+    def start(self) -> None:
+        """Method to start writing the snapshots, when configured"""
+        if not self._directory or self._pid == os.getpid():
+            return
+
+        self._stop_event.clear()
+        self._thread = Thread(
+            target=self._run, name="metrics-snapshot", daemon=True
+        )
+        self._thread.start()
+        self._pid = os.getpid()
+
+    def stop(self) -> None:
+        """Method to stop writing the snapshots, writing the last one"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._pid = None
+
+        try:
+            self._write_snapshot()
+        except OSError:
+            pass
+
+    def render(self) -> str:
+        """Method to render the metrics in the Prometheus text format"""
+        values = self._collect()
+        self._read_snapshots(values)
+        lines = []
+
+        for name in sorted(self._definitions):
+            definition = self._definitions[name]
+            lines.append(f"# HELP {name} {definition['documentation']}")
+            lines.append(f"# TYPE {name} {definition['kind']}")
+            lines.extend(self._render_metric(name, values))
+
+        return "\n".join(lines) + "\n"
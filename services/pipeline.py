@@ -0,0 +1,136 @@
+from contextvars import copy_context
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+
+
+class Pipeline:
+    """
+    Class to run processing stages in threads linked by bounded queues.
+    Each stage receives one item and returns the next one, or None to
+    drop it, so a stage can be tested on its own as a plain function.
+    """
+
+    _END = object()
+    _TIMEOUT = 0.1
+
+    def __init__(self, stages: list, queue_size: int):
+        self._stages = stages
+        self._queue_size = queue_size
+
+    def _put(self, queue: Queue, item, stop_event: Event) -> bool:
+        """Method to put an item in a queue until the pipeline stops"""
+        while not stop_event.is_set():
+            try:
+                queue.put(item, timeout=self._TIMEOUT)
+                return True
+            except Full:
+                continue
+
+        return False
+
+    def _get(self, queue: Queue, stop_event: Event):
+        """Method to get an item from a queue until the pipeline stops"""
+        while not stop_event.is_set():
+            try:
+                return queue.get(timeout=self._TIMEOUT)
+            except Empty:
+                continue
+
+        return self._END
+
+    def _feed(
+        self, source, output_queue: Queue, stop_event: Event, errors: list
+    ) -> None:
+        """Method to put the source items in the first queue"""
+        try:
+            for item in source:
+                if not self._put(output_queue, item, stop_event):
+                    return
+        except Exception as error:
+            errors.append(error)
+            stop_event.set()
+        finally:
+            self._put(output_queue, self._END, stop_event)
+
+    def _run_stage(
+        self,
+        stage,
+        input_queue: Queue,
+        output_queue: Queue,
+        stop_event: Event,
+        errors: list,
+    ) -> None:
+        """Method to apply a stage to every item of its input queue"""
+        try:
+            while True:
+                item = self._get(input_queue, stop_event)
+
+                if item is self._END:
+                    break
+
+                result = stage(item)
+
+                if result is not None:
+                    if not self._put(output_queue, result, stop_event):
+                        return
+        except Exception as error:
+            errors.append(error)
+            stop_event.set()
+        finally:
+            self._put(output_queue, self._END, stop_event)
+
+    def run(self, source):
+        """
+        Method to iterate over the results of the last stage.
+        The threads run in copies of the caller context, so the stages
+        log with its request id.
+        """
+        queues = [
+            Queue(maxsize=self._queue_size)
+            for _ in range(len(self._stages) + 1)
+        ]
+        stop_event = Event()
+        errors = []
+        threads = [
+            Thread(
+                target=copy_context().run,
+                args=(self._feed, source, queues[0], stop_event, errors),
+                daemon=True,
+            )
+        ]
+
+        for index, stage in enumerate(self._stages):
+            threads.append(
+                Thread(
+                    target=copy_context().run,
+                    args=(
+                        self._run_stage,
+                        stage,
+                        queues[index],
+                        queues[index + 1],
+                        stop_event,
+                        errors,
+                    ),
+                    daemon=True,
+                )
+            )
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self._get(queues[-1], stop_event)
+
+                if item is self._END:
+                    break
+
+                yield item
+        finally:
+            stop_event.set()
+
+            for thread in threads:
+                thread.join()
+
+        if len(errors) > 0:
+            raise errors[0]
@@ -0,0 +1,196 @@
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from log.log import Log
+
+
+class QueryCache:
+    """
+    Class to cache serialized query results under table versions.
+
+    Every key embeds the versions of the tables it reads, so bumping
+    a version on write makes the older results unreachable without
+    deleting them. The entries live in memory, or in Redis when a
+    Redis URL is configured, sharing them between processes.
+    When Redis fails to bump a version, the process bumps its own,
+    so at least its next reads miss the older results.
+    """
+
+    MISS = object()
+    KEY_PREFIX = "order-management:query-cache"
+
+    def __init__(
+        self, ttl: int, max_size: int, log: Log, redis_url: str = ""
+    ):
+        self._ttl = ttl
+        self._log = log
+        self._max_size = max_size
+        self._redis_url = redis_url
+        self._redis = None
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def _get_etag(self, body: str) -> str:
+        """Method to create the unquoted ETag of a serialized body"""
+        return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+    def _count(self, hit: bool) -> None:
+        """Method to count a lookup as a hit or as a miss"""
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def _bump_local_versions(self, tables: set) -> None:
+        """Method to bump the versions of the tables kept in memory"""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def start_cache(self) -> None:
+        """Method to connect to Redis, when configured"""
+        if not self._redis_url:
+            return
+
+        import redis
+
+        self._redis = redis.Redis.from_url(self._redis_url)
+        self._redis.ping()
+
+    def get_versions(self, tables: list) -> str:
+        """Method to return the current versions of the tables"""
+        if self._redis is not None:
+            versions = self._redis.mget(
+                [f"{self.KEY_PREFIX}:version:{table}" for table in tables]
+            )
+
+            with self._lock:
+                local_versions = [
+                    self._versions.get(table, 0) for table in tables
+                ]
+
+            return ".".join(
+                (version or b"0").decode("utf-8")
+                + (f"-{local_version}" if local_version else "")
+                for version, local_version in zip(versions, local_versions)
+            )
+
+        with self._lock:
+            return ".".join(
+                str(self._versions.get(table, 0)) for table in tables
+            )
+
+    def make_key(self, name: str, tables: list, parameters: str) -> str:
+        """
+        Method to create the key of a query result,
+        valid until one of the tables it reads is written.
+        """
+        versions = self.get_versions(tables)
+
+        return f"{self.KEY_PREFIX}:{name}:{versions}:{parameters}"
+
+    def get(self, key: str):
+        """
+        Method to get the ETag and body of a cached query result.
+        Returns MISS when it is unknown or expired.
+        """
+        if self._redis is not None:
+            body = self._redis.get(key)
+            self._count(body is not None)
+
+            if body is None:
+                return self.MISS
+
+            body = body.decode("utf-8")
+
+            return self._get_etag(body), body
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[2] <= time.time():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self._misses += 1
+
+                return self.MISS
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+            return entry[0], entry[1]
+
+    def set(self, key: str, body: str) -> tuple:
+        """Method to cache a serialized query result, returning its ETag"""
+        etag = self._get_etag(body)
+
+        if self._redis is not None:
+            self._redis.set(key, body, ex=self._ttl)
+
+            return etag, body
+
+        with self._lock:
+            self._entries[key] = (etag, body, time.time() + self._ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+        return etag, body
+
+    def invalidate(self, tables: set) -> None:
+        """
+        Method to bump the versions of the written tables.
+        A Redis error is logged and the local versions are bumped instead,
+        as the writes are already committed.
+        """
+        if len(tables) == 0:
+            return
+
+        if self._redis is None:
+            self._bump_local_versions(tables)
+        else:
+            try:
+                pipeline = self._redis.pipeline()
+
+                for table in tables:
+                    pipeline.incr(f"{self.KEY_PREFIX}:version:{table}")
+
+                pipeline.execute()
+            except Exception as error:
+                self._log.add_message(
+                    "Query cache invalidation of %s failed: %s",
+                    ", ".join(sorted(tables)),
+                    error,
+                    level=self._log.WARNING,
+                )
+                self._bump_local_versions(tables)
+
+        with self._lock:
+            self._invalidations += 1
+
+    @property
+    def stats(self) -> dict:
+        """Method to return the cache counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            hit_ratio = self._hits / lookups if lookups else 0.0
+
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "hit_ratio": round(hit_ratio, 4),
+                "redis": self._redis is not None,
+            }
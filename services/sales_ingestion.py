@@ -0,0 +1,389 @@
+import time
+
+from database.database import Database
+from database.model.close_sale_outbox import CloseSaleOutbox
+from database.model.ingestion_watermark import IngestionWatermark
+from database.model.orders import Orders
+from log.log import Log
+from services.address_enrichment import AddressEnrichment
+from services.async_http_client import AsyncHttpClient
+from services.close_sale_dispatcher import CloseSaleDispatcher
+from services.http_client import HttpClient
+from services.pipeline import Pipeline
+from services.single_flight import SingleFlight
+
+
+class SalesIngestion:
+    """Class to ingest the open sales of the online store as orders"""
+
+    GET_SALES_URL = "http://online-store-microservice:5000/get_sales"
+    WATERMARK_NAME = "online_store_sales"
+    ORDER_COLUMNS = [
+        "name",
+        "price",
+        "supplier",
+        "category",
+        "description",
+        "sales_id",
+        "quantity",
+        "value",
+        "sale_date",
+        "zip_code",
+        "country",
+        "city",
+        "state",
+        "street",
+        "neighborhood",
+        "address_status",
+    ]
+
+    def __init__(
+        self,
+        database: Database,
+        log: Log,
+        http_client: HttpClient,
+        async_http_client: AsyncHttpClient,
+        address_enrichment: AddressEnrichment,
+        close_sale_dispatcher: CloseSaleDispatcher,
+        single_flight: SingleFlight,
+        batch_size: int,
+        queue_size: int,
+    ):
+        self._database = database
+        self._log = log
+        self._http_client = http_client
+        self._async_http_client = async_http_client
+        self._address_enrichment = address_enrichment
+        self._close_sale_dispatcher = close_sale_dispatcher
+        self._single_flight = single_flight
+        self._batch_size = batch_size
+        self._queue_size = queue_size
+
+    def _build_order(self, sale: dict) -> dict:
+        """Method to create the order row of a sale"""
+        new_order = {
+            column: sale.get(column, "") for column in self.ORDER_COLUMNS
+        }
+
+        return new_order
+
+    def get_watermark(self) -> IngestionWatermark:
+        """Method to get the persisted watermark, if any"""
+        watermarks = self._database.select_data_table(
+            table=IngestionWatermark,
+            filter_select={IngestionWatermark.name: self.WATERMARK_NAME},
+        )
+
+        return watermarks[0] if len(watermarks) > 0 else None
+
+    def _get_sales_params(self, after_sales_id: int = None) -> dict:
+        """Method to create the query parameters of the get_sales call"""
+        params = {}
+
+        if after_sales_id is not None:
+            params["after_sales_id"] = after_sales_id
+
+        return params
+
+    def _read_sales(
+        self, response_get_sales, after_sales_id: int = None
+    ) -> list:
+        """Method to get the sales after the given id of a response"""
+        response_sales_data = response_get_sales.json()
+
+        if response_get_sales.status_code == 400:
+            raise Exception(
+                response_sales_data["message"].replace("Error: ", "")
+            )
+
+        sales_data = response_sales_data.get("sales", [])
+
+        if after_sales_id is not None:
+            sales_data = [
+                sale for sale in sales_data
+                if int(sale["sales_id"]) > after_sales_id
+            ]
+
+        return sales_data
+
+    def fetch_sales(self, after_sales_id: int = None) -> list:
+        """
+        Method to get the open sales of the online store.
+        Only sales after the given id are requested and kept.
+        Concurrent fetches after the same id share one upstream call.
+        """
+        response_get_sales = self._single_flight.do(
+            str(after_sales_id),
+            self._http_client.get,
+            self.GET_SALES_URL,
+            upstream="get_sales",
+            params=self._get_sales_params(after_sales_id),
+        )
+
+        return self._read_sales(response_get_sales, after_sales_id)
+
+    async def fetch_sales_async(self, after_sales_id: int = None) -> list:
+        """Method to get the open sales of the online store on the loop"""
+        response_get_sales = await self._single_flight.do_async(
+            str(after_sales_id),
+            self._async_http_client.get,
+            self.GET_SALES_URL,
+            upstream="get_sales",
+            params=self._get_sales_params(after_sales_id),
+        )
+
+        return self._read_sales(response_get_sales, after_sales_id)
+
+    def iter_sale_batches(self, sales_data: list, stored_sales_id=None):
+        """Method to split the sales in batches for the pipeline stages"""
+        for start in range(0, len(sales_data), self._batch_size):
+            sales = sales_data[start:start + self._batch_size]
+            last_sale = max(sales, key=lambda sale: int(sale["sales_id"]))
+
+            yield {
+                "sales": sales,
+                "fetched": len(sales),
+                "last_sale": last_sale,
+                "stored_sales_id": stored_sales_id,
+            }
+
+    def filter_new_sales(self, batch: dict) -> dict:
+        """Stage to drop the sales of a batch that were already added"""
+        sales_ids = [int(sale["sales_id"]) for sale in batch["sales"]]
+        registered_sales = self._database.select_existing_values(
+            column=Orders.sales_id, values=sales_ids
+        )
+        batch["sales"] = [
+            sale for sale in batch["sales"]
+            if int(sale["sales_id"]) not in registered_sales
+        ]
+
+        return batch
+
+    def enrich_batch(self, batch: dict) -> dict:
+        """Stage to fill in the empty addresses of a batch"""
+        self._address_enrichment.enrich_sales(batch["sales"])
+
+        return batch
+
+    def _is_unenriched(self, sale: dict) -> bool:
+        """Method to check if the zip code of a sale could not be queried"""
+        return (
+            sale.get(AddressEnrichment.ADDRESS_STATUS)
+            == AddressEnrichment.UNENRICHED
+        )
+
+    def _build_outbox_entries(self, sales: list) -> list:
+        """
+        Method to create the close sale outbox rows of the sales.
+        Unenriched sales are only closed once they are enriched.
+        """
+        return [
+            {
+                "sales_id": int(sale["sales_id"]),
+                "next_attempt_at": time.time(),
+            }
+            for sale in sales if not self._is_unenriched(sale)
+        ]
+
+    def persist_batch(self, batch: dict) -> dict:
+        """
+        Stage to add the orders and outbox entries of a batch
+        and advance the watermark in the same transaction.
+        Sales added meanwhile by another ingestion are skipped.
+        """
+        new_orders = [self._build_order(sale) for sale in batch["sales"]]
+        sales_ids = [int(sale["sales_id"]) for sale in batch["sales"]]
+        outbox_entries = self._build_outbox_entries(batch["sales"])
+        last_sale = batch["last_sale"]
+        last_sales_id = int(last_sale["sales_id"])
+        stored_sales_id = batch["stored_sales_id"]
+
+        with self._database.unit_of_work():
+            order_ids = self._database.insert_ignore_returning(
+                Orders, new_orders, column=Orders.order_id
+            )
+            self._database.insert_ignore(CloseSaleOutbox, outbox_entries)
+
+            if stored_sales_id is None or last_sales_id > stored_sales_id:
+                self._database.upsert(
+                    IngestionWatermark,
+                    row={
+                        "name": self.WATERMARK_NAME,
+                        "last_sales_id": last_sales_id,
+                        "last_sale_date": last_sale.get("sale_date", ""),
+                        "updated_at": time.time(),
+                    },
+                    index_elements=["name"],
+                )
+
+        if len(order_ids) > 0:
+            self._close_sale_dispatcher.wake()
+
+        unenriched = [
+            sale for sale in batch["sales"] if self._is_unenriched(sale)
+        ]
+
+        return {
+            "fetched": batch["fetched"],
+            "added": len(order_ids),
+            "unenriched": len(unenriched),
+            "first_sales_id": min(sales_ids, default=None),
+            "last_sales_id": max(sales_ids, default=None),
+            "first_order_id": min(order_ids, default=None),
+            "last_order_id": max(order_ids, default=None),
+        }
+
+    def iter_enriched_batches(self, sales_data: list):
+        """Method to enrich the sales in batches while they are consumed"""
+        pipeline = Pipeline(
+            stages=[self.enrich_batch], queue_size=self._queue_size
+        )
+
+        return pipeline.run(self.iter_sale_batches(sales_data))
+
+    def reenrich_orders(self) -> dict:
+        """
+        Method to query again the zip codes of the unenriched orders.
+        The enriched orders get their address and their close sale
+        outbox entry in one transaction per batch.
+        Returns the counts of enriched and still unenriched orders.
+        """
+        columns = [Orders.order_id] + [
+            getattr(Orders, column) for column in self.ORDER_COLUMNS
+        ]
+        column_names = [column.key for column in columns]
+        results = {"reenriched": 0, "unenriched": 0}
+        last_order_id = 0
+
+        while True:
+            rows = self._database.select_columns_condition(
+                columns=columns,
+                conditions=[
+                    Orders.address_status == AddressEnrichment.UNENRICHED,
+                    Orders.order_id > last_order_id,
+                ],
+                order_by=Orders.order_id,
+                limit=self._batch_size,
+            )
+
+            if len(rows) == 0:
+                break
+
+            orders = [dict(zip(column_names, row)) for row in rows]
+            last_order_id = orders[-1]["order_id"]
+
+            for order in orders:
+                order[AddressEnrichment.ADDRESS_STATUS] = ""
+
+            self._address_enrichment.enrich_sales(orders)
+            enriched_orders = [
+                order for order in orders if not self._is_unenriched(order)
+            ]
+
+            with self._database.unit_of_work():
+                for order in enriched_orders:
+                    self._database.update_data_table(
+                        table=Orders,
+                        filter_update={Orders.order_id: order["order_id"]},
+                        new_data={
+                            getattr(Orders, column): order[column]
+                            for column in [
+                                *AddressEnrichment.ADDRESS_COLUMNS,
+                                AddressEnrichment.ADDRESS_STATUS,
+                            ]
+                        },
+                    )
+
+                self._database.insert_ignore(
+                    CloseSaleOutbox,
+                    self._build_outbox_entries(enriched_orders),
+                )
+
+            results["reenriched"] += len(enriched_orders)
+            results["unenriched"] += len(orders) - len(enriched_orders)
+
+        if results["reenriched"] > 0:
+            self._log.add_message(
+                f"{results['reenriched']} unenriched orders enriched"
+            )
+            self._close_sale_dispatcher.wake()
+
+        return results
+
+    def ingest(self, full_sync: bool = False) -> dict:
+        """
+        Method to add the sales after the watermark as orders,
+        after enriching again the orders left unenriched before.
+        A full sync ignores the watermark, but already added sales
+        are always skipped. Returns the counts and id ranges added.
+        """
+        reenrichment = self.reenrich_orders()
+        watermark = self.get_watermark()
+        stored_sales_id = None
+
+        if watermark is not None:
+            stored_sales_id = watermark.last_sales_id
+
+        after_sales_id = None if full_sync else stored_sales_id
+
+        self._log.add_message(
+            f"Accessing Online Store container to get sales "
+            f"after {after_sales_id}"
+        )
+
+        sales_data = self.fetch_sales(after_sales_id)
+        sales_data.sort(key=lambda sale: int(sale["sales_id"]))
+
+        self._log.add_message(f"{len(sales_data)} sales achieved")
+
+        pipeline = Pipeline(
+            stages=[
+                self.filter_new_sales,
+                self.enrich_batch,
+                self.persist_batch,
+            ],
+            queue_size=self._queue_size,
+        )
+        summary = {
+            "fetched": 0,
+            "added": 0,
+            "skipped": 0,
+            "unenriched": 0,
+            "reenriched": reenrichment["reenriched"],
+            "batches": 0,
+            "first_sales_id": None,
+            "last_sales_id": None,
+            "first_order_id": None,
+            "last_order_id": None,
+        }
+        batches = self.iter_sale_batches(sales_data, stored_sales_id)
+
+        for batch_summary in pipeline.run(batches):
+            summary["batches"] += 1
+            summary["fetched"] += batch_summary["fetched"]
+            summary["added"] += batch_summary["added"]
+            summary["unenriched"] += batch_summary["unenriched"]
+
+            for key in ["first_sales_id", "first_order_id"]:
+                values = [summary[key], batch_summary[key]]
+                summary[key] = min(
+                    [value for value in values if value is not None],
+                    default=None,
+                )
+
+            for key in ["last_sales_id", "last_order_id"]:
+                values = [summary[key], batch_summary[key]]
+                summary[key] = max(
+                    [value for value in values if value is not None],
+                    default=None,
+                )
+
+        summary["skipped"] = summary["fetched"] - summary["added"]
+
+        self._log.add_message(
+            f"{summary['added']} orders added, "
+            f"{summary['skipped']} sales already added"
+        )
+
+        return summary
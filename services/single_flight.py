@@ -0,0 +1,79 @@
+import asyncio
+from concurrent.futures import Future
+from threading import Lock
+
+
+class SingleFlight:
+    """Class to share one in-flight call between concurrent identical calls"""
+
+    def __init__(self):
+        self._calls = {}
+        self._async_calls = {}
+        self._counters = {"calls": 0, "shared": 0}
+        self._lock = Lock()
+
+    def _count(self, shared: bool) -> None:
+        """Method to count a call as started or as shared"""
+        self._counters["shared" if shared else "calls"] += 1
+
+    def _remove_async_call(self, key: str, task: asyncio.Task) -> None:
+        """Method to forget a finished async call"""
+        with self._lock:
+            if self._async_calls.get(key) is task:
+                del self._async_calls[key]
+
+    def do(self, key: str, func, *args, **kwargs):
+        """
+        Method to run the function once for concurrent calls of a key.
+        The callers that arrive while it runs wait for the same result
+        or error instead of calling it again.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            shared = future is not None
+
+            if not shared:
+                future = Future()
+                self._calls[key] = future
+
+            self._count(shared)
+
+        if shared:
+            return future.result()
+
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as error:
+            future.set_exception(error)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        return future.result()
+
+    async def do_async(self, key: str, func, *args, **kwargs):
+        """
+        Method to await the coroutine function once for concurrent calls
+        of a key on the event loop. A caller that is cancelled does not
+        cancel the call shared with the others.
+        """
+        with self._lock:
+            task = self._async_calls.get(key)
+            shared = task is not None
+
+            if not shared:
+                task = asyncio.ensure_future(func(*args, **kwargs))
+                self._async_calls[key] = task
+                task.add_done_callback(
+                    lambda done_task: self._remove_async_call(key, done_task)
+                )
+
+            self._count(shared)
+
+        return await asyncio.shield(task)
+
+    @property
+    def stats(self) -> dict:
+        """Method to return the started and shared call counters"""
+        with self._lock:
+            return dict(self._counters)
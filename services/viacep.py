@@ -0,0 +1,151 @@
+import asyncio
+
+from services.async_http_client import AsyncHttpClient
+from services.cep_cache import CepCache
+from services.cep_dataset import CepDataset
+from services.circuit_breaker import CircuitOpenError
+from services.http_client import HttpClient
+from services.single_flight import SingleFlight
+
+
+class ZipCodeNotFoundError(Exception):
+    """Exception raised when ViaCep does not know a zip code"""
+
+
+class ViaCep:
+    """Class to query the ViaCep external API"""
+
+    URL = "https://viacep.com.br/ws/{zip_code}/json/"
+
+    def __init__(
+        self,
+        cache: CepCache,
+        dataset: CepDataset,
+        http_client: HttpClient,
+        async_http_client: AsyncHttpClient,
+        single_flight: SingleFlight,
+    ):
+        self._cache = cache
+        self._dataset = dataset
+        self._http_client = http_client
+        self._async_http_client = async_http_client
+        self._single_flight = single_flight
+
+    @property
+    def cache(self) -> CepCache:
+        """Method to return the zip code cache"""
+        return self._cache
+
+    @property
+    def dataset(self) -> CepDataset:
+        """Method to return the local zip code dataset"""
+        return self._dataset
+
+    def _normalize_zip_code(self, zip_code: str) -> str:
+        """
+        Method to keep only the digits of a zip code, so its formats
+        share the cache, dataset and in-flight lookups.
+        """
+        return "".join(char for char in str(zip_code) if char.isdigit())
+
+    def _read_cache(self, zip_code: str):
+        """
+        Method to get the local dataset or cached data of a zip code,
+        if any. The dataset is checked first as it needs no network.
+        """
+        local_data = self._dataset.get(zip_code)
+
+        if local_data is not None:
+            return local_data
+
+        cached_data = self._cache.get(zip_code)
+
+        if cached_data is None:
+            raise ZipCodeNotFoundError("Zip code not found")
+
+        if cached_data is not CepCache.MISS:
+            return dict(cached_data)
+
+        return CepCache.MISS
+
+    def _read_response(self, zip_code: str, response) -> dict:
+        """Method to cache and return the address data of a response"""
+        if response.status_code != 200:
+            raise Exception("Error when querying the Via Cep API")
+
+        data = response.json()
+
+        if data.get("erro"):
+            self._cache.set(zip_code, None)
+            raise ZipCodeNotFoundError("Zip code not found")
+
+        self._cache.set(zip_code, data)
+
+        return dict(data)
+
+    def _read_stale_cache(
+        self, zip_code: str, error: CircuitOpenError
+    ) -> dict:
+        """
+        Method to get the expired cached data of a zip code,
+        raising the circuit error when there is none.
+        """
+        stale_data = self._cache.get_stale(zip_code)
+
+        if stale_data is CepCache.MISS:
+            raise error
+
+        if stale_data is None:
+            raise ZipCodeNotFoundError("Zip code not found")
+
+        return dict(stale_data)
+
+    def query_zip_code(self, zip_code: str) -> dict:
+        """
+        Method to get the address data of a zip code.
+        While the ViaCep circuit is open, expired cached data is used.
+        """
+        zip_code = self._normalize_zip_code(zip_code)
+        cached_data = self._read_cache(zip_code)
+
+        if cached_data is not CepCache.MISS:
+            return cached_data
+
+        try:
+            response = self._single_flight.do(
+                zip_code,
+                self._http_client.get,
+                self.URL.format(zip_code=zip_code),
+                upstream="viacep",
+            )
+        except CircuitOpenError as error:
+            return self._read_stale_cache(zip_code, error)
+
+        return self._read_response(zip_code, response)
+
+    async def query_zip_code_async(self, zip_code: str) -> dict:
+        """
+        Method to get the address data of a zip code on the event loop.
+        The cache lookups run in a thread as they may read from disk.
+        """
+        zip_code = self._normalize_zip_code(zip_code)
+        cached_data = await asyncio.to_thread(self._read_cache, zip_code)
+
+        if cached_data is not CepCache.MISS:
+            return cached_data
+
+        try:
+            response = await self._single_flight.do_async(
+                zip_code,
+                self._async_http_client.get,
+                self.URL.format(zip_code=zip_code),
+                upstream="viacep",
+            )
+        except CircuitOpenError as error:
+            return await asyncio.to_thread(
+                self._read_stale_cache, zip_code, error
+            )
+
+        return await asyncio.to_thread(
+            self._read_response, zip_code, response
+        )
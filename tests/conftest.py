@@ -0,0 +1,91 @@
+import os
+import tempfile
+
+import pytest
+
+TEST_DIRECTORY = tempfile.mkdtemp(prefix="order-management-tests-")
+TEST_ENVIRONMENT = {
+    "API_TITLE": "Order Management Tests",
+    "VERSION": "test",
+    "SECRET_KEY": "test",
+    "PORT": "5001",
+    "HOST": "127.0.0.1",
+    "DB_URL": f"sqlite:///{os.path.join(TEST_DIRECTORY, 'app.sqlite3')}",
+    "LOG_LEVEL": "ERROR",
+    "LOG_DIRECTORY": os.path.join(TEST_DIRECTORY, "logs"),
+    "INGESTION_INTERVAL": "0",
+    "CEP_CACHE_PATH": "",
+    "CEP_DATASET_PATH": "",
+    "QUERY_CACHE_REDIS_URL": "",
+    "METRICS_DIR": "",
+}
+
+# The application reads its settings from the environment when imported
+os.environ.update(TEST_ENVIRONMENT)
+
+from database.database import Database  # noqa: E402
+from database.model.close_sale_outbox import CloseSaleOutbox  # noqa: E402
+from database.model.ingestion_job import IngestionJob  # noqa: E402
+from database.model.ingestion_watermark import (  # noqa: E402
+    IngestionWatermark,
+)
+from database.model.orders import Orders  # noqa: E402
+from log.log import Log  # noqa: E402
+
+
+class FakeLog:
+    """Class to keep the log messages in memory"""
+
+    DEBUG = Log.DEBUG
+    INFO = Log.INFO
+    WARNING = Log.WARNING
+    ERROR = Log.ERROR
+
+    def __init__(self):
+        self.messages = []
+
+    def add_message(self, message: str, *args, level: int = INFO) -> None:
+        self.messages.append(message % args if args else message)
+
+    def add_payload(
+        self, message: str, payload: object, level: int = INFO
+    ) -> None:
+        self.messages.append(f"{message}: {payload!r}")
+
+
+@pytest.fixture
+def log() -> FakeLog:
+    return FakeLog()
+
+
+@pytest.fixture
+def database(tmp_path) -> Database:
+    database = Database()
+    database.DB_URL = f"sqlite:///{os.path.join(tmp_path, 'test.sqlite3')}"
+    database.setup_database_environment()
+
+    yield database
+
+    database.close_database()
+
+
+@pytest.fixture
+def application():
+    """Imports the application with its routes on an empty database"""
+    import app
+    import resources.orders  # noqa: F401
+
+    app.database.setup_database_environment()
+
+    yield app
+
+    with app.database.unit_of_work():
+        for table in [
+            Orders, CloseSaleOutbox, IngestionJob, IngestionWatermark
+        ]:
+            app.database.delete_data_table_condition(table, [])
+
+
+@pytest.fixture
+def client(application):
+    return application.app.test_client()
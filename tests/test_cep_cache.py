@@ -0,0 +1,124 @@
+import sqlite3
+import time
+from threading import Thread
+
+from services.cep_cache import CepCache
+
+ADDRESS = {"cep": "01001-000", "localidade": "São Paulo", "uf": "SP"}
+
+
+def test_get_returns_miss_for_unknown_zip_code():
+    cache = CepCache(ttl=60, max_size=10, negative_ttl=60)
+
+    assert cache.get("01001000") is CepCache.MISS
+    assert cache.stats["misses"] == 1
+
+
+def test_set_and_get_zip_code():
+    cache = CepCache(ttl=60, max_size=10, negative_ttl=60)
+    cache.set("01001000", ADDRESS)
+
+    assert cache.get("01001000") == ADDRESS
+    assert cache.stats["hits"] == 1
+
+
+def test_not_found_zip_code_is_cached_as_none():
+    cache = CepCache(ttl=60, max_size=10, negative_ttl=60)
+    cache.set("99999999", None)
+
+    assert cache.get("99999999") is None
+
+
+def test_expired_zip_code_is_a_miss_but_kept_as_stale():
+    cache = CepCache(ttl=-1, max_size=10, negative_ttl=-1)
+    cache.set("01001000", ADDRESS)
+
+    assert cache.get("01001000") is CepCache.MISS
+    assert cache.get_stale("01001000") == ADDRESS
+
+
+def test_least_recently_used_zip_code_is_evicted():
+    cache = CepCache(ttl=60, max_size=2, negative_ttl=60)
+    cache.set("00000001", ADDRESS)
+    cache.set("00000002", ADDRESS)
+    cache.get("00000001")
+    cache.set("00000003", ADDRESS)
+
+    assert cache.get("00000002") is CepCache.MISS
+    assert cache.get("00000001") == ADDRESS
+    assert cache.stats["evictions"] == 1
+
+
+def test_persisted_zip_codes_survive_a_restart(tmp_path):
+    persist_path = str(tmp_path / "cep" / "cache.sqlite3")
+    cache = CepCache(
+        ttl=60, max_size=10, negative_ttl=60, persist_path=persist_path
+    )
+    cache.start_cache()
+    cache.set("01001000", ADDRESS)
+    cache.set("99999999", None)
+
+    restarted_cache = CepCache(
+        ttl=60, max_size=10, negative_ttl=60, persist_path=persist_path
+    )
+    restarted_cache.start_cache()
+
+    assert restarted_cache.get("01001000") == ADDRESS
+    assert restarted_cache.get("99999999") is None
+    assert restarted_cache.stats["persisted"] is True
+
+
+def test_expired_persisted_zip_codes_are_purged_on_start(tmp_path):
+    persist_path = str(tmp_path / "cache.sqlite3")
+    cache = CepCache(
+        ttl=0.01, max_size=10, negative_ttl=0.01, persist_path=persist_path
+    )
+    cache.start_cache()
+    cache.set("01001000", ADDRESS)
+    time.sleep(0.02)
+
+    restarted_cache = CepCache(
+        ttl=60, max_size=10, negative_ttl=60, persist_path=persist_path
+    )
+    restarted_cache.start_cache()
+
+    assert restarted_cache.get_stale("01001000") is CepCache.MISS
+
+
+def test_persisted_zip_codes_are_shared_between_threads(tmp_path):
+    persist_path = str(tmp_path / "cache.sqlite3")
+    cache = CepCache(
+        ttl=60, max_size=1, negative_ttl=60, persist_path=persist_path
+    )
+    cache.start_cache()
+    thread = Thread(target=cache.set, args=("01001000", ADDRESS))
+    thread.start()
+    thread.join()
+    cache.set("99999999", None)
+
+    assert cache.get("01001000") == ADDRESS
+
+
+def test_memory_hits_do_not_wait_for_a_persisted_write(tmp_path):
+    persist_path = str(tmp_path / "cache.sqlite3")
+    cache = CepCache(
+        ttl=60, max_size=10, negative_ttl=60, persist_path=persist_path
+    )
+    cache.start_cache()
+    cache.set("01001000", ADDRESS)
+    locking_connection = sqlite3.connect(persist_path)
+    locking_connection.execute("BEGIN EXCLUSIVE")
+    thread = Thread(target=cache.set, args=("99999999", None))
+    thread.start()
+    time.sleep(0.05)
+
+    start = time.perf_counter()
+
+    assert cache.get("01001000") == ADDRESS
+    assert time.perf_counter() - start < 0.05
+
+    locking_connection.rollback()
+    thread.join()
+    locking_connection.close()
+
+    assert cache.get("99999999") is None
@@ -0,0 +1,164 @@
+import csv
+import json
+import os
+import struct
+
+import pytest
+
+from services.cep_dataset import CepDataset
+
+ADDRESSES = [
+    {
+        "cep": "01001-000",
+        "logradouro": "Praça da Sé",
+        "bairro": "Sé",
+        "localidade": "São Paulo",
+        "uf": "SP",
+    },
+    {
+        "cep": "01001001",
+        "logradouro": "Praça da Sé - lado par",
+        "bairro": "Sé",
+        "localidade": "São Paulo",
+        "uf": "SP",
+    },
+    {
+        "cep": "20040-002",
+        "logradouro": "Rua da Assembleia",
+        "bairro": "Centro",
+        "localidade": "Rio de Janeiro",
+        "uf": "RJ",
+    },
+    {
+        "cep": "99999-999",
+        "logradouro": "",
+        "bairro": "",
+        "localidade": "Última",
+        "uf": "RS",
+    },
+    {"cep": "123", "logradouro": "Invalid zip code"},
+]
+
+
+def write_csv_dump(path: str) -> str:
+    with open(path, "w", encoding="utf-8", newline="") as dump:
+        writer = csv.DictWriter(dump, fieldnames=list(ADDRESSES[0]))
+        writer.writeheader()
+
+        for address in ADDRESSES:
+            writer.writerow(address)
+
+    return path
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    dataset = CepDataset(str(tmp_path / "dataset" / "cep.idx"))
+    source_path = write_csv_dump(str(tmp_path / "cep.csv"))
+
+    assert dataset.build_dataset(source_path) == 4
+    assert dataset.open_dataset() is True
+
+    yield dataset
+
+    dataset.close_dataset()
+
+
+def test_known_zip_codes_are_found_in_any_format(dataset):
+    assert dataset.get("01001000") == {
+        "logradouro": "Praça da Sé",
+        "bairro": "Sé",
+        "localidade": "São Paulo",
+        "uf": "SP",
+        "cep": "01001-000",
+    }
+    assert dataset.get("20040-002")["localidade"] == "Rio de Janeiro"
+    assert dataset.get("99999999")["localidade"] == "Última"
+    assert dataset.get("01001001")["logradouro"] == "Praça da Sé - lado par"
+
+
+def test_unknown_and_invalid_zip_codes_are_not_found(dataset):
+    assert dataset.get("01001002") is None
+    assert dataset.get("00000000") is None
+    assert dataset.get("123") is None
+    assert dataset.stats == {
+        "loaded": True,
+        "size": 4,
+        "hits": 0,
+        "misses": 2,
+    }
+
+
+def test_json_dump_builds_the_same_dataset(tmp_path):
+    source_path = str(tmp_path / "cep.json")
+
+    with open(source_path, "w", encoding="utf-8") as dump:
+        json.dump(ADDRESSES, dump)
+
+    dataset = CepDataset(str(tmp_path / "cep.idx"))
+    dataset.build_dataset(source_path)
+    dataset.open_dataset()
+
+    assert dataset.get("20040002")["uf"] == "RJ"
+
+    dataset.close_dataset()
+
+
+def test_dataset_is_outdated_until_built_from_the_dump(tmp_path):
+    dataset = CepDataset(str(tmp_path / "cep.idx"))
+    source_path = write_csv_dump(str(tmp_path / "cep.csv"))
+
+    assert dataset.is_outdated(source_path) is True
+
+    dataset.build_dataset(source_path)
+
+    assert dataset.is_outdated(source_path) is False
+
+
+def test_missing_dataset_is_not_loaded(tmp_path):
+    dataset = CepDataset(str(tmp_path / "missing.idx"))
+
+    assert dataset.open_dataset() is False
+    assert dataset.get("01001000") is None
+    assert dataset.stats["loaded"] is False
+
+
+def test_invalid_dataset_file_is_rejected(tmp_path):
+    path = str(tmp_path / "invalid.idx")
+
+    with open(path, "wb") as dataset_file:
+        dataset_file.write(b"NOTCEP00" + bytes(100))
+
+    with pytest.raises(Exception, match="Invalid zip code dataset file"):
+        CepDataset(path).open_dataset()
+
+
+def test_closed_dataset_can_be_opened_again(dataset, tmp_path):
+    dataset.close_dataset()
+
+    assert dataset.get("01001000") is None
+    assert dataset.open_dataset() is True
+    assert dataset.get("01001000")["uf"] == "SP"
+    assert os.path.isfile(tmp_path / "dataset" / "cep.idx")
+
+
+def test_dataset_is_kept_when_the_dump_is_removed(tmp_path):
+    dataset = CepDataset(str(tmp_path / "cep.idx"))
+    source_path = write_csv_dump(str(tmp_path / "cep.csv"))
+    dataset.build_dataset(source_path)
+    os.remove(source_path)
+
+    assert dataset.is_outdated(source_path) is False
+
+
+def test_dataset_file_is_little_endian(dataset, tmp_path):
+    with open(tmp_path / "dataset" / "cep.idx", "rb") as dataset_file:
+        content = dataset_file.read()
+
+    magic, count = struct.unpack_from("<8sI", content)
+    keys_offset = 12 + (CepDataset.PREFIXES + 1) * 4
+
+    assert magic == CepDataset.MAGIC
+    assert struct.unpack_from(f"<{count}I", content, keys_offset) == (
+        1001000, 1001001, 20040002, 99999999
+    )
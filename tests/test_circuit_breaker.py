@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def create_circuit_breaker(reset_timeout: float = 60) -> CircuitBreaker:
+    return CircuitBreaker(
+        name="viacep",
+        failure_threshold=2,
+        reset_timeout=reset_timeout,
+        half_open_calls=1,
+    )
+
+
+def open_circuit(circuit_breaker: CircuitBreaker) -> None:
+    for _ in range(2):
+        circuit_breaker.check()
+        circuit_breaker.record_failure()
+
+
+def test_circuit_opens_after_consecutive_failures():
+    circuit_breaker = create_circuit_breaker()
+    circuit_breaker.record_failure()
+    circuit_breaker.record_success()
+    circuit_breaker.record_failure()
+
+    assert circuit_breaker.is_open is False
+
+    circuit_breaker.record_failure()
+
+    assert circuit_breaker.is_open is True
+
+    with pytest.raises(CircuitOpenError, match="viacep circuit is open"):
+        circuit_breaker.check()
+
+    assert circuit_breaker.stats["rejected"] == 1
+
+
+def test_half_open_probe_closes_the_circuit_on_success():
+    circuit_breaker = create_circuit_breaker(reset_timeout=0.01)
+    open_circuit(circuit_breaker)
+    time.sleep(0.02)
+
+    assert circuit_breaker.allow() is True
+    assert circuit_breaker.allow() is False
+    assert circuit_breaker.stats["state"] == CircuitBreaker.HALF_OPEN
+
+    circuit_breaker.record_success()
+
+    assert circuit_breaker.stats["state"] == CircuitBreaker.CLOSED
+    assert circuit_breaker.allow() is True
+
+
+def test_half_open_probe_opens_the_circuit_on_failure():
+    circuit_breaker = create_circuit_breaker(reset_timeout=0.05)
+    open_circuit(circuit_breaker)
+    time.sleep(0.06)
+
+    assert circuit_breaker.allow() is True
+
+    circuit_breaker.record_failure()
+
+    assert circuit_breaker.is_open is True
+    assert circuit_breaker.stats["opened"] == 2
+
+
+def test_released_probe_lets_another_call_through():
+    circuit_breaker = create_circuit_breaker(reset_timeout=0.01)
+    open_circuit(circuit_breaker)
+    time.sleep(0.02)
+
+    assert circuit_breaker.allow() is True
+
+    circuit_breaker.release_probe()
+
+    assert circuit_breaker.allow() is True
+    assert circuit_breaker.allow() is False
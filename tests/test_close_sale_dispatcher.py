@@ -0,0 +1,146 @@
+import time
+
+from database.model.close_sale_outbox import CloseSaleOutbox
+from services.circuit_breaker import CircuitOpenError
+from services.close_sale_dispatcher import CloseSaleDispatcher
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        self._message = message
+
+    def json(self) -> dict:
+        return {"message": self._message}
+
+
+class FakeHttpClient:
+    def __init__(self, failing_sales: set = (), available: bool = True):
+        self.sent_sales = []
+        self.failing_sales = set(failing_sales)
+        self._available = available
+
+    def is_available(self, upstream: str) -> bool:
+        return self._available
+
+    def put(self, url: str, upstream: str, data: dict) -> FakeResponse:
+        if not self._available:
+            raise CircuitOpenError("The close_sale circuit is open")
+
+        self.sent_sales.append(data["sales_id"])
+
+        if data["sales_id"] in self.failing_sales:
+            return FakeResponse(500, "Error: Store unavailable")
+
+        return FakeResponse(200, "Success")
+
+
+def create_dispatcher(database, log, http_client) -> CloseSaleDispatcher:
+    return CloseSaleDispatcher(
+        database=database,
+        log=log,
+        http_client=http_client,
+        max_workers=2,
+        batch_size=10,
+        max_attempts=2,
+        poll_interval=0.01,
+        backoff_base=0,
+        backoff_max=0,
+    )
+
+
+def add_entries(database, sales_ids: list) -> None:
+    for sales_id in sales_ids:
+        database.insert_data_table(CloseSaleOutbox(sales_id))
+
+
+def get_entries(database) -> dict:
+    entries = database.select_data_table_condition(
+        table=CloseSaleOutbox, conditions=[]
+    )
+
+    return {entry.sales_id: entry for entry in entries}
+
+
+def test_pending_entries_are_sent_once(database, log):
+    http_client = FakeHttpClient()
+    dispatcher = create_dispatcher(database, log, http_client)
+    add_entries(database, [1, 2, 3])
+
+    assert dispatcher.dispatch_pending() == 3
+    assert dispatcher.dispatch_pending() == 0
+    assert sorted(http_client.sent_sales) == [1, 2, 3]
+    assert all(
+        entry.status == "Sent" and entry.attempts == 1
+        for entry in get_entries(database).values()
+    )
+
+
+def test_failed_entries_are_retried_until_max_attempts(database, log):
+    http_client = FakeHttpClient(failing_sales={2})
+    dispatcher = create_dispatcher(database, log, http_client)
+    add_entries(database, [1, 2])
+
+    dispatcher.dispatch_pending()
+    entry = get_entries(database)[2]
+
+    assert entry.status == "Pending"
+    assert entry.attempts == 1
+    assert entry.last_error == "Store unavailable"
+
+    time.sleep(0.01)
+    dispatcher.dispatch_pending()
+    entries = get_entries(database)
+
+    assert entries[1].status == "Sent"
+    assert entries[2].status == "Failed"
+    assert entries[2].attempts == 2
+    assert http_client.sent_sales.count(2) == 2
+
+
+def test_nothing_is_sent_while_the_circuit_is_open(database, log):
+    http_client = FakeHttpClient(available=False)
+    dispatcher = create_dispatcher(database, log, http_client)
+    add_entries(database, [1])
+
+    assert dispatcher.dispatch_pending() == 0
+    assert get_entries(database)[1].status == "Pending"
+    assert get_entries(database)[1].attempts == 0
+
+
+def test_failed_entries_are_sent_again_once_requeued(database, log):
+    http_client = FakeHttpClient(failing_sales={1, 2})
+    dispatcher = create_dispatcher(database, log, http_client)
+    add_entries(database, [1, 2, 3])
+
+    for _ in range(2):
+        dispatcher.dispatch_pending()
+        time.sleep(0.01)
+
+    assert dispatcher.requeue_failed([1]) == 1
+    assert get_entries(database)[1].status == "Pending"
+    assert get_entries(database)[1].attempts == 0
+
+    http_client.failing_sales.clear()
+    dispatcher.dispatch_pending()
+    entries = get_entries(database)
+
+    assert entries[1].status == "Sent"
+    assert entries[2].status == "Failed"
+    assert dispatcher.requeue_failed() == 1
+    assert dispatcher.requeue_failed() == 0
+
+
+def test_requeue_route_resets_the_failed_entries(application, client):
+    application.database.insert_data_table(CloseSaleOutbox(7))
+    application.database.update_data_table_condition(
+        table=CloseSaleOutbox,
+        conditions=[CloseSaleOutbox.sales_id == 7],
+        new_data={CloseSaleOutbox.status: "Failed"},
+    )
+
+    response = client.put("/requeue_close_sales", json={"sales_ids": [7, 8]})
+
+    assert response.status_code == 200
+    assert response.get_json()["requeued"] == 1
+    assert get_entries(application.database)[7].status == "Pending"
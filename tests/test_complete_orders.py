@@ -0,0 +1,88 @@
+import sqlite3
+
+from database.model.orders import Orders
+
+
+def add_orders(database, total: int) -> list:
+    database.insert_ignore(
+        Orders,
+        [
+            {"name": f"Product {sales_id}", "sales_id": sales_id}
+            for sales_id in range(1, total + 1)
+        ],
+    )
+    orders = database.select_data_table_condition(
+        table=Orders, conditions=[], order_by=Orders.order_id
+    )
+
+    return [order.order_id for order in orders]
+
+
+def get_statuses(database) -> dict:
+    orders = database.select_data_table_condition(
+        table=Orders, conditions=[]
+    )
+
+    return {order.order_id: order.invoice_status for order in orders}
+
+
+def test_complete_order(application, client):
+    (order_id,) = add_orders(application.database, 1)
+
+    response = client.put("/complete_order", data={"order_id": order_id})
+
+    assert response.status_code == 200
+    assert get_statuses(application.database)[order_id] == "Completed"
+
+    response = client.put("/complete_order", data={"order_id": order_id})
+
+    assert response.status_code == 400
+    assert "is already completed" in response.json["message"]
+
+    response = client.put("/complete_order", data={"order_id": 999})
+
+    assert response.status_code == 400
+    assert "does not exist" in response.json["message"]
+
+
+def test_complete_orders_counts_every_order(
+    application, client, monkeypatch
+):
+    monkeypatch.setattr(application.database, "INSERT_CHUNK_SIZE", 2)
+    order_ids = add_orders(application.database, 5)
+    client.put("/complete_order", data={"order_id": order_ids[0]})
+
+    response = client.put(
+        "/complete_orders", json={"order_ids": order_ids + [998, 999]}
+    )
+
+    assert response.status_code == 200
+    assert response.json["completed"] == 4
+    assert response.json["already_completed"] == 1
+    assert response.json["not_found"] == [998, 999]
+    assert set(get_statuses(application.database).values()) == {"Completed"}
+
+
+def test_complete_orders_with_more_ids_than_sqlite_variables(
+    application, client
+):
+    variable_limit = sqlite3.connect(":memory:").getlimit(
+        sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER
+    )
+    order_ids = add_orders(application.database, 3)
+    missing_ids = list(range(1000, 1000 + variable_limit))
+
+    response = client.put(
+        "/complete_orders", json={"order_ids": order_ids + missing_ids}
+    )
+
+    assert response.status_code == 200
+    assert response.json["completed"] == 3
+    assert len(response.json["not_found"]) == variable_limit
+
+
+def test_complete_orders_without_ids(application, client):
+    response = client.put("/complete_orders", json={"order_ids": []})
+
+    assert response.status_code == 400
+    assert response.json["message"] == "Error: No order ids were provided"
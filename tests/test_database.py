@@ -0,0 +1,84 @@
+import sqlite3
+
+from database.database import Database
+from database.model.orders import Orders
+
+
+def create_rows(sales_ids: list) -> list:
+    return [
+        {"name": f"Order {sales_id}", "sales_id": sales_id, "quantity": 1}
+        for sales_id in sales_ids
+    ]
+
+
+def get_sales_ids(database) -> list:
+    orders = database.select_data_table_condition(
+        table=Orders, conditions=[]
+    )
+
+    return sorted(order.sales_id for order in orders)
+
+
+def test_insert_ignore_skips_the_conflicting_rows(database):
+    assert database.insert_ignore(Orders, create_rows([1, 2])) == 2
+    assert database.insert_ignore(Orders, create_rows([2, 3, 4])) == 2
+    assert database.insert_ignore(Orders, []) == 0
+    assert get_sales_ids(database) == [1, 2, 3, 4]
+
+
+def test_insert_ignore_inserts_in_chunks(database):
+    database.INSERT_CHUNK_SIZE = 3
+
+    assert database.insert_ignore(Orders, create_rows(range(1, 11))) == 10
+    assert get_sales_ids(database) == list(range(1, 11))
+
+
+def test_insert_ignore_returning_lists_only_the_inserted_rows(database):
+    database.insert_ignore(Orders, create_rows([2]))
+
+    order_ids = database.insert_ignore_returning(
+        Orders, create_rows([1, 2, 3]), column=Orders.order_id
+    )
+    orders = database.select_data_table_condition(
+        table=Orders, conditions=[Orders.order_id.in_(order_ids)]
+    )
+
+    assert order_ids == [2, 3]
+    assert sorted(order.sales_id for order in orders) == [1, 3]
+    assert database.insert_ignore_returning(
+        Orders, [], column=Orders.order_id
+    ) == []
+
+
+def test_missing_columns_are_added_to_existing_tables(tmp_path):
+    database_path = str(tmp_path / "old.sqlite3")
+    connection = sqlite3.connect(database_path)
+    connection.execute(
+        "CREATE TABLE orders (order_id INTEGER PRIMARY KEY, "
+        "name VARCHAR(30), sales_id INTEGER UNIQUE)"
+    )
+    connection.execute("INSERT INTO orders VALUES (1, 'Order', 1)")
+    connection.commit()
+    connection.close()
+
+    database = Database()
+    database.DB_URL = f"sqlite:///{database_path}"
+    database.setup_database_environment()
+    column_migration = database.migrate_columns()
+
+    assert "orders.address_status" in column_migration["created"]
+    assert "orders.invoice_status" in column_migration["created"]
+    assert column_migration["failed"] == {}
+    assert "ix_orders_address_status" in (
+        database.migrate_indexes()["created"]
+    )
+
+    (order,) = database.select_data_table_condition(
+        table=Orders, conditions=[]
+    )
+
+    assert order.address_status == ""
+    assert order.invoice_status == "Pending"
+    assert database.migrate_columns() == {"created": [], "failed": {}}
+
+    database.close_database()
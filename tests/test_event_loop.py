@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.event_loop import EventLoop
+
+
+def test_coroutines_of_different_threads_share_the_loop():
+    event_loop = EventLoop()
+    sleep = event_loop.async_to_sync(asyncio.sleep)
+    loops = []
+
+    async def get_loop():
+        return asyncio.get_running_loop()
+
+    threads = [threading.Thread(target=sleep, args=(0.2,)) for _ in range(5)]
+    start = time.perf_counter()
+
+    try:
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        loops.append(event_loop.run(get_loop()))
+        loops.append(event_loop.run(get_loop()))
+    finally:
+        event_loop.stop()
+
+    assert time.perf_counter() - start < 0.6
+    assert loops[0] is loops[1]
+
+
+def test_coroutine_error_is_raised_to_the_caller():
+    event_loop = EventLoop()
+
+    async def fail():
+        raise ValueError("Coroutine failed")
+
+    try:
+        with pytest.raises(ValueError, match="Coroutine failed"):
+            event_loop.run(fail())
+    finally:
+        event_loop.stop()
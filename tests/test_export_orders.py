@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+
+from database.model.orders import Orders
+
+
+def add_orders(database, total: int) -> None:
+    database.insert_ignore(
+        Orders,
+        [
+            {
+                "name": f"Product {sales_id}",
+                "sales_id": sales_id,
+                "sale_date": f"2024-01-{sales_id:02d} 10:00:00",
+            }
+            for sales_id in range(1, total + 1)
+        ],
+    )
+
+
+def test_orders_are_streamed_as_ndjson(application, client):
+    add_orders(application.database, 5)
+
+    response = client.get("/export_orders?chunk_size=2&start_date=2024-01-02")
+    orders = [
+        json.loads(line)
+        for line in response.get_data(as_text=True).splitlines()
+    ]
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert [order["sales_id"] for order in orders] == [2, 3, 4, 5]
+    assert orders[0]["name"] == "Product 2"
+
+
+def test_orders_are_streamed_as_csv(application, client):
+    add_orders(application.database, 3)
+
+    response = client.get("/export_orders?format=csv&chunk_size=2")
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert [row["sales_id"] for row in rows] == ["1", "2", "3"]
+
+
+def test_error_while_streaming_ends_with_an_error_line(
+    application, client, monkeypatch
+):
+    add_orders(application.database, 4)
+    stream_data_table = application.database.stream_data_table
+
+    def failing_stream(**kwargs):
+        chunks = stream_data_table(**kwargs)
+        yield next(chunks)
+        raise Exception("database is locked")
+
+    monkeypatch.setattr(
+        application.database, "stream_data_table", failing_stream
+    )
+
+    response = client.get("/export_orders?chunk_size=2")
+    lines = response.get_data(as_text=True).splitlines()
+
+    assert len(lines) == 3
+    assert json.loads(lines[-1]) == {"error": "Error: database is locked"}
+
+    response = client.get("/export_orders?format=csv&chunk_size=2")
+    lines = response.get_data(as_text=True).splitlines()
+
+    assert len(lines) == 4
+    assert lines[-1] == "#ERROR: database is locked"
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+import requests
+
+from services.async_http_client import AsyncHttpClient
+from services.circuit_breaker import CircuitBreaker
+from services.http_client import HttpClient
+from services.metrics import Metrics
+
+URL = "http://viacep.test/ws/01001000/json/"
+
+
+def create_client(client_class, metrics: Metrics):
+    circuit_breaker = CircuitBreaker(
+        name="viacep",
+        failure_threshold=1,
+        reset_timeout=0.01,
+        half_open_calls=1,
+    )
+
+    return client_class(
+        connect_timeout=1,
+        read_timeout=1,
+        retries=2,
+        backoff_base=0,
+        backoff_max=0,
+        pool_size=1,
+        circuit_breakers={"viacep": circuit_breaker},
+        metrics=metrics,
+    ), circuit_breaker
+
+
+def create_response(status_code: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+
+    return response
+
+
+def open_circuit(circuit_breaker: CircuitBreaker) -> None:
+    circuit_breaker.check()
+    circuit_breaker.record_failure()
+    time.sleep(0.02)
+
+
+def test_unexpected_error_fails_the_half_open_probe(monkeypatch):
+    metrics = Metrics()
+    http_client, circuit_breaker = create_client(HttpClient, metrics)
+    calls = []
+
+    def broken_request(session, method, url, **kwargs):
+        calls.append(url)
+        raise requests.exceptions.ChunkedEncodingError("Broken body")
+
+    monkeypatch.setattr(requests.Session, "request", broken_request)
+    open_circuit(circuit_breaker)
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        http_client.get(URL, upstream="viacep")
+
+    assert len(calls) == 1
+    assert circuit_breaker.stats["state"] == CircuitBreaker.OPEN
+    assert 'upstream_errors_total{upstream="viacep"} 1' in metrics.render()
+
+    time.sleep(0.02)
+    monkeypatch.setattr(
+        requests.Session,
+        "request",
+        lambda session, method, url, **kwargs: create_response(200),
+    )
+    http_client.get(URL, upstream="viacep")
+
+    assert circuit_breaker.stats["state"] == CircuitBreaker.CLOSED
+
+
+def test_unexpected_async_error_fails_the_half_open_probe(monkeypatch):
+    metrics = Metrics()
+    http_client, circuit_breaker = create_client(AsyncHttpClient, metrics)
+
+    async def broken_send(session, method, url, **kwargs):
+        raise aiohttp.ClientPayloadError("Broken body")
+
+    async def get_and_close():
+        try:
+            await http_client.get(URL, upstream="viacep")
+        finally:
+            await http_client.close()
+
+    monkeypatch.setattr(http_client, "_send", broken_send)
+    open_circuit(circuit_breaker)
+
+    with pytest.raises(aiohttp.ClientPayloadError):
+        asyncio.run(get_and_close())
+
+    assert circuit_breaker.stats["state"] == CircuitBreaker.OPEN
+    assert 'upstream_errors_total{upstream="viacep"} 1' in metrics.render()
+
+
+def test_cancelled_async_call_gives_back_the_probe(monkeypatch):
+    http_client, circuit_breaker = create_client(AsyncHttpClient, Metrics())
+
+    async def slow_send(session, method, url, **kwargs):
+        await asyncio.sleep(1)
+
+    async def cancel_call():
+        task = asyncio.ensure_future(http_client.get(URL, upstream="viacep"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        await http_client.close()
+
+    monkeypatch.setattr(http_client, "_send", slow_send)
+    open_circuit(circuit_breaker)
+    asyncio.run(cancel_call())
+
+    assert circuit_breaker.stats["state"] == CircuitBreaker.HALF_OPEN
+    assert circuit_breaker.allow() is True
@@ -0,0 +1,99 @@
+import time
+
+from services.ingestion_scheduler import IngestionScheduler
+from services.metrics import Metrics
+
+SUMMARY = {"fetched": 2, "added": 2, "skipped": 0, "unenriched": 0}
+
+
+class FakeSalesIngestion:
+    def __init__(self):
+        self.full_syncs = []
+
+    def ingest(self, full_sync: bool = False) -> dict:
+        self.full_syncs.append(full_sync)
+
+        return dict(SUMMARY)
+
+
+def create_scheduler(
+    database, log, sales_ingestion, run_jobs: bool, job_timeout: float = 60
+):
+    return IngestionScheduler(
+        database=database,
+        sales_ingestion=sales_ingestion,
+        log=log,
+        metrics=Metrics(),
+        interval=0,
+        poll_interval=0.01,
+        job_timeout=job_timeout,
+        run_jobs=run_jobs,
+    )
+
+
+def wait_for_job(scheduler, job_id: str) -> dict:
+    for _ in range(500):
+        job = scheduler.get_job(job_id)
+
+        if job["status"] not in ["pending", "running"]:
+            return job
+
+        time.sleep(0.01)
+
+    raise AssertionError(f"The job {job_id} did not finish")
+
+
+def test_triggered_job_runs_in_the_process(database, log):
+    sales_ingestion = FakeSalesIngestion()
+    scheduler = create_scheduler(database, log, sales_ingestion, True)
+
+    job, started = scheduler.trigger(trigger="request", full_sync=True)
+    finished_job = wait_for_job(scheduler, job["job_id"])
+    scheduler.stop()
+
+    assert started is True
+    assert finished_job["status"] == "succeeded"
+    assert finished_job["summary"] == SUMMARY
+    assert sales_ingestion.full_syncs == [True]
+
+
+def test_worker_job_is_left_pending_for_the_scheduler(database, log):
+    worker_ingestion = FakeSalesIngestion()
+    background_ingestion = FakeSalesIngestion()
+    worker = create_scheduler(database, log, worker_ingestion, False)
+    background = create_scheduler(database, log, background_ingestion, True)
+
+    job, started = worker.trigger(trigger="request")
+    same_job, started_again = worker.trigger(trigger="request")
+
+    assert started is True
+    assert job["status"] == "pending"
+    assert started_again is False
+    assert same_job["job_id"] == job["job_id"]
+
+    worker.start()
+    time.sleep(0.05)
+
+    assert worker.get_job(job["job_id"])["status"] == "pending"
+
+    background.start()
+    finished_job = wait_for_job(background, job["job_id"])
+    background.stop()
+    worker.stop()
+
+    assert finished_job["status"] == "succeeded"
+    assert worker_ingestion.full_syncs == []
+    assert background_ingestion.full_syncs == [False]
+
+
+def test_abandoned_job_is_released_by_the_next_trigger(database, log):
+    scheduler = create_scheduler(
+        database, log, FakeSalesIngestion(), False, job_timeout=0
+    )
+    job, _ = scheduler.trigger(trigger="request")
+
+    new_job, started = scheduler.trigger(trigger="request")
+
+    assert started is True
+    assert new_job["job_id"] != job["job_id"]
+    assert scheduler.get_job(job["job_id"])["error"] == "Job abandoned"
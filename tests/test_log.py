@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from log.log import Log
+
+
+def create_log(tmp_path, **settings) -> Log:
+    settings.setdefault("flush_interval", 0.01)
+
+    return Log(directory=str(tmp_path), **settings)
+
+
+def read_log_file(tmp_path) -> str:
+    (log_path,) = tmp_path.iterdir()
+
+    return log_path.read_text()
+
+
+def stop_writer(log: Log, monkeypatch) -> None:
+    """Starts the log with a writer that stops at once, as if it died"""
+    monkeypatch.setattr(log, "_write_messages", lambda: None)
+    log.start_log()
+
+
+def test_messages_are_written_when_the_log_stops(tmp_path):
+    log = create_log(tmp_path, level="INFO")
+    log.add_message("Order %s added", 1)
+    log.add_message("Hidden", level=Log.DEBUG)
+    log.add_payload("Response", {"message": "Success"})
+    log.stop_log()
+    content = read_log_file(tmp_path)
+
+    assert "Online Store Microservice" in content
+    assert "Order 1 added" in content
+    assert "Response: {'message': 'Success'}" in content
+    assert "Hidden" not in content
+
+
+def test_json_messages_carry_the_level_and_request_id(tmp_path):
+    log = create_log(tmp_path, log_format="json")
+    log.set_request_id("request-1")
+    log.add_message("Order added", level=Log.WARNING)
+    log.stop_log()
+    record = json.loads(read_log_file(tmp_path))
+
+    assert record["level"] == "WARNING"
+    assert record["request_id"] == "request-1"
+    assert record["message"] == "Order added"
+
+
+def test_writer_survives_a_failed_write(tmp_path, capsys):
+    log = create_log(tmp_path, batch_size=1)
+    log.add_message("Invalid \ud800 text")
+    log.add_message("Valid text")
+    log.stop_log()
+
+    assert "Valid text" in read_log_file(tmp_path)
+    assert log.dropped == 1
+    assert "Log writer dropped 1 messages" in capsys.readouterr().err
+
+
+def test_block_policy_waits_for_room_in_the_queue(tmp_path):
+    log = create_log(tmp_path, queue_size=1, overflow_policy="block")
+
+    for number in range(50):
+        log.add_message("Order %s added", number)
+
+    log.stop_log()
+
+    assert "Order 49 added" in read_log_file(tmp_path)
+    assert log.dropped == 0
+
+
+@pytest.mark.parametrize("overflow_policy", ["block", "drop"])
+def test_full_queue_without_writer_drops_the_messages(
+    tmp_path, monkeypatch, overflow_policy
+):
+    log = create_log(tmp_path, queue_size=1, overflow_policy=overflow_policy)
+    stop_writer(log, monkeypatch)
+
+    for _ in range(3):
+        log.add_message("Order added")
+
+    log.stop_log()
+
+    assert log.dropped == (3 if overflow_policy == "block" else 2)
@@ -0,0 +1,111 @@
+import json
+import time
+
+from services.metrics import Metrics
+
+
+def create_metrics(directory: str = "") -> Metrics:
+    metrics = Metrics(directory=directory, flush_interval=60)
+    metrics.define(
+        "requests_total", Metrics.COUNTER, "Requests.", labels=["status"]
+    )
+    metrics.define(
+        "duration_seconds",
+        Metrics.HISTOGRAM,
+        "Durations.",
+        labels=["route"],
+        buckets=[0.1, 1],
+    )
+
+    return metrics
+
+
+def get_sample(rendered: str, sample: str) -> float:
+    for line in rendered.splitlines():
+        if line.startswith(f"{sample} "):
+            return float(line.rsplit(" ", 1)[1])
+
+    return 0.0
+
+
+def test_counters_and_histograms_are_rendered():
+    metrics = create_metrics()
+    metrics.inc("requests_total", ("200",))
+    metrics.inc("requests_total", ("200",), 2)
+    metrics.observe("duration_seconds", 0.05, ("/orders",))
+    metrics.observe("duration_seconds", 0.5, ("/orders",))
+    metrics.observe("duration_seconds", 5, ("/orders",))
+    rendered = metrics.render()
+
+    assert "# TYPE requests_total counter" in rendered
+    assert 'requests_total{status="200"} 3' in rendered
+    assert 'duration_seconds_bucket{route="/orders",le="0.1"} 1' in rendered
+    assert 'duration_seconds_bucket{route="/orders",le="1"} 2' in rendered
+    assert 'duration_seconds_bucket{route="/orders",le="+Inf"} 3' in rendered
+    assert 'duration_seconds_count{route="/orders"} 3' in rendered
+    assert get_sample(
+        rendered, 'duration_seconds_sum{route="/orders"}'
+    ) == 5.55
+
+
+def test_collectors_and_ratios_are_rendered():
+    metrics = create_metrics()
+    metrics.define_ratio("ok_ratio", "Share of 200.", "requests_total", "200")
+    metrics.inc("requests_total", ("200",), 3)
+    metrics.add_collector(lambda: [("requests_total", ("500",), 1)])
+    rendered = metrics.render()
+
+    assert 'requests_total{status="500"} 1' in rendered
+    assert "ok_ratio 0.75" in rendered
+
+
+def test_snapshots_of_other_processes_are_added(tmp_path):
+    directory = tmp_path / "metrics"
+    directory.mkdir()
+    (directory / "metrics-1.json").write_text(
+        json.dumps(
+            [
+                ["requests_total", ["200"], 2],
+                ["duration_seconds", ["/orders"], [[0, 1, 0], 0.5, 1]],
+                ["unknown_total", [], 7],
+            ]
+        )
+    )
+    (directory / "metrics-2.json").write_text("not json")
+
+    metrics = create_metrics(str(directory))
+    metrics.inc("requests_total", ("200",))
+    metrics.observe("duration_seconds", 0.5, ("/orders",))
+    rendered = metrics.render()
+
+    assert 'requests_total{status="200"} 3' in rendered
+    assert 'duration_seconds_bucket{route="/orders",le="1"} 2' in rendered
+    assert 'duration_seconds_count{route="/orders"} 2' in rendered
+    assert "unknown_total" not in rendered
+
+
+def test_streamed_response_is_timed_until_closed(
+    application, client, monkeypatch
+):
+    def generate_slow_lines(chunks, export_format: str):
+        for line in ["first\n", "second\n"]:
+            time.sleep(0.05)
+            yield line
+
+    monkeypatch.setattr(
+        "resources.orders.generate_export_lines", generate_slow_lines
+    )
+    sample = (
+        'http_request_duration_seconds_sum{route="/export_orders",'
+        'method="GET"}'
+    )
+    start = get_sample(application.metrics.render(), sample)
+
+    response = client.get("/export_orders")
+
+    assert response.get_data(as_text=True) == "first\nsecond\n"
+
+    response.close()
+    duration = get_sample(application.metrics.render(), sample) - start
+
+    assert duration >= 0.1
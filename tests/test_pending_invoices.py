@@ -0,0 +1,92 @@
+from database.model.orders import Orders
+
+
+def add_orders(database, sale_dates: list, category: str = "Books") -> None:
+    rows = [
+        {
+            "name": f"Product {sales_id}",
+            "price": 10.0,
+            "supplier": "Supplier",
+            "category": category,
+            "description": "Test order",
+            "sales_id": sales_id,
+            "quantity": 1,
+            "value": 10.0,
+            "sale_date": sale_date,
+            "zip_code": "01001000",
+            "country": "Brasil",
+            "city": "Sao Paulo",
+            "state": "SP",
+            "street": "Praça da Sé",
+            "neighborhood": "Sé",
+        }
+        for sales_id, sale_date in enumerate(sale_dates, start=1)
+    ]
+
+    database.insert_ignore(Orders, rows)
+
+
+def get_all_pages(client, query: str) -> list:
+    orders = []
+    cursor = ""
+
+    while True:
+        response = client.get(f"/get_pending_invoices?{query}{cursor}")
+        orders.extend(response.json["orders"])
+
+        if response.json["next_cursor"] is None:
+            return orders
+
+        cursor = f"&cursor={response.json['next_cursor']}"
+
+
+def test_pages_follow_the_cursor(application, client):
+    add_orders(application.database, ["2024-01-01 10:00:00"] * 5)
+
+    first_page = client.get("/get_pending_invoices?limit=2").json
+    orders = get_all_pages(client, "limit=2")
+
+    assert [order["sales_id"] for order in first_page["orders"]] == [1, 2]
+    assert first_page["next_cursor"] == first_page["orders"][-1]["order_id"]
+    assert [order["sales_id"] for order in orders] == [1, 2, 3, 4, 5]
+
+
+def test_total_is_only_counted_on_the_first_page(application, client):
+    add_orders(application.database, ["2024-01-01 10:00:00"] * 3)
+
+    first_page = client.get("/get_pending_invoices?limit=1").json
+    counted_page = client.get(
+        "/get_pending_invoices?limit=1&include_total=true"
+    ).json
+    next_page = client.get(
+        "/get_pending_invoices?limit=1&include_total=true"
+        f"&cursor={counted_page['next_cursor']}"
+    ).json
+
+    assert first_page["total"] is None
+    assert counted_page["total"] == 3
+    assert next_page["total"] is None
+
+
+def test_date_range_includes_the_whole_end_day(application, client):
+    add_orders(
+        application.database,
+        [
+            "2024-01-09 23:59:59",
+            "2024-01-10 00:00:00",
+            "2024-01-15 18:30:00",
+            "2024-01-16 00:00:00",
+        ],
+    )
+
+    orders = get_all_pages(
+        client, "start_date=2024-01-10&end_date=2024-01-15"
+    )
+
+    assert [order["sales_id"] for order in orders] == [2, 3]
+
+
+def test_invalid_dates_are_rejected(client):
+    response = client.get("/get_pending_invoices?start_date=10/01/2024")
+
+    assert response.status_code == 422
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from services.pipeline import Pipeline
+
+
+def test_items_go_through_every_stage_in_order():
+    pipeline = Pipeline(
+        stages=[lambda item: item * 2, lambda item: item + 1], queue_size=2
+    )
+
+    assert list(pipeline.run(range(5))) == [1, 3, 5, 7, 9]
+
+
+def test_stage_returning_none_drops_the_item():
+    pipeline = Pipeline(
+        stages=[lambda item: item if item % 2 else None], queue_size=2
+    )
+
+    assert list(pipeline.run(range(6))) == [1, 3, 5]
+
+
+def test_stage_error_is_raised_to_the_consumer():
+    def failing_stage(item: int) -> int:
+        if item == 3:
+            raise ValueError("Invalid item")
+
+        return item
+
+    pipeline = Pipeline(stages=[failing_stage], queue_size=2)
+
+    with pytest.raises(ValueError, match="Invalid item"):
+        list(pipeline.run(range(10)))
+
+
+def test_source_is_read_only_a_few_items_ahead():
+    produced = []
+
+    def source():
+        for item in range(100):
+            produced.append(item)
+            yield item
+
+    pipeline = Pipeline(stages=[lambda item: item], queue_size=2)
+    results = pipeline.run(source())
+
+    assert next(results) == 0
+    time.sleep(0.3)
+    # The consumed item, two full queues and one item held by each thread
+    assert len(produced) <= 7
+
+    assert list(results) == list(range(1, 100))
+
+
+def test_closing_the_results_stops_the_threads():
+    threads = threading.active_count()
+    pipeline = Pipeline(stages=[lambda item: item], queue_size=1)
+    results = pipeline.run(iter(range(1000)))
+
+    next(results)
+    results.close()
+
+    assert threading.active_count() == threads
@@ -0,0 +1,112 @@
+import fakeredis
+import pytest
+import redis
+
+from database.model.orders import Orders
+from services.query_cache import QueryCache
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+
+    def from_url(url: str) -> fakeredis.FakeRedis:
+        return fakeredis.FakeRedis(server=server)
+
+    monkeypatch.setattr(redis.Redis, "from_url", from_url)
+
+    return server
+
+
+def create_redis_cache(log) -> QueryCache:
+    cache = QueryCache(
+        ttl=60, max_size=10, log=log, redis_url="redis://localhost:6379"
+    )
+    cache.start_cache()
+
+    return cache
+
+
+def test_cached_result_is_returned_with_its_etag(log):
+    cache = QueryCache(ttl=60, max_size=10, log=log)
+    key = cache.make_key("pending", ["orders"], "limit=10")
+
+    assert cache.get(key) is QueryCache.MISS
+
+    etag, body = cache.set(key, '{"orders": []}')
+
+    assert cache.get(key) == (etag, body)
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_expired_and_least_recently_used_results_are_dropped(log):
+    expired_cache = QueryCache(ttl=-1, max_size=10, log=log)
+    expired_cache.set("key", "body")
+
+    assert expired_cache.get("key") is QueryCache.MISS
+
+    cache = QueryCache(ttl=60, max_size=2, log=log)
+    cache.set("first", "body")
+    cache.set("second", "body")
+    cache.get("first")
+    cache.set("third", "body")
+
+    assert cache.get("second") is QueryCache.MISS
+    assert cache.get("first") != QueryCache.MISS
+
+
+def test_invalidated_tables_change_the_key(log):
+    cache = QueryCache(ttl=60, max_size=10, log=log)
+    key = cache.make_key("pending", ["orders"], "")
+    other_key = cache.make_key("outbox", ["close_sale_outbox"], "")
+
+    cache.invalidate({"orders"})
+
+    assert cache.make_key("pending", ["orders"], "") != key
+    assert cache.make_key("outbox", ["close_sale_outbox"], "") == other_key
+    assert cache.stats["invalidations"] == 1
+
+
+def test_redis_results_are_shared_between_caches(log, redis_server):
+    cache = create_redis_cache(log)
+    other_cache = create_redis_cache(log)
+    key = cache.make_key("pending", ["orders"], "")
+    cache.set(key, "body")
+
+    assert other_cache.get(key)[1] == "body"
+
+    other_cache.invalidate({"orders"})
+
+    assert cache.make_key("pending", ["orders"], "") != key
+
+
+def test_redis_failure_on_invalidation_bumps_the_local_version(
+    log, redis_server
+):
+    cache = create_redis_cache(log)
+    key = cache.make_key("pending", ["orders"], "")
+    redis_server.connected = False
+
+    cache.invalidate({"orders"})
+    redis_server.connected = True
+
+    assert cache.make_key("pending", ["orders"], "") != key
+    assert "Query cache invalidation of orders failed" in log.messages[0]
+
+
+def test_redis_failure_on_invalidation_keeps_the_commit(
+    database, log, redis_server
+):
+    cache = create_redis_cache(log)
+    database.use_query_cache(cache)
+    redis_server.connected = False
+
+    database.insert_ignore(Orders, [{"name": "Order", "sales_id": 1}])
+    redis_server.connected = True
+
+    orders = database.select_data_table_condition(
+        table=Orders, conditions=[]
+    )
+
+    assert [order.sales_id for order in orders] == [1]
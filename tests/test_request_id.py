@@ -0,0 +1,50 @@
+from log.log import Log
+from services.address_enrichment import AddressEnrichment
+from services.event_loop import EventLoop
+from services.metrics import Metrics
+from services.pipeline import Pipeline
+
+
+class RequestIdViaCep:
+    def __init__(self):
+        self.request_ids = []
+
+    def query_zip_code(self, zip_code: str) -> dict:
+        self.request_ids.append(Log.REQUEST_ID.get())
+
+        return {}
+
+
+def test_enrichment_threads_keep_the_request_id(log):
+    viacep = RequestIdViaCep()
+    enrichment = AddressEnrichment(viacep, log, Metrics(), max_workers=4)
+    Log.REQUEST_ID.set("enrichment-request")
+
+    enrichment.query_zip_codes({"01001000", "20040002", "30130010"})
+
+    assert viacep.request_ids == ["enrichment-request"] * 3
+
+
+def test_pipeline_stages_keep_the_request_id():
+    pipeline = Pipeline(
+        stages=[lambda item: (item, Log.REQUEST_ID.get())], queue_size=2
+    )
+    Log.REQUEST_ID.set("pipeline-request")
+
+    results = list(pipeline.run(range(3)))
+
+    assert results == [(item, "pipeline-request") for item in range(3)]
+
+
+def test_event_loop_coroutines_keep_the_request_id():
+    event_loop = EventLoop()
+
+    async def get_request_id() -> str:
+        return Log.REQUEST_ID.get()
+
+    Log.REQUEST_ID.set("async-request")
+
+    try:
+        assert event_loop.run(get_request_id()) == "async-request"
+    finally:
+        event_loop.stop()
@@ -0,0 +1,257 @@
+import pytest
+
+from database.model.close_sale_outbox import CloseSaleOutbox
+from database.model.orders import Orders
+from services.address_enrichment import AddressEnrichment
+from services.metrics import Metrics
+from services.sales_ingestion import SalesIngestion
+from services.single_flight import SingleFlight
+
+ADDRESS = {
+    "localidade": "São Paulo",
+    "uf": "SP",
+    "logradouro": "Praça da Sé",
+    "bairro": "Sé",
+}
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data: dict):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self) -> dict:
+        return self._data
+
+
+class FakeHttpClient:
+    def __init__(self, sales: list):
+        self.sales = sales
+        self.params = []
+
+    def get(self, url: str, upstream: str, params: dict) -> FakeResponse:
+        self.params.append(params)
+
+        sales = [dict(sale) for sale in self.sales]
+
+        return FakeResponse(200, {"sales": sales})
+
+
+class FakeViaCep:
+    def __init__(self, available: bool = True):
+        self.available = available
+
+    def query_zip_code(self, zip_code: str) -> dict:
+        if not self.available:
+            raise Exception("The viacep circuit is open")
+
+        return dict(ADDRESS)
+
+
+class FakeCloseSaleDispatcher:
+    def __init__(self):
+        self.wakes = 0
+
+    def wake(self) -> None:
+        self.wakes += 1
+
+
+def create_sales(sales_ids) -> list:
+    return [
+        {
+            "sales_id": sales_id,
+            "name": f"Product {sales_id}",
+            "price": 10.0,
+            "supplier": "Supplier",
+            "category": "Books",
+            "description": "Test sale",
+            "quantity": 1,
+            "value": 10.0,
+            "sale_date": f"2024-01-{sales_id:02d} 10:00:00",
+            "country": "Brasil",
+            "zip_code": "01001000",
+            "city": "",
+            "state": "",
+            "street": "",
+            "neighborhood": "",
+        }
+        for sales_id in sales_ids
+    ]
+
+
+def create_ingestion(
+    database,
+    log,
+    http_client,
+    viacep=None,
+    close_sale_dispatcher=None,
+    batch_size: int = 2,
+) -> SalesIngestion:
+    return SalesIngestion(
+        database=database,
+        log=log,
+        http_client=http_client,
+        async_http_client=None,
+        address_enrichment=AddressEnrichment(
+            viacep=viacep or FakeViaCep(),
+            log=log,
+            metrics=Metrics(),
+            max_workers=2,
+        ),
+        close_sale_dispatcher=(
+            close_sale_dispatcher or FakeCloseSaleDispatcher()
+        ),
+        single_flight=SingleFlight(),
+        batch_size=batch_size,
+        queue_size=2,
+    )
+
+
+def get_orders(database) -> dict:
+    orders = database.select_data_table_condition(
+        table=Orders, conditions=[]
+    )
+
+    return {order.sales_id: order for order in orders}
+
+
+def get_outbox_sales_ids(database) -> list:
+    entries = database.select_data_table_condition(
+        table=CloseSaleOutbox, conditions=[]
+    )
+
+    return sorted(entry.sales_id for entry in entries)
+
+
+def test_unenriched_sales_are_stored_without_outbox_entries(database, log):
+    http_client = FakeHttpClient(create_sales([1, 2, 3]))
+    ingestion = create_ingestion(
+        database, log, http_client, FakeViaCep(available=False)
+    )
+
+    summary = ingestion.ingest()
+    orders = get_orders(database)
+
+    assert summary["added"] == 3
+    assert summary["unenriched"] == 3
+    assert {order.address_status for order in orders.values()} == {
+        AddressEnrichment.UNENRICHED
+    }
+    assert orders[1].city == ""
+    assert get_outbox_sales_ids(database) == []
+    assert ingestion.get_watermark().last_sales_id == 3
+
+
+def test_unenriched_orders_are_enriched_by_the_next_ingestion(database, log):
+    http_client = FakeHttpClient(create_sales([1, 2, 3]))
+    viacep = FakeViaCep(available=False)
+    ingestion = create_ingestion(database, log, http_client, viacep)
+    ingestion.ingest()
+
+    assert ingestion.reenrich_orders() == {"reenriched": 0, "unenriched": 3}
+
+    viacep.available = True
+    http_client.sales = create_sales([4])
+    summary = ingestion.ingest()
+    orders = get_orders(database)
+
+    assert summary["reenriched"] == 3
+    assert summary["added"] == 1
+    assert {order.address_status for order in orders.values()} == {""}
+    assert {order.city for order in orders.values()} == {"São Paulo"}
+    assert orders[2].street == "Praça da Sé"
+    assert get_outbox_sales_ids(database) == [1, 2, 3, 4]
+    assert ingestion.reenrich_orders() == {"reenriched": 0, "unenriched": 0}
+
+
+def test_incremental_ingestion_starts_after_the_watermark(database, log):
+    http_client = FakeHttpClient(create_sales([1, 2, 3]))
+    ingestion = create_ingestion(database, log, http_client)
+    first_summary = ingestion.ingest()
+
+    http_client.sales = create_sales([1, 2, 3, 4, 5])
+    summary = ingestion.ingest()
+
+    assert first_summary["added"] == 3
+    assert http_client.params == [{}, {"after_sales_id": 3}]
+    assert summary["fetched"] == 2
+    assert summary["added"] == 2
+    assert summary["first_sales_id"] == 4
+    assert ingestion.get_watermark().last_sales_id == 5
+    assert sorted(get_orders(database)) == [1, 2, 3, 4, 5]
+
+
+def test_full_sync_skips_the_stored_sales(database, log):
+    http_client = FakeHttpClient(create_sales([2, 3]))
+    ingestion = create_ingestion(database, log, http_client)
+    ingestion.ingest()
+
+    http_client.sales = create_sales([1, 2, 3])
+    summary = ingestion.ingest(full_sync=True)
+
+    assert http_client.params[-1] == {}
+    assert summary["fetched"] == 3
+    assert summary["added"] == 1
+    assert summary["skipped"] == 2
+    assert ingestion.get_watermark().last_sales_id == 3
+    assert sorted(get_orders(database)) == [1, 2, 3]
+
+
+def test_outbox_entries_are_written_with_their_orders(database, log):
+    http_client = FakeHttpClient(create_sales([1, 2, 3]))
+    close_sale_dispatcher = FakeCloseSaleDispatcher()
+    ingestion = create_ingestion(
+        database,
+        log,
+        http_client,
+        close_sale_dispatcher=close_sale_dispatcher,
+    )
+    ingestion.ingest()
+
+    assert get_outbox_sales_ids(database) == sorted(get_orders(database))
+    assert close_sale_dispatcher.wakes == 2
+
+
+def test_failed_batch_rolls_back_its_orders_outbox_and_watermark(
+    database, log, monkeypatch
+):
+    http_client = FakeHttpClient(create_sales([1, 2, 3, 4]))
+    ingestion = create_ingestion(database, log, http_client)
+    upsert = database.upsert
+
+    def failing_upsert(table, row: dict, index_elements: list) -> None:
+        if row.get("last_sales_id") == 4:
+            raise Exception("disk I/O error")
+
+        upsert(table, row, index_elements)
+
+    monkeypatch.setattr(database, "upsert", failing_upsert)
+
+    with pytest.raises(Exception, match="disk I/O error"):
+        ingestion.ingest()
+
+    assert sorted(get_orders(database)) == [1, 2]
+    assert get_outbox_sales_ids(database) == [1, 2]
+    assert ingestion.get_watermark().last_sales_id == 2
+
+
+def test_sales_added_meanwhile_are_left_out_of_the_batch_summary(
+    database, log
+):
+    ingestion = create_ingestion(database, log, FakeHttpClient([]))
+    database.insert_ignore(Orders, [{"name": "Concurrent", "sales_id": 2}])
+    sales = create_sales([1, 2, 3])
+    batch = {
+        "sales": sales,
+        "fetched": 3,
+        "last_sale": sales[-1],
+        "stored_sales_id": None,
+    }
+
+    summary = ingestion.persist_batch(batch)
+    orders = get_orders(database)
+
+    assert summary["added"] == 2
+    assert summary["first_order_id"] == orders[1].order_id == 2
+    assert summary["last_order_id"] == orders[3].order_id == 3
+    assert orders[2].name == "Concurrent"
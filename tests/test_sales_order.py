@@ -0,0 +1,61 @@
+SALES = [
+    {
+        "sales_id": sales_id,
+        "country": "Brasil",
+        "zip_code": "01001000",
+        "city": "",
+        "state": "SP",
+        "street": "Praça da Sé",
+        "neighborhood": "Sé",
+    }
+    for sales_id in range(1, 4)
+]
+
+
+def test_sales_are_returned_enriched(application, client, monkeypatch):
+    monkeypatch.setattr(
+        application.sales_ingestion,
+        "fetch_sales",
+        lambda: [dict(sale) for sale in SALES],
+    )
+    monkeypatch.setattr(
+        application.address_enrichment,
+        "query_zip_codes",
+        lambda zip_codes: {
+            zip_code: {
+                "localidade": "São Paulo",
+                "uf": "SP",
+                "logradouro": "Praça da Sé",
+                "bairro": "Sé",
+            }
+            for zip_code in zip_codes
+        },
+    )
+
+    response = client.get("/get_sales_order")
+
+    assert response.status_code == 200
+    assert [sale["city"] for sale in response.json["sales_data"]] == [
+        "São Paulo"
+    ] * 3
+
+
+def test_enrichment_error_is_answered_with_400(
+    application, client, monkeypatch
+):
+    def failing_enrichment(sales_data: list) -> list:
+        raise Exception("Enrichment failed")
+
+    monkeypatch.setattr(
+        application.sales_ingestion,
+        "fetch_sales",
+        lambda: [dict(sale) for sale in SALES],
+    )
+    monkeypatch.setattr(
+        application.address_enrichment, "enrich_sales", failing_enrichment
+    )
+
+    response = client.get("/get_sales_order")
+
+    assert response.status_code == 400
+    assert response.json == {"message": "Error: Enrichment failed"}
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_of_a_key_share_one_call():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow_call(value: int) -> int:
+        calls.append(value)
+        release.wait(1)
+
+        return value * 2
+
+    with ThreadPoolExecutor(5) as executor:
+        futures = [
+            executor.submit(single_flight.do, "key", slow_call, 21)
+            for _ in range(5)
+        ]
+
+        while single_flight.stats["shared"] < 4:
+            time.sleep(0.005)
+
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == [42] * 5
+    assert calls == [21]
+    assert single_flight.stats == {"calls": 1, "shared": 4}
+
+
+def test_error_is_raised_to_every_caller_and_not_kept():
+    single_flight = SingleFlight()
+
+    def failing_call():
+        raise ValueError("Upstream failed")
+
+    with pytest.raises(ValueError, match="Upstream failed"):
+        single_flight.do("key", failing_call)
+
+    assert single_flight.do("key", lambda: "recovered") == "recovered"
+    assert single_flight.stats == {"calls": 2, "shared": 0}
+
+
+def test_different_keys_do_not_share_calls():
+    single_flight = SingleFlight()
+
+    assert single_flight.do("first", lambda: 1) == 1
+    assert single_flight.do("second", lambda: 2) == 2
+    assert single_flight.stats == {"calls": 2, "shared": 0}
+
+
+def test_async_calls_share_one_call_and_survive_a_cancelled_caller():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def slow_call(value: int) -> int:
+        calls.append(value)
+        await asyncio.sleep(0.05)
+
+        return value * 2
+
+    async def run() -> list:
+        cancelled = asyncio.ensure_future(
+            single_flight.do_async("key", slow_call, 21)
+        )
+        waiting = [
+            asyncio.ensure_future(
+                single_flight.do_async("key", slow_call, 21)
+            )
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+
+        return await asyncio.gather(*waiting)
+
+    assert asyncio.run(run()) == [42] * 3
+    assert calls == [21]
+    assert single_flight.stats == {"calls": 1, "shared": 3}
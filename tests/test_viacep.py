@@ -0,0 +1,45 @@
+from services.cep_cache import CepCache
+from services.cep_dataset import CepDataset
+from services.single_flight import SingleFlight
+from services.viacep import ViaCep
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data: dict):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self) -> dict:
+        return self._data
+
+
+class FakeHttpClient:
+    def __init__(self, data: dict):
+        self.urls = []
+        self._data = data
+
+    def get(self, url: str, upstream: str) -> FakeResponse:
+        self.urls.append(url)
+
+        return FakeResponse(200, self._data)
+
+
+def create_viacep(http_client: FakeHttpClient) -> ViaCep:
+    return ViaCep(
+        cache=CepCache(ttl=60, max_size=10, negative_ttl=60),
+        dataset=CepDataset(""),
+        http_client=http_client,
+        async_http_client=None,
+        single_flight=SingleFlight(),
+    )
+
+
+def test_zip_code_formats_share_one_lookup():
+    http_client = FakeHttpClient({"cep": "01001-000", "uf": "SP"})
+    viacep = create_viacep(http_client)
+
+    assert viacep.query_zip_code("01001-000")["uf"] == "SP"
+    assert viacep.query_zip_code("01001000")["uf"] == "SP"
+    assert viacep.query_zip_code(" 01001 000 ")["uf"] == "SP"
+    assert http_client.urls == [ViaCep.URL.format(zip_code="01001000")]
+    assert viacep.cache.stats["hits"] == 2